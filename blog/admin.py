@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Article, Comment
+from .models import Article, Comment, Tag
 
 admin.site.register(Article)
 admin.site.register(Comment)
+admin.site.register(Tag)
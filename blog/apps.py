@@ -1,6 +1,34 @@
+import logging
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def leaking_aliases(databases, interface):
+    """Aliases keeping persistent, unpooled connections under ASGI.
+
+    ASGI runs sync code on a thread pool and every thread holds its own
+    connection, so CONN_MAX_AGE > 0 leaves one open per thread.
+    """
+    if interface != 'asgi':
+        return []
+    return [
+        alias for alias, database in databases.items()
+        if database.get('CONN_MAX_AGE', 0) != 0 and database.get('ENGINE') != 'blog.pool'
+    ]
 
 
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        aliases = leaking_aliases(
+            settings.DATABASES, getattr(settings, 'SERVER_INTERFACE', ''))
+        if aliases:
+            logger.warning(
+                "Running under ASGI with CONN_MAX_AGE > 0 and no DB_POOL for %s: "
+                "each worker thread keeps its own connection open. Set "
+                "DB_CONN_MAX_AGE=0 or DB_POOL=true.", ", ".join(aliases))
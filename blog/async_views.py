@@ -0,0 +1,179 @@
+"""Async read-only twins of the article, comment and favorite views.
+
+Each view borrows everything from the synchronous DRF view it mirrors
+(queryset, filters, serializer, pagination, permissions, response cache and
+conditional GET) and only swaps the database round-trips for Django's async
+ORM, so responses match the sync endpoints byte for byte. Article lists take
+the ``BLOG_FAST_JSON`` fast path (blog.fastpath) whenever the sync view
+would. They are mounted under ``/api/async/`` and only pay off under an ASGI
+server, e.g.
+``gunicorn blog_project.asgi:application -k uvicorn.workers.UvicornWorker``.
+"""
+from abc import ABCMeta, abstractmethod
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.response import Response
+from .cache import (
+    CachedArticleDetailMixin, CachedArticleListMixin,
+    acached_response, adetail_key, alist_key
+)
+from .conditional import ConditionalArticleDetailMixin, ConditionalArticleListMixin
+from .fastpath import FastArticleListMixin
+from .models import Article
+from .views import (
+    ArticleDetailView, ArticleListCreateView, CommentDetailView,
+    CommentListCreateView, FavoriteArticlesView
+)
+
+
+class AsyncReadView(View, metaclass=ABCMeta):
+    """Run the GET path of ``view_class`` with async database access"""
+    view_class = None
+    http_method_names = ['get', 'head']
+
+    async def get(self, request, *args, **kwargs):
+        # Mirrors APIView.dispatch.
+        view = self.view_class()
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            await self.initial(view, request, *args, **kwargs)
+            response = await self.read(view, request, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+        return self.detach(response)
+
+    async def initial(self, view, request, *args, **kwargs):
+        """Authenticate and check permissions, inline when no query is needed"""
+        if all(not getattr(authenticator, 'requires_database', True)
+               for authenticator in request.authenticators):
+            view.initial(request, *args, **kwargs)
+        else:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+
+    @abstractmethod
+    async def read(self, view, request, **kwargs):
+        """Return the response of the GET path through the async ORM"""
+
+    @staticmethod
+    async def load_viewer_flags(view, rows):
+        """Fetch article viewer flags up front; serializers would query synchronously"""
+        serializer = view.get_serializer()
+        if hasattr(serializer, 'viewer_relations'):
+            await Article.aattach_viewer_flags(
+                rows, view.request.user, serializer.viewer_relations())
+
+    @staticmethod
+    def detach(response):
+        """Render here; Django would render a DRF response in a worker thread"""
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        plain = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            plain[header] = value
+        return plain
+
+
+class AsyncListView(AsyncReadView):
+    """Async ListModelMixin.list, including the article cache and validators"""
+
+    async def read(self, view, request, **kwargs):
+        async def render():
+            if isinstance(view, FastArticleListMixin):
+                fast = view.fast_rows()
+                if fast is not None:
+                    return await self.fast_list(view, request, *fast)
+            queryset = view.filter_queryset(view.get_queryset())
+            page = None
+            if view.paginator is not None:
+                page = await view.paginator.apaginate_queryset(
+                    queryset, request, view=view)
+            rows = page if page is not None else [row async for row in queryset]
+            await self.load_viewer_flags(view, rows)
+            if isinstance(view, ConditionalArticleListMixin):
+                return view.conditional_list_response(request, rows, page is not None)
+            serializer = view.get_serializer(rows, many=True)
+            if page is not None:
+                return view.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+
+        if isinstance(view, CachedArticleListMixin):
+            return await acached_response(
+                request, 'list', lambda: alist_key(request, view.ranked_by_counters), render)
+        return await render()
+
+    @staticmethod
+    async def fast_list(view, request, queryset, plan):
+        """FastArticleListMixin.list through the async ORM"""
+        page = None
+        if view.paginator is not None:
+            page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+        rows = page if page is not None else [row async for row in queryset]
+        flags = {}
+        if plan.relations:
+            flags = await plan.model.aviewer_flag_ids(
+                request.user, [row.id for row in rows], plan.relations)
+        return view.fast_list_response(request, plan, rows, page is not None, flags)
+
+
+class AsyncDetailView(AsyncReadView):
+    """Async RetrieveModelMixin.retrieve, including the article cache and validators"""
+
+    async def read(self, view, request, **kwargs):
+        async def render():
+            instance = await self.aget_object(view)
+            await self.load_viewer_flags(view, [instance])
+            if isinstance(view, ConditionalArticleDetailMixin):
+                return view.conditional_detail_response(request, instance)
+            return Response(view.get_serializer(instance).data)
+
+        if isinstance(view, CachedArticleDetailMixin):
+            object_id = kwargs[view.lookup_url_kwarg or view.lookup_field]
+            return await acached_response(
+                request, 'detail', lambda: adetail_key(request, object_id), render)
+        return await render()
+
+    @staticmethod
+    async def aget_object(view):
+        """GenericAPIView.get_object through the async ORM"""
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query.")
+        view.check_object_permissions(view.request, instance)
+        return instance
+
+
+class AsyncArticleListView(AsyncListView):
+    """Async GET for ArticleListCreateView"""
+    view_class = ArticleListCreateView
+
+
+class AsyncArticleDetailView(AsyncDetailView):
+    """Async GET for ArticleDetailView"""
+    view_class = ArticleDetailView
+
+
+class AsyncFavoriteArticlesView(AsyncListView):
+    """Async GET for FavoriteArticlesView"""
+    view_class = FavoriteArticlesView
+
+
+class AsyncCommentListView(AsyncListView):
+    """Async GET for CommentListCreateView"""
+    view_class = CommentListCreateView
+
+
+class AsyncCommentDetailView(AsyncDetailView):
+    """Async GET for CommentDetailView"""
+    view_class = CommentDetailView
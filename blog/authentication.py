@@ -0,0 +1,177 @@
+"""JWT authentication that trusts signed claims instead of loading the User.
+
+Access tokens carry ``username``, ``is_active`` and ``is_staff`` claims, so
+``StatelessJWTAuthentication`` builds ``request.user`` without a query. The
+full row is loaded on first use of ``resolve_user()``. Revocation goes through
+the cache: single tokens are denylisted by ``jti`` until they expire, and
+``revoke_user_tokens()`` rejects every token a user was issued before now.
+Refreshing re-reads the User and stamps fresh claims, and access tokens are
+short-lived (``ACCESS_TOKEN_LIFETIME``), which bounds how stale the claims
+can get; changes to ``is_active``, ``is_staff`` or ``is_superuser`` revoke
+the user's tokens outright (see blog.signals).
+"""
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme, TokenObtainPairSerializerExtension, TokenRefreshSerializerExtension
+)
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication, JWTStatelessUserAuthentication
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer, TokenRefreshSerializer
+)
+from rest_framework_simplejwt.settings import api_settings
+
+PREFIX = 'blog:jwt'
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_JWT_DENYLIST_CACHE', 'default')]
+
+
+def _jti_key(jti):
+    return f'{PREFIX}:deny:{jti}'
+
+
+def _user_key(user_id):
+    return f'{PREFIX}:revoked:{user_id}'
+
+
+def revoke_token(token):
+    """Denylist one token until it would have expired anyway"""
+    remaining = int(token.get('exp', 0) - time.time()) + 1
+    if remaining > 0:
+        get_cache().set(_jti_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+
+def revoke_user_tokens(user_id):
+    """Reject every token issued to the user up to now"""
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME,
+                   api_settings.REFRESH_TOKEN_LIFETIME)
+    get_cache().set(_user_key(user_id), int(time.time()),
+                    int(lifetime.total_seconds()) + 1)
+
+
+def is_revoked(token):
+    values = get_cache().get_many([
+        _jti_key(token.get(api_settings.JTI_CLAIM)),
+        _user_key(token.get(api_settings.USER_ID_CLAIM)),
+    ])
+    if values.get(_jti_key(token.get(api_settings.JTI_CLAIM))):
+        return True
+    revoked_at = values.get(_user_key(token.get(api_settings.USER_ID_CLAIM)))
+    # iat has one-second resolution; tokens issued in the revoking second go too.
+    return revoked_at is not None and token.get('iat', 0) <= revoked_at
+
+
+class ClaimsUser(TokenUser):
+    """request.user built from token claims; the User row loads on demand"""
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def db_user(self):
+        model = get_user_model()
+        try:
+            return model.objects.get(**{api_settings.USER_ID_FIELD: self.id})
+        except model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code='user_not_found')
+
+
+def resolve_user(user):
+    """Return a real User instance for request.user, querying only if needed"""
+    return user.db_user if isinstance(user, ClaimsUser) else user
+
+
+class DenylistMixin:
+    """Reject tokens revoked through the denylist cache"""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken("Token has been revoked")
+        return token
+
+
+class StatelessJWTAuthentication(DenylistMixin, JWTStatelessUserAuthentication):
+    """Authenticate from token claims alone, without a User query"""
+    # Safe to run inline in async views (see blog.async_views).
+    requires_database = False
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
+        return user
+
+
+class DenylistJWTAuthentication(DenylistMixin, JWTAuthentication):
+    """Database-backed JWT authentication that honours the denylist"""
+
+
+def stamp_claims(token, user):
+    """Write the claims ClaimsUser reads from user's current state"""
+    token['username'] = user.get_username()
+    token['is_active'] = user.is_active
+    token['is_staff'] = user.is_staff
+    return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Stamp the claims ClaimsUser reads into issued token pairs"""
+
+    @classmethod
+    def get_token(cls, user):
+        return stamp_claims(super().get_token(user), user)
+
+
+class DenylistTokenRefreshSerializer(TokenRefreshSerializer):
+    """Mint access tokens with claims re-read from the User, never from a revoked token"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken("Token has been revoked")
+        model = get_user_model()
+        try:
+            user = model.objects.get(
+                **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+        except (KeyError, model.DoesNotExist):
+            user = None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account')
+
+        # The access token copies the refresh token's claims; replace the
+        # login-time ones.
+        data = {'access': str(stamp_claims(refresh.access_token, user))}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            stamp_claims(refresh, user)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
+
+
+# OpenAPI: document the subclasses exactly like the simplejwt originals.
+class JWTScheme(SimpleJWTScheme):
+    target_class = 'blog.authentication.DenylistMixin'
+    match_subclasses = True
+
+
+class ClaimsTokenObtainPairSchema(TokenObtainPairSerializerExtension):
+    target_class = 'blog.authentication.ClaimsTokenObtainPairSerializer'
+
+
+class DenylistTokenRefreshSchema(TokenRefreshSerializerExtension):
+    target_class = 'blog.authentication.DenylistTokenRefreshSerializer'
@@ -0,0 +1,254 @@
+"""Response cache for anonymous article reads.
+
+Serialized ``ArticleSerializer`` output is cached under keys that embed a
+version counter: one global counter for list pages and one per article for
+detail pages. Writes never delete entries, they bump the counter so the old
+keys simply stop being read and age out of the backend.
+
+Likes, favorites and comments only move counters, so they bump the article's
+own counter and a second global one that only the lists ranked by those
+counters (trending, top) read. Chronological and search list pages keep
+serving their counts for up to ``BLOG_RESPONSE_CACHE_TIMEOUT`` seconds
+instead of being thrown away on every like.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+from .conditional import not_modified, set_validators
+from .routers import use_primary
+
+PREFIX = 'blog:resp'
+LIST_VERSION_KEY = f'{PREFIX}:articles:v'
+RANKED_LIST_VERSION_KEY = f'{PREFIX}:articles:ranked:v'
+METRIC_KINDS = ('list', 'detail')
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_RESPONSE_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'BLOG_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def _article_version_key(article_id):
+    return f'{PREFIX}:article:{article_id}:v'
+
+
+def _fresh_version():
+    # Seeded from the clock so an evicted counter never restarts at a value
+    # that older, still cached entries were written under.
+    return time.time_ns()
+
+
+def _version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        version = _fresh_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def invalidate_articles(article_ids, counters_only=False):
+    """Drop cached detail and list pages that may show these articles.
+
+    With counters_only only the lists ranked by engagement counters go;
+    other list pages keep their counts until they expire.
+    """
+    for article_id in article_ids:
+        _bump(_article_version_key(article_id))
+    _bump(RANKED_LIST_VERSION_KEY if counters_only else LIST_VERSION_KEY)
+
+
+def schedule_invalidation(article_ids, counters_only=False):
+    """Invalidate now and again once the current transaction commits.
+
+    The first bump hides stale entries immediately; the second discards
+    anything a concurrent reader re-cached from the pre-commit state.
+    """
+    article_ids = list(article_ids)
+    invalidate_articles(article_ids, counters_only)
+    transaction.on_commit(lambda: invalidate_articles(article_ids, counters_only))
+
+
+def _record(kind, outcome):
+    cache = get_cache()
+    key = f'{PREFIX}:metrics:{kind}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """Return {kind: {'hits': n, 'misses': n, 'hit_ratio': r}}"""
+    keys = [f'{PREFIX}:metrics:{kind}:{outcome}'
+            for kind in METRIC_KINDS for outcome in ('hits', 'misses')]
+    values = get_cache().get_many(keys)
+    stats = {}
+    for kind in METRIC_KINDS:
+        hits = values.get(f'{PREFIX}:metrics:{kind}:hits', 0)
+        misses = values.get(f'{PREFIX}:metrics:{kind}:misses', 0)
+        total = hits + misses
+        stats[kind] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    get_cache().delete_many([
+        f'{PREFIX}:metrics:{kind}:{outcome}'
+        for kind in METRIC_KINDS for outcome in ('hits', 'misses')])
+
+
+def is_cacheable(request):
+    return (
+        getattr(settings, 'BLOG_RESPONSE_CACHE_ENABLED', True)
+        and request.method == 'GET'
+        and not request.user.is_authenticated
+    )
+
+
+def _request_digest(request):
+    # Host and path are part of the key because pagination links are
+    # absolute URLs (the async endpoints serve the same data under /async/).
+    params = sorted(request.query_params.lists())
+    return hashlib.sha1(repr(
+        (request.get_host(), request.path, params)).encode('utf-8')).hexdigest()
+
+
+def list_key(request, ranked=False):
+    version = _version(LIST_VERSION_KEY)
+    if ranked:
+        version = f'{version}.{_version(RANKED_LIST_VERSION_KEY)}'
+    return f'{PREFIX}:list:{version}:{_request_digest(request)}'
+
+
+def detail_key(request, article_id):
+    version = _version(_article_version_key(article_id))
+    return f'{PREFIX}:detail:{article_id}:{version}:{_request_digest(request)}'
+
+
+def _entry(response):
+    return {'data': response.data, 'etag': response.get('ETag')}
+
+
+def _entry_response(request, entry):
+    etag = entry.get('etag')
+    if etag is not None:
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(Response(entry['data']), etag)
+    return Response(entry['data'])
+
+
+def cached_response(request, kind, key_func, render):
+    """Serve render()'s data from cache for anonymous GETs.
+
+    The ETag set by render() is stored with the data so cache
+    hits can still answer conditional requests with 304. Misses render from
+    the primary database: a lagging replica must not be cached for everyone.
+    """
+    if not is_cacheable(request):
+        return render()
+    cache = get_cache()
+    key = key_func()
+    entry = cache.get(key)
+    if entry is not None:
+        _record(kind, 'hits')
+        return _entry_response(request, entry)
+    _record(kind, 'misses')
+    with use_primary():
+        response = render()
+    if response.status_code == 200:
+        cache.set(key, _entry(response), _timeout())
+    return response
+
+
+async def _aversion(key):
+    cache = get_cache()
+    version = await cache.aget(key)
+    if version is None:
+        version = _fresh_version()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+async def _arecord(kind, outcome):
+    cache = get_cache()
+    key = f'{PREFIX}:metrics:{kind}:{outcome}'
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+async def alist_key(request, ranked=False):
+    version = await _aversion(LIST_VERSION_KEY)
+    if ranked:
+        version = f'{version}.{await _aversion(RANKED_LIST_VERSION_KEY)}'
+    return f'{PREFIX}:list:{version}:{_request_digest(request)}'
+
+
+async def adetail_key(request, article_id):
+    version = await _aversion(_article_version_key(article_id))
+    return f'{PREFIX}:detail:{article_id}:{version}:{_request_digest(request)}'
+
+
+async def acached_response(request, kind, key_func, render):
+    """cached_response for async views; key_func and render are coroutines"""
+    if not is_cacheable(request):
+        return await render()
+    cache = get_cache()
+    key = await key_func()
+    entry = await cache.aget(key)
+    if entry is not None:
+        await _arecord(kind, 'hits')
+        return _entry_response(request, entry)
+    await _arecord(kind, 'misses')
+    with use_primary():
+        response = await render()
+    if response.status_code == 200:
+        await cache.aset(key, _entry(response), _timeout())
+    return response
+
+
+class CachedArticleListMixin:
+    """Cache anonymous list pages of a generic article list view"""
+    # Set on lists ordered by likes, favorites or comments.
+    ranked_by_counters = False
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, 'list', lambda: list_key(request, self.ranked_by_counters),
+            lambda: super(CachedArticleListMixin, self).list(request, *args, **kwargs))
+
+
+class CachedArticleDetailMixin:
+    """Cache anonymous detail responses of a generic article detail view"""
+
+    def retrieve(self, request, *args, **kwargs):
+        article_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return cached_response(
+            request, 'detail', lambda: detail_key(request, article_id),
+            lambda: super(CachedArticleDetailMixin, self).retrieve(request, *args, **kwargs))
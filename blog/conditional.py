@@ -0,0 +1,121 @@
+"""Conditional GET support (ETag / 304) for article views.
+
+The ETag is derived from the rows a view fetches anyway: ``updated_at``,
+the denormalized counters, the nested author fields, the viewer's
+like/favorite flags and the thumbnail renditions. A matching
+``If-None-Match`` is answered with 304 before any serializer runs.
+
+No Last-Modified is sent: likes, favorites, comments and finished
+renditions change the body without touching ``updated_at``, so an
+``If-Modified-Since`` check would answer 304 with a stale body.
+"""
+import hashlib
+from django.contrib.auth.models import User
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.response import Response
+from .models import Article
+
+
+def article_fingerprint(article):
+    """Everything an ArticleSerializer row shows that can change.
+
+    Only relations the queryset already loaded are read, so trimmed
+    querysets (no author, no profile) never trigger per-row lookups.
+    """
+    fingerprint = (
+        article.pk, article.updated_at.isoformat(),
+        article.like_count, article.favorite_count, article.comment_count,
+        article.author_id,
+        getattr(article, 'is_liked', None), getattr(article, 'is_favorited', None),
+        # Renditions finish without touching updated_at; skipped when deferred.
+        article.__dict__.get('thumbnail_renditions'),
+    )
+    if not Article.author.is_cached(article):
+        return fingerprint
+    author = article.author
+    fingerprint += (author.username, author.email)
+    if User.profile.is_cached(author):
+        profile = getattr(author, 'profile', None)
+        fingerprint += ((profile.bio, profile.avatar_renditions) if profile else None,)
+    return fingerprint
+
+
+def etag_for(articles, extra=(), fingerprint=article_fingerprint):
+    """Return the weak ETag of a sequence of articles"""
+    digest = hashlib.sha1(repr(
+        (tuple(fingerprint(article) for article in articles), tuple(extra))
+    ).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the request's If-None-Match still matches"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if isinstance(response, HttpResponseNotModified):
+        set_validators(response, etag)
+        return response
+    return None
+
+
+def set_validators(response, etag):
+    response['ETag'] = etag
+    # Bodies differ per credential (viewer flags).
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalArticleListMixin:
+    """ETag for a paginated generic article list view"""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        return self.conditional_list_response(request, rows, page is not None)
+
+    def conditional_list_response(self, request, rows, paginated):
+        """304 or the serialized rows, with validators set"""
+        serializer = self.get_serializer(rows, many=True)
+        # Viewer flags are part of the ETag, so load them before hashing.
+        serializer.child.attach_viewer_flags(rows)
+        return self.validated_list_response(
+            request, rows, paginated, lambda: serializer.data)
+
+    def validated_list_response(self, request, rows, paginated, render,
+                                fingerprint=article_fingerprint):
+        """304, or the rows' data from render(), with validators set"""
+        extra = ()
+        if paginated:
+            extra = (self.paginator.get_next_link(),
+                     self.paginator.get_previous_link())
+        etag = etag_for(rows, extra, fingerprint)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if paginated:
+            response = self.get_paginated_response(render())
+        else:
+            response = Response(render())
+        return set_validators(response, etag)
+
+
+class ConditionalArticleDetailMixin:
+    """ETag for a generic article detail view"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_detail_response(request, self.get_object())
+
+    def conditional_detail_response(self, request, instance):
+        """304 or the serialized instance, with validators set"""
+        serializer = self.get_serializer(instance)
+        serializer.attach_viewer_flags([instance])
+        etag = etag_for([instance])
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = Response(serializer.data)
+        return set_validators(response, etag)
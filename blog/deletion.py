@@ -0,0 +1,214 @@
+"""Background, batched account deletion.
+
+DELETE /api/profile/ only deactivates the user, which revokes their tokens,
+and records an ``AccountDeletion`` job that the response links to. Once the
+transaction commits, the job runs on a thread (``BLOG_ACCOUNT_DELETION_WORKERS``
+threads, 0 runs inline) and removes the account's rows
+``BLOG_ACCOUNT_DELETION_BATCH`` at a time, one short transaction per batch:
+
+1. likes and favorites, taking them off the articles' counters like an
+   unlike would;
+2. the user's comments, taking them off comment_count;
+3. the user's articles: first the comments, likes and favorites other users
+   left on them, then the articles themselves;
+4. the User row, which by then only cascades to its profile and uploads.
+
+Every batch invalidates the cached responses of the articles it touched and
+adds its row count to the job's progress. Each step re-reads what is left,
+so a job cut short by a restart picks up where it stopped when
+``resume_account_deletions`` runs.
+
+The deleted user's tokens are revoked, so the status URL the 202 links to
+carries the job id signed with SECRET_KEY (``status_token``); a bare or
+tampered id does not resolve.
+"""
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .cache import schedule_invalidation
+from .models import AccountDeletion, Article, Comment
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_STEPS = {'likes': 'likes', 'favorited_by': 'favorites'}
+STATUS_SALT = 'blog.account-deletion'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """The deletion thread pool, or None when jobs run inline"""
+    global _executor
+    workers = getattr(settings, 'BLOG_ACCOUNT_DELETION_WORKERS', 0)
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='account-deletion')
+        return _executor
+
+
+def status_token(job):
+    """The signed job id the status endpoint accepts"""
+    return signing.Signer(salt=STATUS_SALT).sign(str(job.pk))
+
+
+def job_id_from_token(token):
+    """The job id signed into token, or None if the signature does not match"""
+    try:
+        return signing.Signer(salt=STATUS_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+
+
+def schedule(user):
+    """Deactivate user and queue the deletion of their account; return the job"""
+    with transaction.atomic():
+        job, _ = AccountDeletion.objects.get_or_create(user_id=user.pk)
+        if user.is_active:
+            user.is_active = False
+            # post_save revokes the user's tokens.
+            user.save(update_fields=['is_active'])
+        transaction.on_commit(lambda: submit(job.pk))
+    return job
+
+
+def submit(job_id):
+    """Run the job on the pool when there is one"""
+    executor = get_executor()
+    if executor is None:
+        run(job_id)
+        return
+
+    def work():
+        try:
+            run(job_id)
+        finally:
+            connections.close_all()
+
+    executor.submit(work)
+
+
+def claim(job_id, stale_before=None):
+    """Mark the job running; False if it is done or another run holds it.
+
+    A running job last updated before stale_before is taken over.
+    """
+    claimable = AccountDeletion.objects.filter(
+        pk=job_id, status__in=[AccountDeletion.PENDING, AccountDeletion.FAILED])
+    if stale_before is not None:
+        claimable = claimable | AccountDeletion.objects.filter(
+            pk=job_id, status=AccountDeletion.RUNNING, updated_at__lt=stale_before)
+    return bool(claimable.update(status=AccountDeletion.RUNNING, updated_at=timezone.now()))
+
+
+def run(job_id, stale_before=None):
+    """Delete the job's account in batches; return False if it could not be claimed.
+
+    Failures are logged and leave the job FAILED for resume_account_deletions.
+    """
+    if not claim(job_id, stale_before):
+        return False
+    job = AccountDeletion.objects.get(pk=job_id)
+    try:
+        for relation, step in ENGAGEMENT_STEPS.items():
+            _release_engagement(job, relation, step)
+        _delete_comments(job, Comment.objects.filter(user_id=job.user_id))
+        _delete_articles(job)
+        with transaction.atomic():
+            # Nothing the pre_delete counter receiver would touch is left.
+            User.objects.filter(pk=job.user_id).delete()
+    except Exception:
+        logger.exception("Deletion of user %s failed", job.user_id)
+        _save(job, status=AccountDeletion.FAILED)
+        return True
+    _save(job, status=AccountDeletion.DONE, finished_at=timezone.now())
+    return True
+
+
+def _batch_size():
+    return getattr(settings, 'BLOG_ACCOUNT_DELETION_BATCH', 500)
+
+
+def _save(job, **changes):
+    for name, value in changes.items():
+        setattr(job, name, value)
+    AccountDeletion.objects.filter(pk=job.pk).update(
+        progress=job.progress, updated_at=timezone.now(), **changes)
+
+
+def _advance(job, step, removed):
+    if removed:
+        job.progress[step] = job.progress.get(step, 0) + removed
+        _save(job)
+
+
+def _release_engagement(job, relation, step):
+    """Delete the user's through rows of relation, decrementing counters"""
+    through = Article._meta.get_field(relation).remote_field.through
+    counter = Article.ENGAGEMENT_COUNTERS[relation]
+    # trend_score keeps the removed events until a rebuild, see blog.trending.
+    changes = {counter: F(counter) - 1}
+    while True:
+        with transaction.atomic():
+            rows = list(through.objects.select_for_update().filter(
+                user_id=job.user_id).order_by('pk').values_list(
+                'pk', 'article_id')[:_batch_size()])
+            if not rows:
+                return
+            through.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+            article_ids = [article_id for _, article_id in rows]
+            # One row per article and user, so each article loses exactly one.
+            Article.objects.filter(pk__in=article_ids).update(**changes)
+            schedule_invalidation(article_ids, counters_only=True)
+        _advance(job, step, len(rows))
+
+
+def _delete_comments(job, comments):
+    """Delete comments in batches, decrementing comment_count"""
+    while True:
+        with transaction.atomic():
+            rows = list(comments.select_for_update().order_by('pk').values_list(
+                'pk', 'article_id')[:_batch_size()])
+            if not rows:
+                return
+            Comment.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+            counts = Counter(article_id for _, article_id in rows)
+            Article.adjust_comment_counts(
+                {article_id: -total for article_id, total in counts.items()})
+            schedule_invalidation(counts, counters_only=True)
+        _advance(job, 'comments', len(rows))
+
+
+def _delete_articles(job):
+    """Delete the user's articles a batch at a time, dependents first"""
+    while True:
+        article_ids = list(Article.objects.filter(author_id=job.user_id).order_by(
+            'pk').values_list('pk', flat=True)[:_batch_size()])
+        if not article_ids:
+            return
+        _delete_comments(job, Comment.objects.filter(article_id__in=article_ids))
+        for relation in ENGAGEMENT_STEPS:
+            through = Article._meta.get_field(relation).remote_field.through
+            _delete_in_batches(through.objects.filter(article_id__in=article_ids))
+        with transaction.atomic():
+            # post_delete receivers drop search entries and cached responses.
+            _, removed = Article.objects.filter(pk__in=article_ids).delete()
+        _advance(job, 'articles', removed.get(Article._meta.label, 0))
+
+
+def _delete_in_batches(queryset):
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:_batch_size()])
+        if not pks:
+            return
+        queryset.model.objects.filter(pk__in=pks).delete()
@@ -0,0 +1,298 @@
+"""Read-only fast path for the article list endpoints.
+
+With ``BLOG_FAST_JSON`` on, a GET page skips model instances and
+``ArticleSerializer.to_representation``. The page is fetched as
+``values_list()`` rows holding just the columns the (sparse) serializer
+shows. Each row becomes its response dict through extractors compiled once
+per serializer shape, and ``FastJSONRenderer`` encodes the page with orjson.
+Bodies, ETags and pagination links are byte-for-byte those of the serializer
+path. ``FastPathTestCase`` diffs the two paths, and ``benchmark_rendering``
+reports each one's CPU cost per row.
+
+Only field types whose output is known get compiled. A serializer with any
+other field takes the serializer path, and so do full-text searches (their
+ranks are floats), the browsable API and indented JSON.
+"""
+import copy
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from . import images
+from .conditional import ConditionalArticleListMixin
+from .renderers import FastJSONRenderer
+from .serializers import ImageField
+
+SEARCH_PARAM = 'search'
+
+# Serializer fields that render these model columns' values unchanged.
+IDENTITY_FIELDS = {
+    serializers.IntegerField: models.IntegerField,
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.EmailField: models.CharField,
+    serializers.BooleanField: models.BooleanField,
+}
+# Serializer fields whose to_representation() works on an unbound copy.
+CONVERTED_FIELDS = (serializers.DateTimeField, serializers.ListField)
+
+# What conditional.article_fingerprint() reads from every article, in order.
+FINGERPRINT_COLUMNS = (
+    'id', 'updated_at', 'like_count', 'favorite_count', 'comment_count', 'author_id')
+FINGERPRINT_FLAGS = ('is_liked', 'is_favorited')
+
+_plans = {}
+
+
+class Unsupported(Exception):
+    """A serializer shape the fast path cannot reproduce"""
+
+
+class Columns:
+    """Ordered, de-duplicated values_list() column names"""
+
+    def __init__(self):
+        self.names = []
+
+    def index(self, name):
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+
+class RowContext:
+    """Per-request inputs of the extractors"""
+    __slots__ = ('build_url', 'flags', 'timezone')
+
+    def __init__(self, build_url, flags):
+        self.build_url = build_url
+        self.flags = flags
+        self.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+class Plan:
+    """Columns to fetch for one serializer shape and how to render a row of them"""
+
+    def __init__(self, model, columns, build, relations, fingerprint):
+        self.model = model
+        self.columns = columns
+        self.build = build
+        # Engagement relations whose viewer flag the rows show.
+        self.relations = relations
+        self.fingerprint = fingerprint
+
+
+def get_plan(serializer, queryset):
+    """The Plan for serializer over queryset, or None when unsupported"""
+    related = queryset.query.select_related
+    key = (type(serializer), tuple(serializer.fields), repr(related))
+    try:
+        return _plans[key]
+    except KeyError:
+        pass
+    try:
+        plan = _compile(serializer, related)
+    except Unsupported:
+        plan = None
+    _plans[key] = plan
+    return plan
+
+
+def _compile(serializer, related):
+    if related is not False and not isinstance(related, dict):
+        raise Unsupported('select_related() without fields')
+    model = serializer.Meta.model
+    columns = Columns()
+    flags = set()
+    build = _compile_serializer(serializer, model, '', columns, flags)
+    relations = [relation for relation, flag in model.VIEWER_FLAGS.items() if flag in flags]
+    fingerprint = _compile_fingerprint(
+        columns, related or {}, flags, 'thumbnail' in serializer.fields)
+    return Plan(model, columns.names, build, relations, fingerprint)
+
+
+def _compile_serializer(serializer, root, prefix, columns, flags):
+    extractors = [
+        (name, _compile_field(field, root, prefix, columns, flags))
+        for name, field in serializer.fields.items() if not field.write_only
+    ]
+
+    def build(row, context):
+        return {name: extract(row, context) for name, extract in extractors}
+    return build
+
+
+def _compile_field(field, root, prefix, columns, flags):
+    if isinstance(field, ImageField):
+        _column(root, f'{prefix}{field.source}')
+        name = columns.index(f'{prefix}{field.source}')
+        record = columns.index(f'{prefix}{field.source}_renditions')
+        return lambda row, context: images.renditions_for(
+            row[name], row[record], context.build_url)
+    if field.source == '*':
+        raise Unsupported(field.field_name)
+    if not prefix and field.source in getattr(root, 'VIEWER_FLAGS', {}).values():
+        pk = columns.index(root._meta.pk.name)
+        flag = field.source
+        flags.add(flag)
+        return lambda row, context: row[pk] in context.flags[flag]
+    path = prefix + field.source.replace('.', '__')
+    if isinstance(field, serializers.BaseSerializer):
+        return _compile_nested(field, root, path, columns, flags)
+
+    column = _column(root, path)
+    if column.is_relation:
+        raise Unsupported(path)
+    index = columns.index(path)
+    kind = type(field)
+    if kind in IDENTITY_FIELDS and isinstance(column, IDENTITY_FIELDS[kind]):
+        return lambda row, context: row[index]
+    if kind in CONVERTED_FIELDS:
+        convert = copy.deepcopy(field).to_representation
+        if _is_plain_iso_datetime(field):
+            return _datetime_extractor(index, convert)
+
+        def extract(row, context):
+            value = row[index]
+            return None if value is None else convert(value)
+        return extract
+    raise Unsupported(path)
+
+
+def _is_plain_iso_datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (type(field) is serializers.DateTimeField and not hasattr(field, 'timezone')
+            and isinstance(output_format, str) and output_format.lower() == ISO_8601)
+
+
+def _datetime_extractor(index, convert):
+    """DateTimeField.to_representation() with the current timezone looked up once per page"""
+    def extract(row, context):
+        value = row[index]
+        if value is None:
+            return None
+        if value.tzinfo is None or context.timezone is None:
+            return convert(value)
+        text = value.astimezone(context.timezone).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return extract
+
+
+def _compile_nested(field, root, path, columns, flags):
+    relation = _column(root, path)
+    if isinstance(field, serializers.ListSerializer) or not (
+            relation.many_to_one or relation.one_to_one):
+        raise Unsupported(path)
+    pk = columns.index(f'{path}__{relation.related_model._meta.pk.name}')
+    build = _compile_serializer(field, root, f'{path}__', columns, flags)
+
+    def extract(row, context):
+        # DRF renders a missing related row (null key or no reverse
+        # one-to-one row) as None.
+        if row[pk] is None:
+            return None
+        return build(row, context)
+    return extract
+
+
+def _column(model, path):
+    """The model field at a values() lookup path such as 'author__profile__bio'"""
+    field = None
+    try:
+        for part in path.split('__'):
+            if field is not None:
+                model = field.related_model
+            field = model._meta.get_field(part)
+    except (FieldDoesNotExist, AttributeError):
+        raise Unsupported(path)
+    return field
+
+
+def _compile_fingerprint(columns, related, flags, thumbnail):
+    """Row version of conditional.article_fingerprint(); keep the two in step.
+
+    Instances carry what their queryset loaded: renditions unless the
+    thumbnail is deferred, the author (and profile) when select_related.
+    """
+    base = [columns.index(name) for name in FINGERPRINT_COLUMNS]
+    article_id, updated = base[0], base[1]
+    shown = [flag if flag in flags else None for flag in FINGERPRINT_FLAGS]
+    renditions = columns.index('thumbnail_renditions') if thumbnail else None
+    author = profile = None
+    if 'author' in related:
+        author = (columns.index('author__username'), columns.index('author__email'))
+        if 'profile' in related['author']:
+            profile = (columns.index('author__profile__id'),
+                       columns.index('author__profile__bio'),
+                       columns.index('author__profile__avatar_renditions'))
+
+    def fingerprint(row, context):
+        values = [row[index] for index in base]
+        values[1] = row[updated].isoformat()
+        values += [row[article_id] in context.flags[flag] if flag else None
+                   for flag in shown]
+        values.append(row[renditions] if renditions is not None else None)
+        if author is not None:
+            values += [row[author[0]], row[author[1]]]
+            if profile is not None:
+                values.append(
+                    (row[profile[1]], row[profile[2]]) if row[profile[0]] is not None else None)
+        return tuple(values)
+    return fingerprint
+
+
+class FastArticleListMixin(ConditionalArticleListMixin):
+    """Serve article list GETs through the fast path when BLOG_FAST_JSON is on"""
+
+    def fast_path_allowed(self):
+        request = self.request
+        return (getattr(settings, 'BLOG_FAST_JSON', False)
+                and request.method in ('GET', 'HEAD')
+                and not request.query_params.get(SEARCH_PARAM, '').strip())
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.fast_path_allowed():
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+                for renderer in renderers]
+
+    def fast_rows(self):
+        """values_list() rows and the Plan rendering them, or None to serialize"""
+        request = self.request
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not (self.fast_path_allowed() and isinstance(renderer, FastJSONRenderer)
+                and renderer.get_indent(request.accepted_media_type, {}) is None):
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = get_plan(self.get_serializer(), queryset)
+        if plan is None:
+            return None
+        # Keyset cursors are built from the ordering columns of the edge rows.
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        ordering = [field.lstrip('-') for field in get_ordering(queryset)] if get_ordering else []
+        names = [*plan.columns, *(name for name in ordering if name not in plan.columns)]
+        return queryset.values_list(*names, named=True), plan
+
+    def fast_list_response(self, request, plan, rows, paginated, flags):
+        """validated_list_response() for fetched rows and their viewer flags"""
+        context = RowContext(request.build_absolute_uri, flags)
+        return self.validated_list_response(
+            request, rows, paginated,
+            lambda: [plan.build(row, context) for row in rows],
+            fingerprint=lambda row: plan.fingerprint(row, context))
+
+    def list(self, request, *args, **kwargs):
+        fast = self.fast_rows()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        queryset, plan = fast
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        flags = {}
+        if plan.relations:
+            flags = plan.model.viewer_flag_ids(
+                request.user, [row.id for row in rows], plan.relations)
+        return self.fast_list_response(request, plan, rows, page is not None, flags)
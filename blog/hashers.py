@@ -0,0 +1,63 @@
+"""Password hashers with cost parameters from settings, and a hashing cap.
+
+``PASSWORD_HASHER`` picks the hasher new passwords get (Argon2id by
+default); the others stay in ``PASSWORD_HASHERS`` so existing hashes still
+verify. Django re-hashes a password on the next successful login whenever
+its algorithm or cost parameters are not the preferred ones, so switching
+hashers or costs needs no migration.
+
+With ``PASSWORD_HASH_CONCURRENCY`` > 0, at most that many registrations
+per process hash at once; the rest wait their turn. Hashing still runs on
+the request thread, which is busy either way (registration is synchronous),
+so this only caps the cores and memory a burst of signups spends on
+hashing. argon2-cffi and bcrypt release the GIL, so waiting and hashing
+threads leave other requests free to run.
+"""
+import threading
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_limits = {}  # concurrency -> semaphore
+_limits_lock = threading.Lock()
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id costed by BLOG_ARGON2_TIME_COST / _MEMORY_COST / _PARALLELISM"""
+
+    @property
+    def time_cost(self):
+        return settings.BLOG_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.BLOG_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.BLOG_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt(SHA-256) costed by BLOG_BCRYPT_ROUNDS"""
+
+    @property
+    def rounds(self):
+        return settings.BLOG_BCRYPT_ROUNDS
+
+
+def _hash_limit():
+    """The semaphore capping concurrent hashes, or None when uncapped"""
+    concurrency = getattr(settings, 'BLOG_PASSWORD_HASH_CONCURRENCY', 0)
+    if concurrency <= 0:
+        return None
+    with _limits_lock:
+        return _limits.setdefault(concurrency, threading.BoundedSemaphore(concurrency))
+
+
+def hash_password(password):
+    """make_password(), at most PASSWORD_HASH_CONCURRENCY at a time"""
+    limit = _hash_limit()
+    if limit is None:
+        return hashers.make_password(password)
+    with limit:
+        return hashers.make_password(password)
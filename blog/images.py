@@ -0,0 +1,197 @@
+"""Rendition pipeline for uploaded images (article thumbnails, avatars).
+
+Requests only store the original upload; clients are served renditions.
+Once the saving transaction commits, the original goes to a process pool
+(``BLOG_IMAGE_WORKERS`` processes, 0 renders inline) that decodes it once,
+applies its EXIF orientation and encodes every size in
+``BLOG_IMAGE_RENDITIONS`` as JPEG and WebP, largest first, each size scaled
+down from the previous one. Nothing but pixels is written back: EXIF, XMP,
+ICC profiles and comments are all dropped.
+
+Renditions are saved under ``MEDIA_ROOT/renditions/`` named by the SHA-256
+of their bytes, so a URL never changes content and can be cached forever;
+identical uploads share files. The model's ``<field>_renditions`` JSON
+records the status and paths, and serializers turn it into URLs.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+PENDING, READY, FAILED = 'pending', 'ready', 'failed'
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """The rendering pool, or None when images render inline"""
+    global _executor
+    workers = getattr(settings, 'BLOG_IMAGE_WORKERS', 0)
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, not forked: the web process has threads and open
+            # connections, and render() needs nothing but Pillow.
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def render(data, sizes, quality):
+    """Encode {name: box} renditions of image bytes; runs in a pool process.
+
+    Returns {name: {'width', 'height', 'webp': bytes, 'jpeg': bytes}}.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    renditions = {}
+    for name, box in sorted(sizes.items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((box, box), Image.LANCZOS)
+        flat = image
+        if has_alpha:
+            # JPEG has no alpha channel: flatten onto white.
+            flat = Image.new('RGB', image.size, 'white')
+            flat.paste(image, mask=image.getchannel('A'))
+        renditions[name] = {
+            'width': image.width,
+            'height': image.height,
+            'webp': _encode(image, 'webp', quality),
+            'jpeg': _encode(flat, 'jpeg', quality),
+        }
+    return renditions
+
+
+def _encode(image, kind, quality):
+    buffer = io.BytesIO()
+    if kind == 'jpeg':
+        image.save(buffer, FORMATS[kind], quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, FORMATS[kind], quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def store(data, kind):
+    """Save rendition bytes under their content hash; return the storage name"""
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    name = f'renditions/{digest[:2]}/{digest}.{EXTENSIONS[kind]}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def schedule(instance, field):
+    """Mark instance.<field> pending and render it after the transaction commits"""
+    name = getattr(instance, field).name
+    renditions = {'status': PENDING, 'source': name} if name else {}
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{f'{field}_renditions': renditions})
+    setattr(instance, f'{field}_renditions', renditions)
+    if name:
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(lambda: submit(model, pk, field, name))
+
+
+def submit(model, pk, field, name):
+    """Render the original stored as name, on the pool when there is one"""
+    sizes = settings.BLOG_IMAGE_RENDITIONS[field]
+    quality = settings.BLOG_IMAGE_QUALITY
+    try:
+        with default_storage.open(name) as original:
+            data = original.read()
+    except OSError:
+        logger.exception("Cannot read %s for renditions", name)
+        finish(model, pk, field, name, None)
+        return
+    executor = get_executor()
+    if executor is None:
+        try:
+            renditions = render(data, sizes, quality)
+        except Exception:
+            logger.warning("Cannot render %s", name, exc_info=True)
+            renditions = None
+        finish(model, pk, field, name, renditions)
+        return
+
+    def done(future):
+        # Runs on the pool's management thread, which has its own connection.
+        try:
+            finish(model, pk, field, name, future.result())
+        except Exception:
+            logger.warning("Cannot render %s", name, exc_info=True)
+            finish(model, pk, field, name, None)
+        finally:
+            connections.close_all()
+
+    executor.submit(render, data, sizes, quality).add_done_callback(done)
+
+
+def finish(model, pk, field, name, renditions):
+    """Store rendered bytes and record them, unless the image changed meanwhile"""
+    if renditions is None:
+        record = {'status': FAILED, 'source': name}
+    else:
+        record = {'status': READY, 'source': name, 'sizes': {
+            size: {
+                'width': rendition['width'],
+                'height': rendition['height'],
+                **{kind: store(rendition[kind], kind) for kind in FORMATS},
+            } for size, rendition in renditions.items()
+        }}
+    updated = model.objects.filter(pk=pk, **{field: name}).update(
+        **{f'{field}_renditions': record})
+    if updated:
+        _invalidate(model, pk)
+
+
+def _invalidate(model, pk):
+    """Drop cached article responses that show the image"""
+    from .cache import schedule_invalidation
+    from .models import Article
+
+    if model is Article:
+        schedule_invalidation([pk])
+    else:
+        schedule_invalidation(list(Article.objects.filter(
+            author__profile__pk=pk).values_list('pk', flat=True)))
+
+
+def rendition_urls(instance, field, build_url):
+    """Public shape of instance.<field>, see renditions_for()"""
+    return renditions_for(getattr(instance, field).name,
+                          getattr(instance, f'{field}_renditions', None), build_url)
+
+
+def renditions_for(name, record, build_url):
+    """Status plus per-size URLs of the image stored as name, or None"""
+    if not name:
+        return None
+    record = record or {}
+    data = {'status': record.get('status', PENDING)}
+    if record.get('status') == READY:
+        data['renditions'] = {
+            size: {
+                'width': rendition['width'],
+                'height': rendition['height'],
+                **{kind: build_url(default_storage.url(rendition[kind]))
+                   for kind in FORMATS},
+            } for size, rendition in record['sizes'].items()
+        }
+    return data
@@ -0,0 +1,124 @@
+import json
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from .run_benchmarks import HOST, Command as RunBenchmarks, _percentile
+
+USERNAME_PREFIX = 'authbench_'
+PASSWORD = 'BenchPass123'
+
+
+class Command(BaseCommand):
+    help = ("Measure registration and login throughput per hasher, "
+            "overall and per CPU-second, and write a JSON report")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasher', action='append', default=None,
+                            choices=sorted(settings.BLOG_PASSWORD_HASHERS),
+                            help="Hasher to measure (repeatable; default: all)")
+        parser.add_argument('--requests', type=int, default=40,
+                            help="Registrations, then logins, per hasher")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Client threads")
+        parser.add_argument('--output', default='auth_bench_results.json')
+
+    def handle(self, *args, **opts):
+        if opts['requests'] < 1:
+            raise CommandError("--requests must be positive")
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(f"Users named {USERNAME_PREFIX}* already exist; delete them first")
+        results = {}
+        for name in opts['hasher'] or list(settings.BLOG_PASSWORD_HASHERS):
+            preferred = settings.BLOG_PASSWORD_HASHERS[name]
+            hashers = [preferred] + [
+                path for path in settings.PASSWORD_HASHERS if path != preferred]
+            usernames = [f'{USERNAME_PREFIX}{name}_{i}' for i in range(opts['requests'])]
+            try:
+                with override_settings(PASSWORD_HASHERS=hashers):
+                    results[name] = {
+                        'register': self._run(reverse('register'), [
+                            {'username': username, 'email': f'{username}@example.com',
+                             'password': PASSWORD} for username in usernames], opts),
+                        'login': self._run(reverse('token_obtain_pair'), [
+                            {'username': username, 'password': PASSWORD}
+                            for username in usernames], opts),
+                    }
+            finally:
+                User.objects.filter(username__in=usernames).delete()
+            for scenario, result in results[name].items():
+                self.stdout.write(
+                    f"{name:<8} {scenario:<9} {result['throughput_rps']:>8.1f} req/s  "
+                    f"{result['per_cpu_second']:>8.1f} req/CPU-s  "
+                    f"p50 {result['latency_ms']['p50']:>8.2f}ms")
+
+        report = {
+            'meta': {
+                'commit': RunBenchmarks._commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'cpus': os.cpu_count(),
+                'requests_per_scenario': opts['requests'],
+                'concurrency': opts['concurrency'],
+                'hash_concurrency': settings.BLOG_PASSWORD_HASH_CONCURRENCY,
+            },
+            'hashers': results,
+        }
+        with open(opts['output'], 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {opts['output']}"))
+
+    def _run(self, url, payloads, opts):
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+
+        def worker(chunk, own_connection):
+            client = Client(HTTP_HOST=HOST)
+            try:
+                for payload in chunk:
+                    start = time.perf_counter()
+                    response = client.post(url, payload)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses[response.status_code] = statuses.get(
+                            response.status_code, 0) + 1
+            finally:
+                if own_connection:
+                    connections.close_all()
+
+        workers = max(1, opts['concurrency'])
+        chunks = [payloads[i::workers] for i in range(workers)]
+        # Process CPU time covers every client thread, hashing included.
+        cpu_started, started = time.process_time(), time.perf_counter()
+        if workers == 1:
+            worker(chunks[0], own_connection=False)
+        else:
+            threads = [threading.Thread(target=worker, args=(chunk, True))
+                       for chunk in chunks]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+            'per_cpu_second': round(len(latencies) / cpu, 2) if cpu else None,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 3),
+                'p50': round(_percentile(latencies, 50), 3),
+                'p99': round(_percentile(latencies, 99), 3),
+            },
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        }
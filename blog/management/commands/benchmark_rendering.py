@@ -0,0 +1,85 @@
+import json
+import time
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from blog.models import Article
+from .run_benchmarks import HOST, Command as RunBenchmarks
+
+MODES = {'serializer': False, 'fast': True}
+
+
+class Command(BaseCommand):
+    help = ("Compare the CPU cost per row of article list pages rendered through "
+            "the serializers and through the BLOG_FAST_JSON fast path")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help="Measured requests per scenario and mode")
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--output', default='render_bench_results.json')
+
+    def handle(self, *args, **opts):
+        if opts['requests'] < 1:
+            raise CommandError("--requests must be positive")
+        if not Article.objects.exists():
+            raise CommandError("No articles; run seed_benchmark_data first")
+        base = f"{reverse('article-list')}?page_size={opts['page_size']}"
+        scenarios = {
+            'article-list': base,
+            'article-list-summary': f'{base}&mode=summary',
+            'trending': f"{reverse('article-trending')}?page_size={opts['page_size']}",
+        }
+
+        results = {}
+        # Measure rendering, not the anonymous response cache.
+        with override_settings(BLOG_RESPONSE_CACHE_ENABLED=False):
+            for name, url in scenarios.items():
+                results[name] = {mode: self._run(url, fast, opts) for mode, fast in MODES.items()}
+                serializer, fast = results[name]['serializer'], results[name]['fast']
+                if fast['cpu_us_per_row'] and serializer['cpu_us_per_row']:
+                    results[name]['speedup'] = round(
+                        serializer['cpu_us_per_row'] / fast['cpu_us_per_row'], 2)
+                self.stdout.write(
+                    f"{name:<22} serializer {serializer['cpu_us_per_row']:>8.1f} us/row  "
+                    f"fast {fast['cpu_us_per_row']:>8.1f} us/row  "
+                    f"x{results[name].get('speedup', 0):.2f}")
+
+        report = {
+            'meta': {
+                'commit': RunBenchmarks._commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'requests_per_mode': opts['requests'],
+                'page_size': opts['page_size'],
+            },
+            'scenarios': results,
+        }
+        with open(opts['output'], 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {opts['output']}"))
+
+    def _run(self, url, fast, opts):
+        client = Client(HTTP_HOST=HOST)
+        with override_settings(BLOG_FAST_JSON=fast):
+            for _ in range(opts['warmup']):
+                client.get(url)
+            rows = len(client.get(url).json()['results'])
+            # CPU time of the whole request, database driver included.
+            cpu_started, started = time.process_time(), time.perf_counter()
+            for _ in range(opts['requests']):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+        total_rows = rows * opts['requests']
+        return {
+            'rows_per_request': rows,
+            'cpu_ms_per_request': round(cpu * 1000 / opts['requests'], 3),
+            'cpu_us_per_row': round(cpu * 1e6 / total_rows, 2) if total_rows else None,
+            'wall_ms_per_request': round(wall * 1000 / opts['requests'], 3),
+        }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from blog import trending
+from blog.cache import schedule_invalidation
+
+
+class Command(BaseCommand):
+    help = "Drop decayed trending scores (run periodically) or rebuild them all"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-score', type=float, default=None,
+                            help="Decayed score below which an article leaves the feed "
+                                 "(defaults to BLOG_TRENDING_MIN_SCORE)")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute every score from comments and counters first")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **opts):
+        if opts['rebuild']:
+            scored = trending.rebuild(opts['batch_size'])
+            self.stdout.write(f"Rebuilt trending scores for {scored} article(s)")
+        cleared = trending.compact(opts['min_score'])
+        if opts['rebuild'] or cleared:
+            schedule_invalidation([], counters_only=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Cleared {cleared} decayed trending score(s)"))
@@ -0,0 +1,34 @@
+import json
+from django.core.management.base import BaseCommand
+from blog.profiling import METRICS, PERCENTILES, build_report, reset_report
+
+
+class Command(BaseCommand):
+    help = "Print per-endpoint p50/p95/p99 collected by ProfilingMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true', help="Emit the raw report as JSON")
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Clear the collected histograms after printing")
+
+    def handle(self, *args, **options):
+        report = build_report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        elif not report:
+            self.stdout.write(
+                "No samples yet (is PROFILING enabled and the cache shared?)")
+        else:
+            columns = [f"{metric} p{p}" for metric in METRICS for p in PERCENTILES]
+            self.stdout.write("\t".join(["endpoint", "requests", *columns]))
+            for endpoint, entry in sorted(report.items()):
+                values = [
+                    str(entry[metric].get(f"p{p}", "-"))
+                    for metric in METRICS for p in PERCENTILES
+                ]
+                self.stdout.write("\t".join(
+                    [endpoint, str(entry['requests']), *values]))
+        if options['reset']:
+            reset_report()
@@ -0,0 +1,37 @@
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from blog.models import Upload
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads idle for too long and stray partial files (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=None,
+                            help="Idle time after which an upload is dropped "
+                                 "(defaults to BLOG_UPLOAD_EXPIRY_HOURS)")
+
+    def handle(self, *args, **opts):
+        hours = opts['hours'] if opts['hours'] is not None else settings.BLOG_UPLOAD_EXPIRY_HOURS
+        cutoff = timezone.now() - timedelta(hours=hours)
+        # Deleting through the ORM runs the post_delete receiver for each
+        # upload, which removes its partial file.
+        deleted, _ = Upload.objects.filter(updated_at__lt=cutoff).delete()
+
+        # Partial files whose row is gone (e.g. a crash between the two) and
+        # chunk files a crashed append left behind.
+        strays = 0
+        directory = settings.BLOG_UPLOAD_DIR
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        live = {pk.hex for pk in Upload.objects.values_list('pk', flat=True)}
+        for name in names:
+            path = os.path.join(directory, name)
+            if name not in live and os.path.getmtime(path) < time.time() - hours * 3600:
+                os.remove(path)
+                strays += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired upload(s) and {strays} stray partial file(s)"))
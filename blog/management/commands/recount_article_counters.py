@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+from blog.cache import schedule_invalidation
+from blog.models import Article, Comment
+
+BATCH_SIZE = 500
+
+
+def _through_count(through):
+    """Correlated COUNT(*) over an Article M2M through table (or Comment)"""
+    counts = (
+        through.objects.filter(article_id=OuterRef('pk'))
+        .order_by()
+        .values('article_id')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute Article.like_count / favorite_count / comment_count and repair any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report drifted articles without writing the fixes")
+
+    def handle(self, *args, dry_run=False, **options):
+        expected = Article.objects.annotate(
+            expected_likes=_through_count(Article.likes.through),
+            expected_favorites=_through_count(Article.favorited_by.through),
+            expected_comments=_through_count(Comment),
+        )
+        drifted = [
+            pk
+            for pk, like_count, favorite_count, comment_count, likes, favorites, comments
+            in expected.values_list(
+                'pk', 'like_count', 'favorite_count', 'comment_count',
+                'expected_likes', 'expected_favorites', 'expected_comments').iterator()
+            if (like_count, favorite_count, comment_count) != (likes, favorites, comments)
+        ]
+
+        if not dry_run:
+            # Recount inside the UPDATE itself so concurrent likes between the
+            # scan and the write are not overwritten with stale numbers.
+            for start in range(0, len(drifted), BATCH_SIZE):
+                with transaction.atomic():
+                    Article.objects.filter(
+                        pk__in=drifted[start:start + BATCH_SIZE]
+                    ).update(
+                        like_count=_through_count(Article.likes.through),
+                        favorite_count=_through_count(
+                            Article.favorited_by.through),
+                        comment_count=_through_count(Comment),
+                    )
+            schedule_invalidation(drifted, counters_only=True)
+
+        verb = "Found" if dry_run else "Repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(drifted)} article(s) with drifted counters"))
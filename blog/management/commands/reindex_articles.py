@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for every article"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Articles indexed per statement")
+        parser.add_argument(
+            '--database', default=None,
+            help="Database alias to reindex (defaults to the articles' write database)")
+
+    def handle(self, *args, batch_size=500, database=None, **options):
+        backend = get_search_backend(database)
+        total = backend.reindex(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} article(s) with {type(backend).__name__}"))
@@ -0,0 +1,17 @@
+import json
+from django.core.management.base import BaseCommand
+from blog.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print hit/miss counters of the anonymous article response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Zero the counters after printing them")
+
+    def handle(self, *args, reset=False, **options):
+        self.stdout.write(json.dumps(cache_stats(), indent=2))
+        if reset:
+            reset_cache_stats()
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from blog import deletion
+from blog.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = ("Finish account deletions that failed or were cut short by a restart "
+            "(run after deploys and periodically)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=float, default=15,
+                            help="Take over running jobs with no progress for this long")
+
+    def handle(self, *args, **opts):
+        stale_before = timezone.now() - timedelta(minutes=opts['minutes'])
+        jobs = AccountDeletion.objects.exclude(
+            status=AccountDeletion.DONE).values_list('pk', flat=True)
+        finished = failed = 0
+        for job_id in list(jobs):
+            # Runs inline: claim() skips jobs a live worker is still advancing.
+            if not deletion.run(job_id, stale_before):
+                continue
+            if AccountDeletion.objects.get(pk=job_id).status == AccountDeletion.DONE:
+                finished += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Finished {finished} account deletion(s), {failed} failed"))
@@ -0,0 +1,232 @@
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from blog.cache import schedule_invalidation
+from blog.models import Article, Comment, Tag
+from .seed_benchmark_data import PASSWORD, USERNAME_PREFIX
+
+HOST = 'localhost'
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    # Nearest-rank percentile.
+    index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Drive the blog API endpoints in-process and write a diffable JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Measured requests per scenario")
+        parser.add_argument('--warmup', type=int, default=10,
+                            help="Unmeasured requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Client threads per scenario")
+        parser.add_argument('--scenario', action='append', default=None,
+                            help="Run only the named scenario (repeatable)")
+        parser.add_argument('--no-cache', action='store_true',
+                            help="Disable the anonymous response cache while measuring")
+        parser.add_argument('--seed', type=int, default=1234)
+        parser.add_argument('--output', default='bench_results.json')
+
+    def handle(self, *args, **opts):
+        self.rng = random.Random(opts['seed'])
+        self.article_ids = list(Article.objects.values_list('pk', flat=True))
+        if not self.article_ids:
+            raise CommandError("No articles; run seed_benchmark_data first")
+        self.commented_ids = list(Comment.objects.values_list(
+            'article_id', flat=True).distinct()[:1000]) or self.article_ids
+        self.tags = list(Tag.objects.values_list('name', flat=True)[:50]) or ['python']
+        self.token = self._token()
+
+        scenarios = self._scenarios()
+        selected = opts['scenario'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        overrides = {'BLOG_RESPONSE_CACHE_ENABLED': False} if opts['no_cache'] else {}
+        results = {}
+        # like-article writes; snapshot what it touches so the next run with
+        # the same seed starts from the same data.
+        snapshot = self._like_snapshot() if 'like-article' in selected else None
+        try:
+            with override_settings(**overrides):
+                for name in selected:
+                    results[name] = self._run(name, scenarios[name], opts)
+                    self.stdout.write(
+                        f"{name:<22} {results[name]['throughput_rps']:>9.1f} req/s  "
+                        f"p50 {results[name]['latency_ms']['p50']:>7.2f}ms  "
+                        f"p99 {results[name]['latency_ms']['p99']:>7.2f}ms  "
+                        f"queries {results[name]['queries']['max']}")
+        finally:
+            if snapshot is not None:
+                self._undo_likes(*snapshot)
+
+        report = {
+            'meta': {
+                'commit': self._commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'requests_per_scenario': opts['requests'],
+                'concurrency': opts['concurrency'],
+                'response_cache': not opts['no_cache'],
+                'dataset': {
+                    'users': User.objects.count(),
+                    'articles': len(self.article_ids),
+                    'comments': Comment.objects.count(),
+                    'likes': Article.likes.through.objects.count(),
+                    'favorites': Article.favorited_by.through.objects.count(),
+                },
+            },
+            'scenarios': results,
+        }
+        with open(opts['output'], 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {opts['output']}"))
+
+    def _token(self):
+        user = User.objects.filter(
+            username__startswith=USERNAME_PREFIX).order_by('pk').first()
+        self.user_id = user.pk if user is not None else None
+        if user is None:
+            return None
+        response = Client(HTTP_HOST=HOST).post(
+            reverse('token_obtain_pair'),
+            {'username': user.username, 'password': PASSWORD})
+        return response.json().get('access') if response.status_code == 200 else None
+
+    def _scenarios(self):
+        """name -> (method, auth, url factory)"""
+        rng = self.rng
+        return {
+            'article-list': ('get', False, lambda: reverse('article-list')),
+            'article-list-summary': (
+                'get', False, lambda: reverse('article-list') + '?mode=summary'),
+            'article-detail': ('get', False, lambda: reverse(
+                'article-detail', args=[rng.choice(self.article_ids)])),
+            'comment-list': ('get', False, lambda: reverse(
+                'comment-list', args=[rng.choice(self.commented_ids)])),
+            'search': ('get', False, lambda: reverse('article-list') + '?search='
+                       + rng.choice(['cache', 'index query', 'worker pool', 'vector'])),
+            'tag-filter': ('get', False, lambda: reverse('article-list')
+                           + '?tags_any=' + ','.join(rng.sample(self.tags, min(2, len(self.tags))))),
+            'trending': ('get', False, lambda: reverse('article-trending')),
+            # PUT is idempotent, so repeats do not flip likes back and forth.
+            'like-article': ('put', True, lambda: reverse(
+                'like-article', args=[rng.choice(self.article_ids)])),
+            'favorite-articles': ('get', True, lambda: reverse('favorite-articles')),
+        }
+
+    def _liked_ids(self):
+        return set(Article.likes.through.objects.filter(
+            user_id=self.user_id).values_list('article_id', flat=True))
+
+    def _like_snapshot(self):
+        """The benchmark user's likes and every article's trend score"""
+        return self._liked_ids(), dict(Article.objects.values_list('pk', 'trend_score'))
+
+    def _undo_likes(self, liked, trend_scores):
+        """Remove the likes like-article added and put their trend scores back"""
+        added = self._liked_ids() - liked
+        with transaction.atomic():
+            for article_id in added:
+                Article.remove_engagement('likes', article_id, self.user_id)
+                # Removals do not lower trend_score (see blog.trending).
+                Article.objects.filter(pk=article_id).update(
+                    trend_score=trend_scores[article_id])
+            schedule_invalidation(added, counters_only=True)
+
+    def _run(self, name, scenario, opts):
+        method, needs_auth, make_url = scenario
+        if needs_auth and not self.token:
+            raise CommandError(f"Scenario {name} needs a seeded benchmark user")
+        headers = {'HTTP_HOST': HOST}
+        if needs_auth:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
+
+        urls = [make_url() for _ in range(opts['warmup'] + opts['requests'])]
+        warmup, measured = urls[:opts['warmup']], urls[opts['warmup']:]
+        client = Client(**headers)
+        for url in warmup:
+            getattr(client, method)(url)
+
+        latencies, queries, statuses = [], [], {}
+        lock = threading.Lock()
+
+        def worker(chunk, own_connection):
+            thread_client = Client(**headers)
+            try:
+                for url in chunk:
+                    with CaptureQueriesContext(connections['default']) as ctx:
+                        start = time.perf_counter()
+                        response = getattr(thread_client, method)(url)
+                        elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                        queries.append(len(ctx.captured_queries))
+                        statuses[response.status_code] = statuses.get(
+                            response.status_code, 0) + 1
+            finally:
+                if own_connection:
+                    connections.close_all()
+
+        workers = max(1, opts['concurrency'])
+        chunks = [measured[i::workers] for i in range(workers)]
+        started = time.perf_counter()
+        if workers == 1:
+            worker(chunks[0], own_connection=False)
+        else:
+            threads = [threading.Thread(target=worker, args=(chunk, True))
+                       for chunk in chunks]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        wall = time.perf_counter() - started
+
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 3),
+                'p50': round(_percentile(latencies, 50), 3),
+                'p95': round(_percentile(latencies, 95), 3),
+                'p99': round(_percentile(latencies, 99), 3),
+                'max': round(max(latencies), 3),
+            },
+            'queries': {
+                'mean': round(statistics.fmean(queries), 2),
+                'max': max(queries),
+            },
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
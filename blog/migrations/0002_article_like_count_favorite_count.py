@@ -0,0 +1,36 @@
+# Generated by Django 4.2.19 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Article = apps.get_model("blog", "Article")
+    for article in Article.objects.annotate(
+        n_likes=Count("likes", distinct=True),
+        n_favorites=Count("favorited_by", distinct=True),
+    ).iterator():
+        Article.objects.filter(pk=article.pk).update(
+            like_count=article.n_likes, favorite_count=article.n_favorites
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="favorite_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
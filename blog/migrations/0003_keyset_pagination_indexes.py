@@ -0,0 +1,25 @@
+# Generated by Django 4.2.19 on 2026-10-17 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_article_like_count_favorite_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="blog_article_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["article", "-created_at", "-id"], name="blog_comment_thread_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.19 on 2026-10-17 05:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_tag_index(apps, schema_editor):
+    Article = apps.get_model("blog", "Article")
+    Tag = apps.get_model("blog", "Tag")
+    ArticleTag = apps.get_model("blog", "ArticleTag")
+    max_length = Tag._meta.get_field("name").max_length
+    tag_ids = {}
+    for article in Article.objects.only("id", "tags").iterator():
+        names = {" ".join(str(name).split()).casefold() for name in article.tags}
+        names.discard("")
+        # Truncating would index a name normalize_tag never produces; the API
+        # rejects such tags, so leave them out of the index and say so.
+        too_long = {name for name in names if len(name) > max_length}
+        if too_long:
+            print(f"\n  Article {article.pk}: not indexing tags longer than "
+                  f"{max_length} characters: {sorted(too_long)}")
+            names -= too_long
+        for name in names:
+            if name not in tag_ids:
+                tag_ids[name] = Tag.objects.get_or_create(name=name)[0].pk
+        ArticleTag.objects.bulk_create(
+            [ArticleTag(article_id=article.pk, tag_id=tag_ids[name]) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArticleTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "article",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_links",
+                        to="blog.article",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="article_links",
+                        to="blog.tag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="tag_index",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="articles",
+                through="blog.ArticleTag",
+                to="blog.tag",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="articletag",
+            index=models.Index(
+                fields=["tag", "article"], name="blog_articletag_tag_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="articletag",
+            constraint=models.UniqueConstraint(
+                fields=("article", "tag"), name="blog_articletag_unique"
+            ),
+        ),
+        migrations.RunPython(backfill_tag_index, migrations.RunPython.noop),
+    ]
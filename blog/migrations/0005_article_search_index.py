@@ -0,0 +1,57 @@
+# Generated by Django 4.2.19 on 2026-10-17 05:54
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        config = getattr(settings, "BLOG_SEARCH_CONFIG", "english")
+        schema_editor.execute(
+            "CREATE INDEX blog_article_search_gin "
+            "ON blog_article USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE blog_article SET search_vector = "
+            "setweight(to_tsvector(%s::regconfig, coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, coalesce(tags::text, '')), 'B') || "
+            "setweight(to_tsvector(%s::regconfig, coalesce(content, '')), 'C')",
+            params=[config, config, config],
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE blog_article_fts "
+            "USING fts5(title, content, tags, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO blog_article_fts (rowid, title, content, tags) "
+            "SELECT id, title, content, tags FROM blog_article"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS blog_article_search_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS blog_article_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_tag_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
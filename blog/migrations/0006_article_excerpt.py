@@ -0,0 +1,32 @@
+# Generated by Django 4.2.19 on 2026-10-17 06:03
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def backfill_excerpts(apps, schema_editor):
+    Article = apps.get_model("blog", "Article")
+    batch = []
+    for article in Article.objects.only("id", "content").iterator(chunk_size=500):
+        article.excerpt = Truncator(" ".join(article.content.split())).chars(280)
+        batch.append(article)
+        if len(batch) == 500:
+            Article.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Article.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_article_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=280),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
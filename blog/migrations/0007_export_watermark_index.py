@@ -0,0 +1,19 @@
+# Generated by Django 4.2.19 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_article_excerpt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["updated_at", "id"], name="blog_article_updated_idx"
+            ),
+        ),
+    ]
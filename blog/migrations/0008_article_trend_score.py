@@ -0,0 +1,75 @@
+# Generated by Django 4.2.19 on 2026-10-17 06:24
+
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+# Frozen copies of blog.trending's defaults: 24h half-life, weights 1/2/0.5.
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TAU = 24 * 3600 / math.log(2)
+WEIGHTS = {"like_count": 1.0, "favorite_count": 2.0}
+COMMENT_WEIGHT = 0.5
+
+
+def _exponent(at):
+    return (at - EPOCH).total_seconds() / TAU
+
+
+def backfill_trend_scores(apps, schema_editor):
+    """Likes and favorites have no timestamps; count them at creation time"""
+    Article = apps.get_model("blog", "Article")
+    Comment = apps.get_model("blog", "Comment")
+    events = defaultdict(list)
+    for article_id, created_at in Comment.objects.values_list(
+        "article_id", "created_at"
+    ).iterator(chunk_size=2000):
+        events[article_id].append(math.log(COMMENT_WEIGHT) + _exponent(created_at))
+    batch = []
+    articles = Article.objects.only("id", "created_at", "like_count", "favorite_count")
+    for article in articles.iterator(chunk_size=500):
+        values = events.pop(article.pk, [])
+        for field, weight in WEIGHTS.items():
+            count = getattr(article, field)
+            if count:
+                values.append(math.log(weight * count) + _exponent(article.created_at))
+        if not values:
+            continue
+        top = max(values)
+        article.trend_score = top + math.log(sum(math.exp(v - top) for v in values))
+        batch.append(article)
+        if len(batch) == 500:
+            Article.objects.bulk_update(batch, ["trend_score"])
+            batch = []
+    Article.objects.bulk_update(batch, ["trend_score"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_export_watermark_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="trend_score",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("trend_score__isnull", False)),
+                fields=["-trend_score", "-id"],
+                name="blog_article_trending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["-like_count", "-id"], name="blog_article_top_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_trend_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.19 on 2026-10-17 11:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Article = apps.get_model("blog", "Article")
+    Comment = apps.get_model("blog", "Comment")
+    counts = (
+        Comment.objects.filter(article_id=OuterRef("pk"))
+        .order_by()
+        .values("article_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    Article.objects.update(
+        comment_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_article_trend_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.19 on 2026-10-17 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0009_article_comment_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="thumbnail",
+            field=models.FileField(blank=True, upload_to="thumbnails/%Y/%m/"),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="thumbnail_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="avatar",
+            field=models.FileField(blank=True, upload_to="avatars/%Y/%m/"),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="avatar_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
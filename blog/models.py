@@ -1,5 +1,13 @@
-from django.db import models
+import uuid
+from collections import defaultdict
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils.text import Truncator
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from .search import get_search_backend
+from . import trending
 
 
 class Profile(models.Model):
@@ -8,15 +16,44 @@ class Profile(models.Model):
         User, on_delete=models.CASCADE, related_name="profile"
     )
     bio = models.TextField(blank=True)
+    avatar = models.FileField(upload_to="avatars/%Y/%m/", blank=True)
+    # status and rendition paths, see blog.images
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Profile of {self.user.username}"
 
 
+# Sent with article_id after a like or favorite changes an article's counters.
+engagement_changed = Signal()
+
+
+EXCERPT_LENGTH = 280
+
+
+def make_excerpt(content):
+    """Whitespace-collapsed leading slice of content for summary listings"""
+    return Truncator(" ".join(content.split())).chars(EXCERPT_LENGTH)
+
+
+def normalize_tag(name):
+    """Canonical form used to index and match tags"""
+    return " ".join(str(name).split()).casefold()
+
+
+class Tag(models.Model):
+    """Model for the normalized tag index"""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Article(models.Model):
     """Model for articles"""
     title = models.CharField(max_length=255)
     content = models.TextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -25,17 +62,269 @@ class Article(models.Model):
     favorited_by = models.ManyToManyField(
         User, related_name="favorite_articles", blank=True)
     tags = models.JSONField(default=list, blank=True)
+    thumbnail = models.FileField(upload_to="thumbnails/%Y/%m/", blank=True)
+    # status and rendition paths, see blog.images
+    thumbnail_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    tag_index = models.ManyToManyField(
+        Tag, through="ArticleTag", related_name="articles", blank=True)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # log-space decayed engagement score, see blog.trending
+    trend_score = models.FloatField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id), newest first.
+            models.Index(fields=['-created_at', '-id'],
+                         name='blog_article_created_idx'),
+            # Incremental exports scan (updated_at, id) from a watermark.
+            models.Index(fields=['updated_at', 'id'],
+                         name='blog_article_updated_idx'),
+            # Feeds: /articles/trending/ and /articles/top/.
+            models.Index(fields=['-trend_score', '-id'],
+                         name='blog_article_trending_idx',
+                         condition=models.Q(trend_score__isnull=False)),
+            models.Index(fields=['-like_count', '-id'],
+                         name='blog_article_top_idx'),
+        ]
+
+    SEARCHABLE_FIELDS = {'title', 'content', 'tags'}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'tags' in update_fields:
+            self.sync_tag_index()
+        if update_fields is None or self.SEARCHABLE_FIELDS & set(update_fields):
+            get_search_backend(self._state.db).index([self.pk])
+
+    def sync_tag_index(self):
+        """Rebuild this article's Tag links from its tags list"""
+        sync_tag_index([self])
+
+    @classmethod
+    def bulk_insert(cls, articles, batch_size=None):
+        """bulk_create plus the excerpt, tag and search data save() maintains"""
+        for article in articles:
+            article.excerpt = make_excerpt(article.content)
+        with transaction.atomic():
+            articles = cls.objects.bulk_create(articles, batch_size=batch_size)
+            sync_tag_index(articles)
+            get_search_backend().index([article.pk for article in articles])
+        return articles
+
+    # M2M relation name -> denormalized counter column it feeds.
+    ENGAGEMENT_COUNTERS = {'likes': 'like_count', 'favorited_by': 'favorite_count'}
+
+    @classmethod
+    def _bump_engagement(cls, relation, article_id, delta):
+        counter = cls.ENGAGEMENT_COUNTERS[relation]
+        changes = {counter: F(counter) + delta}
+        amount = trending.weight(relation) * delta
+        # Removals stay in trend_score until a rebuild, see blog.trending.
+        if amount > 0:
+            changes['trend_score'] = trending.score_expression(amount)
+        cls.objects.filter(pk=article_id).update(**changes)
+        engagement_changed.send(sender=cls, article_id=article_id)
+
+    # M2M relation name -> per-viewer flag attach_viewer_flags() sets.
+    VIEWER_FLAGS = {'likes': 'is_liked', 'favorited_by': 'is_favorited'}
+
+    @classmethod
+    def _viewer_flag_lookups(cls, articles, user, relations):
+        """(relation, articles still missing its flag, id query or None) triples"""
+        lookups = []
+        for relation in relations:
+            flag = cls.VIEWER_FLAGS[relation]
+            pending = [article for article in articles if not hasattr(article, flag)]
+            if not pending:
+                continue
+            query = None
+            if user is not None and user.is_authenticated:
+                query = cls._viewer_flag_query(
+                    relation, user, [article.pk for article in pending])
+            lookups.append((relation, pending, query))
+        return lookups
+
+    @classmethod
+    def _viewer_flag_query(cls, relation, user, article_ids):
+        through = cls._meta.get_field(relation).remote_field.through
+        return through.objects.filter(
+            user_id=user.pk, article_id__in=article_ids
+        ).values_list('article_id', flat=True)
+
+    @classmethod
+    def viewer_flag_ids(cls, user, article_ids, relations=VIEWER_FLAGS):
+        """{flag: ids among article_ids that user has it on}, one query per relation"""
+        flags = {}
+        for relation in relations:
+            found = ()
+            if article_ids and user is not None and user.is_authenticated:
+                found = set(cls._viewer_flag_query(relation, user, article_ids))
+            flags[cls.VIEWER_FLAGS[relation]] = found
+        return flags
+
+    @classmethod
+    async def aviewer_flag_ids(cls, user, article_ids, relations=VIEWER_FLAGS):
+        """viewer_flag_ids through the async ORM"""
+        flags = {}
+        for relation in relations:
+            found = ()
+            if article_ids and user is not None and user.is_authenticated:
+                found = {pk async for pk in cls._viewer_flag_query(relation, user, article_ids)}
+            flags[cls.VIEWER_FLAGS[relation]] = found
+        return flags
+
+    @classmethod
+    def _set_viewer_flags(cls, relation, pending, found):
+        flag = cls.VIEWER_FLAGS[relation]
+        for article in pending:
+            setattr(article, flag, article.pk in found)
+
+    @classmethod
+    def attach_viewer_flags(cls, articles, user, relations=VIEWER_FLAGS):
+        """Set is_liked / is_favorited for user on articles, one query per relation"""
+        for relation, pending, query in cls._viewer_flag_lookups(articles, user, relations):
+            cls._set_viewer_flags(relation, pending, set(query) if query is not None else ())
+
+    @classmethod
+    async def aattach_viewer_flags(cls, articles, user, relations=VIEWER_FLAGS):
+        """attach_viewer_flags through the async ORM"""
+        for relation, pending, query in cls._viewer_flag_lookups(articles, user, relations):
+            found = {pk async for pk in query} if query is not None else ()
+            cls._set_viewer_flags(relation, pending, found)
+
+    @classmethod
+    def adjust_comment_counts(cls, counts):
+        """Apply {article_id: comments added (negative: removed)} to comment_count.
+
+        Added comments also feed trend_score in the same UPDATE; one
+        statement per distinct delta.
+        """
+        by_delta = defaultdict(list)
+        for article_id, delta in counts.items():
+            if delta:
+                by_delta[delta].append(article_id)
+        for delta, article_ids in by_delta.items():
+            changes = {'comment_count': F('comment_count') + delta}
+            amount = trending.weight('comments') * delta
+            if amount > 0:
+                changes['trend_score'] = trending.score_expression(amount)
+            cls.objects.filter(pk__in=article_ids).update(**changes)
+
+    @classmethod
+    def add_engagement(cls, relation, article_id, user_id):
+        """Insert the through row if missing; return True if it was created.
+
+        Raises Article.DoesNotExist for unknown articles.
+        """
+        through = cls._meta.get_field(relation).remote_field.through
+        if not cls.objects.filter(pk=article_id).exists():
+            raise cls.DoesNotExist
+        with transaction.atomic(savepoint=False):
+            try:
+                with transaction.atomic():
+                    through.objects.create(article_id=article_id, user_id=user_id)
+            except IntegrityError:
+                # A concurrent request inserted the same row first.
+                return False
+            cls._bump_engagement(relation, article_id, 1)
+        return True
+
+    @classmethod
+    def remove_engagement(cls, relation, article_id, user_id):
+        """Delete the through row if present; return True if it existed.
+
+        Raises Article.DoesNotExist for unknown articles.
+        """
+        through = cls._meta.get_field(relation).remote_field.through
+        with transaction.atomic():
+            removed, _ = through.objects.filter(
+                article_id=article_id, user_id=user_id).delete()
+            if removed:
+                cls._bump_engagement(relation, article_id, -1)
+                return True
+        if not cls.objects.filter(pk=article_id).exists():
+            raise cls.DoesNotExist
+        return False
+
+    @classmethod
+    def toggle_engagement(cls, relation, article_id, user_id):
+        """Flip the user's like/favorite; return True if it is now set"""
+        through = cls._meta.get_field(relation).remote_field.through
+        with transaction.atomic():
+            removed, _ = through.objects.filter(
+                article_id=article_id, user_id=user_id).delete()
+            if removed:
+                cls._bump_engagement(relation, article_id, -1)
+                return False
+            cls.add_engagement(relation, article_id, user_id)
+        return True
 
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     def total_favorites(self):
-        return self.favorited_by.count()
+        return self.favorite_count
 
     def __str__(self):
         return f"Article: {self.title} by {self.author.username}"
 
 
+class ArticleTag(models.Model):
+    """Through model linking articles to normalized tags"""
+    article = models.ForeignKey(
+        Article, on_delete=models.CASCADE, related_name="tag_links")
+    tag = models.ForeignKey(
+        Tag, on_delete=models.CASCADE, related_name="article_links")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['article', 'tag'], name='blog_articletag_unique'),
+        ]
+        indexes = [
+            # Tag filters look up articles by tag first.
+            models.Index(fields=['tag', 'article'],
+                         name='blog_articletag_tag_idx'),
+        ]
+
+
+def sync_tag_index(articles):
+    """Make the ArticleTag rows of articles match their tags lists"""
+    wanted = {
+        article.pk: {normalize_tag(name) for name in article.tags if str(name).strip()}
+        for article in articles
+    }
+    names = set().union(*wanted.values())
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(
+        name__in=names).values_list('name', 'id'))
+
+    links = ArticleTag.objects.filter(article_id__in=wanted)
+    current = set(links.values_list('article_id', 'tag_id'))
+    target = {
+        (article_id, tag_ids[name])
+        for article_id, article_names in wanted.items()
+        for name in article_names
+    }
+    stale = {}
+    for article_id, tag_id in current - target:
+        stale.setdefault(article_id, []).append(tag_id)
+    for article_id, stale_tag_ids in stale.items():
+        links.filter(article_id=article_id, tag_id__in=stale_tag_ids).delete()
+    ArticleTag.objects.bulk_create(
+        [ArticleTag(article_id=a, tag_id=t) for a, t in target - current],
+        ignore_conflicts=True)
+
+
 class Comment(models.Model):
     """Model for comments"""
     article = models.ForeignKey(
@@ -45,5 +334,49 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-article comment pages seek on (created_at, id), newest first.
+            models.Index(fields=['article', '-created_at', '-id'],
+                         name='blog_comment_thread_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} on {self.article.title[:20]}: {self.content[:30]}"
+
+
+class Upload(models.Model):
+    """Chunked upload in progress; bytes live in a partial file, see blog.uploads"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="uploads")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # bytes received and acknowledged so far
+    offset = models.PositiveBigIntegerField(default=0, editable=False)
+    # expected SHA-256 of the whole file, checked on completion when given
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class AccountDeletion(models.Model):
+    """Background deletion of a deactivated account, see blog.deletion"""
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'),
+                      (DONE, 'Done'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Not a foreign key: the job outlives the user it deletes.
+    user_id = models.PositiveIntegerField(unique=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    # rows removed so far, by kind: likes, favorites, comments, articles
+    progress = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id} ({self.status})"
@@ -0,0 +1,206 @@
+import base64
+import json
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on every ordering column, not an offset.
+
+    The cursor carries the ordering values of the last row served, so page N
+    is an index range scan starting at that row and costs the same as page 1.
+    The queryset's own ``order_by`` wins over ``ordering`` when it has one,
+    which lets filters (e.g. search ranking) choose the sort key.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, fetching through the async ORM"""
+        return self.finish_page(
+            [row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """Return the unevaluated slice holding this page plus one lookahead row"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.fields = self.get_ordering(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        self.position, self.reverse = position, reverse
+        ordering = self.fields
+        if reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        """Trim the lookahead row and record the link state for the page"""
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_ordering(self, queryset):
+        order_by = queryset.query.order_by
+        if order_by and all(isinstance(field, str) for field in order_by):
+            return tuple(order_by)
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not (self.has_next and self.last_row is not None):
+            return None
+        return self._link(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            # Paged past the end: going back means starting over.
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.first_row, reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def decode_cursor(self, request):
+        """Return (position, reverse) from the cursor query param"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                self._load(field, value) for field, value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field in self.fields:
+            value = getattr(row, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = {'p': values}
+        if reverse:
+            payload['r'] = 1
+        return base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def _link(self, row, reverse):
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            self.encode_cursor(row, reverse))
+
+    def _load(self, field, value):
+        """Convert a cursor value to field's type; ValueError if it cannot be"""
+        if value is None:
+            raise ValueError(value)
+        try:
+            model_field = self.model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            # Annotations such as search rank: only plain scalars compare.
+            if isinstance(value, (bool, dict, list)):
+                raise ValueError(value)
+            return value
+        if isinstance(model_field, DateTimeField):
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError(value)
+            return parsed
+        return model_field.to_python(value)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _seek(ordering, position):
+        """Rows strictly after position under ordering.
+
+        ``(a, b) < (x, y)`` expands to ``a <= x AND (a < x OR (a = x AND b < y))``;
+        the redundant leading bound lets the database start the index range
+        at the cursor instead of filtering from the top.
+        """
+        def lookup(field, strict):
+            op = 'lt' if field.startswith('-') else 'gt'
+            return f"{field.lstrip('-')}__{op if strict else op + 'e'}"
+
+        after = Q()
+        for index, field in enumerate(ordering):
+            step = Q(**{lookup(field, True): position[index]})
+            for prev_field, prev_value in zip(ordering[:index], position[:index]):
+                step &= Q(**{prev_field.lstrip('-'): prev_value})
+            after |= step
+        return Q(**{lookup(ordering[0], False): position[0]}) & after
@@ -0,0 +1,233 @@
+"""In-process database connection pool behind the ``blog.pool`` engine.
+
+Django 4.2 keeps at most one connection per thread and has no pool of its
+own. With ``ENGINE = 'blog.pool'`` a connection Django closes (at the end of
+every request when ``CONN_MAX_AGE`` is 0) goes back to the pool, and the next
+thread that connects reuses it instead of paying a new TCP+TLS handshake and
+backend start. ``max_size`` caps the open connections per process; a thread
+that finds them all busy waits up to ``timeout`` seconds and then gets a
+``PoolTimeout``. ``pool_stats()`` reports sizes, reuse and wait times.
+
+Options live in ``DATABASES[alias]['OPTIONS']['pool']``, the key Django
+5.1's native pool reads, so the settings carry over on upgrade.
+"""
+import threading
+import time
+from collections import deque
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    'max_size': 10,
+    'timeout': 10.0,
+    'max_lifetime': 3600.0,
+    'max_idle': 300.0,
+    'check': True,
+}
+
+
+class PoolTimeout(OperationalError):
+    """No pooled connection became free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe LIFO pool of DB-API connections.
+
+    ``check(connection)`` runs on every reused connection before it is
+    handed out and ``reset(connection)`` on every returned one; either may
+    raise (or ``reset`` return False) to have the connection closed instead.
+    The most recently returned connection is reused first, so spare ones go
+    idle and are closed after ``max_idle`` seconds.
+    """
+
+    def __init__(self, max_size=10, timeout=10.0, max_lifetime=3600.0,
+                 max_idle=300.0, check=None, reset=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self._check = check
+        self._reset = reset
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, opened_at, returned_at)
+        self._opened_at = {}  # id(connection) -> opened_at, for checked out ones
+        self._size = 0
+        self._counters = dict.fromkeys(
+            ('opened', 'closed', 'reused', 'checkouts', 'waits', 'timeouts',
+             'failed_checks'), 0)
+        self._wait_total = self._wait_max = 0.0
+
+    def acquire(self, connect):
+        """Return a pooled connection, or a new one from connect()"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            stale = []
+            with self._cond:
+                while True:
+                    entry = self._take_idle(stale)
+                    if entry is not None or self._size < self.max_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No database connection free after {self.timeout}s "
+                            f"(pool max_size={self.max_size})")
+                    waited = True
+                    self._cond.wait(remaining)
+                if entry is None:
+                    self._size += 1
+            self._close(stale)
+
+            if entry is None:
+                connection = self._open(connect)
+                opened_at, reused = time.monotonic(), False
+            else:
+                connection, opened_at, _ = entry
+                if not self._passes_check(connection):
+                    with self._cond:
+                        self._size -= 1
+                        self._counters['failed_checks'] += 1
+                        self._cond.notify()
+                    self._close([connection])
+                    continue
+                reused = True
+            with self._cond:
+                self._opened_at[id(connection)] = opened_at
+                self._counters['checkouts'] += 1
+                self._counters['reused' if reused else 'opened'] += 1
+                if waited:
+                    wait = time.monotonic() - started
+                    self._counters['waits'] += 1
+                    self._wait_total += wait
+                    self._wait_max = max(self._wait_max, wait)
+            return connection
+
+    def release(self, connection, reusable=True):
+        """Take back a connection from acquire()"""
+        now = time.monotonic()
+        with self._cond:
+            opened_at = self._opened_at.pop(id(connection), now)
+        keep = (reusable and now - opened_at < self.max_lifetime
+                and self._passes_reset(connection))
+        with self._cond:
+            if keep:
+                self._idle.append((connection, opened_at, now))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not keep:
+            self._close([connection])
+
+    def close_all(self):
+        """Close every idle connection; checked out ones close on release"""
+        with self._cond:
+            stale = [entry[0] for entry in self._idle]
+            self._size -= len(stale)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close(stale)
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._counters['checkouts']
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self._counters,
+                'reuse_ratio': (round(self._counters['reused'] / checkouts, 4)
+                                if checkouts else None),
+                'wait_ms_total': round(self._wait_total * 1000, 3),
+                'wait_ms_max': round(self._wait_max * 1000, 3),
+            }
+
+    def _take_idle(self, stale):
+        """Pop the newest usable idle entry; expired ones go to stale"""
+        now = time.monotonic()
+        while self._idle:
+            entry = self._idle.pop()
+            connection, opened_at, returned_at = entry
+            if (now - opened_at >= self.max_lifetime
+                    or now - returned_at >= self.max_idle):
+                self._size -= 1
+                stale.append(connection)
+                continue
+            return entry
+        return None
+
+    def _open(self, connect):
+        try:
+            return connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _passes_check(self, connection):
+        if self._check is None:
+            return True
+        try:
+            self._check(connection)
+        except Exception:
+            return False
+        return True
+
+    def _passes_reset(self, connection):
+        if self._reset is None:
+            return True
+        try:
+            return self._reset(connection) is not False
+        except Exception:
+            return False
+
+    def _close(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if connections:
+            with self._cond:
+                self._counters['closed'] += len(connections)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, database, options, check=None, reset=None):
+    """The process-wide pool for one alias and database name.
+
+    Keyed by database name too, so the test runner's switch to
+    ``test_<name>`` never gets a connection to the real database.
+    """
+    key = (alias, database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = {**DEFAULTS, **options}
+            pool = _pools[key] = ConnectionPool(
+                max_size=settings['max_size'], timeout=settings['timeout'],
+                max_lifetime=settings['max_lifetime'], max_idle=settings['max_idle'],
+                check=check if settings['check'] else None, reset=reset)
+        return pool
+
+
+def pool_stats():
+    """Return {'<alias>:<database>': stats} for every pool in this process"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {f'{alias}:{database}': pool.stats()
+            for (alias, database), pool in sorted(pools.items())}
+
+
+def close_pools():
+    """Close the idle connections of every pool, e.g. after a fork"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,48 @@
+"""PostgreSQL backend that borrows its connections from ``blog.pool``"""
+from django.db.backends.postgresql import base
+from django.utils.functional import cached_property
+from psycopg2 import extensions
+from . import get_pool
+
+
+def check_connection(connection):
+    """Raise unless the server still answers on a reused connection"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def reset_connection(connection):
+    """Roll back leftovers; return False if the connection cannot be reused"""
+    if connection.closed:
+        return False
+    state = connection.info.transaction_status
+    if state == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if state != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """postgresql DatabaseWrapper whose connect/close go through the pool"""
+
+    @cached_property
+    def pool_options(self):
+        return self.settings_dict['OPTIONS'].get('pool') or {}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias, conn_params.get('dbname'), self.pool_options,
+            check=check_connection, reset=reset_connection)
+        return self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection, reusable=not self.errors_occurred)
@@ -0,0 +1,264 @@
+"""Opt-in per-endpoint profiling: query count, DB time, serializer time.
+
+``ProfilingMiddleware`` measures every request, adds a ``Server-Timing``
+header and folds the numbers into per-endpoint histograms. Each worker
+aggregates in memory and periodically adds its buckets to the shared cache,
+so ``profiling_report`` and the admin endpoint see all workers. Percentiles
+are read from the histograms: exact for query counts, bucket upper bounds
+(within ~20%) for timings.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+PREFIX = 'blog:prof'
+ENDPOINTS_KEY = f'{PREFIX}:endpoints'
+TIMING_METRICS = ('total_ms', 'db_ms', 'serializer_ms')
+METRICS = ('queries',) + TIMING_METRICS
+PERCENTILES = (50, 95, 99)
+MAX_QUERIES = 1000
+
+# Geometric millisecond bucket upper bounds from 0.25ms to ~60s.
+TIMING_BOUNDS = [round(0.25 * 1.2 ** k, 3) for k in range(69)]
+
+_current = contextvars.ContextVar('blog_request_profile', default=None)
+
+
+class RequestProfile:
+    """Numbers collected for one request"""
+    __slots__ = ('queries', 'db_ms', 'serializer_ms', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.serializer_depth = 0
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if profile is not None:
+            profile.queries += 1
+            profile.db_ms += (time.perf_counter() - start) * 1000
+
+
+def _ensure_recording():
+    """Install the query recorder on this thread's connections.
+
+    It stays installed and is a no-op outside profiled requests, so async
+    ORM queries (run on a worker thread) are attributed too. It goes first
+    in the list so scoped execute_wrapper() blocks still pop their own.
+    """
+    for connection in connections.all():
+        if _record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, _record_query)
+
+
+class ProfiledSerializerMixin:
+    """Attribute to_representation time to the current request profile"""
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        if profile is None:
+            return super().to_representation(instance)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serializer_depth -= 1
+            # Only the outermost profiled serializer counts, nested ones are
+            # already inside its timing.
+            if profile.serializer_depth == 0:
+                profile.serializer_ms += (time.perf_counter() - start) * 1000
+
+
+def _bucket(metric, value):
+    if metric == 'queries':
+        return min(int(value), MAX_QUERIES)
+    return bisect.bisect_left(TIMING_BOUNDS, value)
+
+
+def _bucket_upper(metric, bucket):
+    if metric == 'queries':
+        return bucket
+    if bucket >= len(TIMING_BOUNDS):
+        return float('inf')
+    return TIMING_BOUNDS[bucket]
+
+
+def _bucket_key(endpoint, metric, bucket):
+    return f'{PREFIX}:{endpoint}:{metric}:{bucket}'
+
+
+def _count_key(endpoint):
+    return f'{PREFIX}:{endpoint}:count'
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_PROFILING_CACHE', 'default')]
+
+
+class HistogramStore:
+    """Per-process histograms flushed additively into the shared cache"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(int)
+        self.endpoints = set()
+        self.last_flush = time.monotonic()
+
+    def add(self, endpoint, sample):
+        with self.lock:
+            self.pending[_count_key(endpoint)] += 1
+            for metric in METRICS:
+                bucket = _bucket(metric, sample[metric])
+                self.pending[_bucket_key(endpoint, metric, bucket)] += 1
+            new_endpoint = endpoint not in self.endpoints
+            self.endpoints.add(endpoint)
+            interval = getattr(settings, 'BLOG_PROFILING_FLUSH_INTERVAL', 10)
+            due = new_endpoint or time.monotonic() - self.last_flush >= interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(int)
+            endpoints = set(self.endpoints)
+            self.last_flush = time.monotonic()
+        cache = get_cache()
+        known = set(cache.get(ENDPOINTS_KEY, ()))
+        if not endpoints <= known:
+            cache.set(ENDPOINTS_KEY, sorted(known | endpoints), timeout=None)
+        for key, amount in pending.items():
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                if not cache.add(key, amount, timeout=None):
+                    cache.incr(key, amount)
+
+
+store = HistogramStore()
+
+
+def _percentiles(metric, counts):
+    total = sum(counts.values())
+    result = {}
+    for percentile in PERCENTILES:
+        threshold = total * percentile / 100
+        running = 0
+        for bucket in sorted(counts):
+            running += counts[bucket]
+            if running >= threshold:
+                result[f'p{percentile}'] = _bucket_upper(metric, bucket)
+                break
+    return result
+
+
+def build_report():
+    """Return {endpoint: {'requests': n, metric: {'p50':…, 'p95':…, 'p99':…}}}"""
+    store.flush()
+    cache = get_cache()
+    report = {}
+    for endpoint in cache.get(ENDPOINTS_KEY, ()):
+        keys = {_count_key(endpoint): None}
+        for metric in METRICS:
+            top = MAX_QUERIES if metric == 'queries' else len(TIMING_BOUNDS)
+            for bucket in range(top + 1):
+                keys[_bucket_key(endpoint, metric, bucket)] = (metric, bucket)
+        values = cache.get_many(list(keys))
+        entry = {'requests': values.get(_count_key(endpoint), 0)}
+        for metric in METRICS:
+            counts = {
+                keys[key][1]: value for key, value in values.items()
+                if keys[key] and keys[key][0] == metric
+            }
+            entry[metric] = _percentiles(metric, counts)
+        report[endpoint] = entry
+    return report
+
+
+def reset_report():
+    cache = get_cache()
+    endpoints = cache.get(ENDPOINTS_KEY, ())
+    keys = [ENDPOINTS_KEY]
+    for endpoint in endpoints:
+        keys.append(_count_key(endpoint))
+        for metric in METRICS:
+            top = MAX_QUERIES if metric == 'queries' else len(TIMING_BOUNDS)
+            keys.extend(_bucket_key(endpoint, metric, b) for b in range(top + 1))
+    cache.delete_many(keys)
+    with store.lock:
+        store.pending.clear()
+        store.endpoints.clear()
+
+
+class ProfilingMiddleware:
+    """Measure each request and expose the numbers as Server-Timing.
+
+    Enabled with BLOG_PROFILING (env PROFILING=True); otherwise Django drops
+    the middleware from the chain at startup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        _ensure_recording()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, start)
+
+    async def __acall__(self, request):
+        await sync_to_async(_ensure_recording)()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, start)
+
+    def finish(self, request, response, profile, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or 'unresolved'
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile.db_ms:.2f};desc="{profile.queries} queries"',
+            f'serializer;dur={profile.serializer_ms:.2f}',
+            f'total;dur={total_ms:.2f};desc="{endpoint}"',
+        ])
+        store.add(endpoint, {
+            'queries': profile.queries,
+            'db_ms': profile.db_ms,
+            'serializer_ms': profile.serializer_ms,
+            'total_ms': total_ms,
+        })
+        return response
@@ -0,0 +1,164 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+With a replica configured (``DB_REPLICA_HOST`` sets ``BLOG_READ_REPLICA``
+to its alias), ``ReplicaRouter`` sends the reads of safe requests (GET,
+HEAD, OPTIONS) to it and everything else to ``default``.
+``ReplicaRoutingMiddleware`` decides per request:
+
+* unsafe requests read from the primary throughout, so permission checks
+  and the write itself see current rows;
+* after a successful write the user is pinned to the primary for
+  ``BLOG_REPLICA_STICKY_SECONDS``, so their next reads show their own
+  comment, like or edit even while the replica lags. The pin lives in the
+  cache so every worker honours it;
+* ``use_primary()`` pins a block of code. Renders that fill the shared
+  response cache use it, so a lagging replica never gets cached for
+  everyone.
+
+Reads outside a request (management commands, the shell) use the primary.
+"""
+import contextvars
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import LazyObject, empty
+
+PREFIX = 'blog:replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = contextvars.ContextVar('blog_replica_routing', default=None)
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_REPLICA_CACHE', 'default')]
+
+
+def _sticky_key(user_id):
+    return f'{PREFIX}:sticky:{user_id}'
+
+
+def replica_alias():
+    return getattr(settings, 'BLOG_READ_REPLICA', None)
+
+
+def pin_user(user_id):
+    """Send the user's reads to the primary for the sticky window"""
+    get_cache().set(_sticky_key(user_id), True,
+                    getattr(settings, 'BLOG_REPLICA_STICKY_SECONDS', 5))
+
+
+def is_pinned(user_id):
+    return bool(get_cache().get(_sticky_key(user_id)))
+
+
+def _known_user(request):
+    """request.user if authentication already ran, without triggering it"""
+    user = request.__dict__.get('user')
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class RoutingState:
+    """Where one request's reads go"""
+    __slots__ = ('request', 'primary', 'pinned', 'user_checked')
+
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.pinned = 0
+        self.user_checked = False
+
+    def reads_primary(self):
+        if self.primary or self.pinned:
+            return True
+        if not self.user_checked:
+            # DRF sets request.user once it authenticates; look it up once.
+            user = _known_user(self.request)
+            if user is not None:
+                self.user_checked = True
+                self.primary = bool(user.is_authenticated and is_pinned(user.pk))
+        return self.primary
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block"""
+    state = _current.get()
+    if state is None:
+        yield
+        return
+    state.pinned += 1
+    try:
+        yield
+    finally:
+        state.pinned -= 1
+
+
+class ReplicaRouter:
+    """Route reads of safe requests to the replica, everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        state = _current.get()
+        if replica is None or state is None or state.reads_primary():
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != replica_alias()
+
+
+class ReplicaRoutingMiddleware:
+    """Track each request's routing state and pin users after their writes.
+
+    Dropped from the chain at startup when no replica is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = _known_user(request)
+            if user is not None and user.is_authenticated:
+                pin_user(user.pk)
+        return response
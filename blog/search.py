@@ -0,0 +1,186 @@
+"""Full-text search over articles.
+
+Postgres keeps a weighted ``tsvector`` in ``Article.search_vector`` behind a
+GIN index; SQLite (local runs and tests) keeps an FTS5 shadow table keyed by
+article id. Both are refreshed from ``Article.save()`` and rebuilt in bulk by
+the ``reindex_articles`` management command.
+
+Snippets are highlighted with control characters the database never escapes;
+``highlight`` HTML-escapes the article text and only then turns them into
+``<mark>`` tags, so markup an author wrote comes back as text.
+"""
+import re
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.html import escape
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+# Stand-ins for the tags while the database builds the snippet.
+START_MARKER = '\x02'
+STOP_MARKER = '\x03'
+FTS_TABLE = 'blog_article_fts'
+
+
+class PostgresSearchBackend:
+    """tsvector/GIN backed search with title > tags > content weighting"""
+
+    def __init__(self, using):
+        self.using = using
+        self.config = getattr(settings, 'BLOG_SEARCH_CONFIG', 'english')
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector('title', weight='A', config=self.config)
+            + SearchVector(Cast('tags', TextField()), weight='B', config=self.config)
+            + SearchVector('content', weight='C', config=self.config)
+        )
+
+    def index(self, article_ids):
+        from .models import Article
+
+        Article.objects.using(self.using).filter(
+            pk__in=article_ids).update(search_vector=self.vector())
+
+    def remove(self, article_ids):
+        """Vectors live on the article row and go away with it"""
+
+    def reindex(self, batch_size):
+        from .models import Article
+
+        ids = list(Article.objects.using(self.using)
+                   .order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            self.index(ids[start:start + batch_size])
+        return len(ids)
+
+    def search(self, queryset, text):
+        from django.contrib.postgres.search import (
+            SearchHeadline, SearchQuery, SearchRank)
+
+        query = SearchQuery(text, search_type='websearch', config=self.config)
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            search_snippet=SearchHeadline(
+                'content', query, config=self.config,
+                start_sel=START_MARKER, stop_sel=STOP_MARKER,
+                max_words=35, min_words=15),
+        ).order_by('-search_rank', '-id')
+
+
+class SQLiteSearchBackend:
+    """FTS5 backed search used when running against SQLite"""
+
+    # bm25() column weights for (title, tags, content).
+    weights = (10.0, 5.0, 1.0)
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, article_ids):
+        from .models import Article
+
+        rows = Article.objects.using(self.using).filter(
+            pk__in=article_ids).values_list('pk', 'title', 'content', 'tags')
+        with connections[self.using].cursor() as cursor:
+            self._delete(cursor, article_ids)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags) "
+                "VALUES (%s, %s, %s, %s)",
+                [(pk, title, content, ' '.join(map(str, tags)))
+                 for pk, title, content, tags in rows])
+
+    def remove(self, article_ids):
+        with connections[self.using].cursor() as cursor:
+            self._delete(cursor, article_ids)
+
+    def reindex(self, batch_size):
+        from .models import Article
+
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        ids = list(Article.objects.using(self.using)
+                   .order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            self.index(ids[start:start + batch_size])
+        return len(ids)
+
+    def search(self, queryset, text):
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return queryset.none()
+        match = ' '.join('"%s"' % term for term in terms)
+        table = queryset.model._meta.db_table
+        scoped = (
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND {FTS_TABLE}.rowid = {table}.id"
+        )
+        title_w, tags_w, content_w = self.weights
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {title_w}, {content_w}, {tags_w}) {scoped}",
+                [match], output_field=FloatField()),
+            search_snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, 1, %s, %s, '…', 24) {scoped}",
+                [START_MARKER, STOP_MARKER, match], output_field=TextField()),
+        ).order_by('-search_rank', '-id')
+
+    @staticmethod
+    def _delete(cursor, article_ids):
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(pk,) for pk in article_ids])
+
+
+class SubstringSearchBackend:
+    """Unindexed fallback for databases without a full-text engine"""
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, article_ids):
+        pass
+
+    def remove(self, article_ids):
+        pass
+
+    def reindex(self, batch_size):
+        return 0
+
+    def search(self, queryset, text):
+        return queryset.filter(
+            Q(title__icontains=text) | Q(content__icontains=text)
+        ).annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+            search_snippet=Value('', output_field=TextField()),
+        ).order_by('-search_rank', '-id')
+
+
+def highlight(snippet):
+    """HTML-escape a backend snippet and turn its markers into <mark> tags"""
+    if not snippet:
+        return snippet
+    return (escape(snippet)
+            .replace(START_MARKER, SNIPPET_START).replace(STOP_MARKER, SNIPPET_STOP))
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using=None):
+    """Return the search backend for the database holding articles"""
+    from .models import Article
+
+    using = using or router.db_for_write(Article)
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor, SubstringSearchBackend)(using)
@@ -1,15 +1,148 @@
+import os
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Article, Comment, Profile
+from django.db import models
+from PIL import Image
+from . import images
+from .hashers import hash_password
+from .models import (
+    AccountDeletion, Article, Comment, Profile, Tag, Upload, normalize_tag)
+from .profiling import ProfiledSerializerMixin
+from .search import highlight
 import re
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+def requested_fields(request, available):
+    """Names kept by ?fields=a,b and ?omit=c on a read request"""
+    selected = set(available)
+    if request is None or request.method not in SAFE_METHODS:
+        return selected
+    params = request.query_params
+    if params.get('fields'):
+        selected &= {name.strip() for name in params['fields'].split(',')}
+    if params.get('omit'):
+        selected -= {name.strip() for name in params['omit'].split(',')}
+    return selected
+
+
+def validate_items(serializer, items):
+    """Validate each item with serializer, collecting errors instead of stopping.
+
+    Returns one ``(validated_data, None)`` or ``(None, errors)`` pair per item,
+    which lets bulk endpoints create the valid items and report the rest.
+    """
+    outcomes = []
+    for item in items:
+        try:
+            outcomes.append((serializer.run_validation(item), None))
+        except serializers.ValidationError as exc:
+            outcomes.append((None, exc.detail))
+    return outcomes
+
+
+class SparseFieldsetsMixin:
+    """Drop top-level fields not selected by ?fields= / ?omit= on reads.
+
+    ``extra_fields`` are keys added in to_representation outside the
+    declared fields; they obey the same selection.
+    """
+    extra_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        available = [*self.fields, *self.extra_fields]
+        self.selected_fields = requested_fields(
+            self.context.get('request'), available)
+        for name in set(self.fields) - self.selected_fields:
+            self.fields.pop(name)
+
+    @classmethod
+    def fields_for_request(cls, request):
+        """Field names a request will render, without building a serializer"""
+        return requested_fields(
+            request, [*cls.Meta.fields, *cls.extra_fields])
+
+
+class ImageField(serializers.FileField):
+    """Image upload on write; processing status and rendition URLs on read"""
+    default_error_messages = {
+        'extension': 'Upload a JPEG, PNG, GIF or WebP image.',
+        'too_large': 'Images may be at most {max_mb} MB.',
+        'invalid_image': 'Upload a valid image. The file is not an image or is corrupted.',
+        'too_many_pixels': 'Images may be at most {max_pixels} pixels.',
+    }
+    EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+    FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        # The renditions live next to the file field on the instance.
+        return instance
+
+    def to_internal_value(self, data):
+        upload = super().to_internal_value(data)
+        if os.path.splitext(upload.name)[1].lower() not in self.EXTENSIONS:
+            self.fail('extension')
+        if upload.size > self.max_bytes():
+            self.fail('too_large', max_mb=settings.BLOG_IMAGE_MAX_UPLOAD_MB)
+        self.verify(upload)
+        return upload
+
+    def verify(self, upload):
+        """Check the bytes decode as a whitelisted format within the pixel cap"""
+        max_pixels = settings.BLOG_IMAGE_MAX_PIXELS
+        upload.seek(0)
+        try:
+            with Image.open(upload, formats=self.FORMATS) as image:
+                if image.width * image.height > max_pixels:
+                    self.fail('too_many_pixels', max_pixels=max_pixels)
+                image.verify()
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        except serializers.ValidationError:
+            raise
+        except Exception:
+            # Pillow raises all sorts of errors on malformed input.
+            self.fail('invalid_image')
+        finally:
+            upload.seek(0)
+
+    @staticmethod
+    def max_bytes():
+        return settings.BLOG_IMAGE_MAX_UPLOAD_MB * 1024 * 1024
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        build_url = request.build_absolute_uri if request is not None else str
+        return images.rendition_urls(instance, self.source, build_url)
+
+
+class ImageRenditionsMixin:
+    """Queue renditions for the image fields a save wrote"""
+    image_fields = ()
+
+    def save(self, **kwargs):
+        instance = super().save(**kwargs)
+        for field in self.image_fields:
+            if field in self.validated_data:
+                images.schedule(instance, field)
+        return instance
+
+
+class ProfileSerializer(ImageRenditionsMixin, serializers.ModelSerializer):
     """Serializer for user profile"""
+    avatar = ImageField()
 
     class Meta:
         model = Profile
-        fields = ['bio']
+        fields = ['bio', 'avatar']
+
+    image_fields = ('avatar',)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -51,7 +184,7 @@ class UserSerializer(serializers.ModelSerializer):
             username=validated_data['username'],
             email=validated_data.get('email', '')
         )
-        user.set_password(validated_data['password'])
+        user.password = hash_password(validated_data['password'])
         user.save()
         Profile.objects.create(user=user, **profile_data)
         return user
@@ -71,20 +204,73 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(serializers.ListSerializer):
+    """Article pages: viewer flags for every row come from one query per relation"""
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.attach_viewer_flags(rows)
+        return super().to_representation(rows)
+
+
+class ArticleSerializer(SparseFieldsetsMixin, ProfiledSerializerMixin,
+                        ImageRenditionsMixin, serializers.ModelSerializer):
     """Serializer for articles"""
     author = UserSerializer(read_only=True)
     total_likes = serializers.IntegerField(
-        source="likes.count", read_only=True)
+        source="like_count", read_only=True)
     total_favorites = serializers.IntegerField(
-        source="favorited_by.count", read_only=True)
+        source="favorite_count", read_only=True)
+    total_comments = serializers.IntegerField(
+        source="comment_count", read_only=True)
     tags = serializers.ListField(
-        child=serializers.CharField(), required=False, default=list)
+        child=serializers.CharField(max_length=100), required=False, default=list)
+    # Set on each instance by attach_viewer_flags(); False for anonymous viewers.
+    is_liked = serializers.BooleanField(read_only=True)
+    is_favorited = serializers.BooleanField(read_only=True)
+    thumbnail = ImageField()
 
     class Meta:
         model = Article
         fields = ['id', 'title', 'content', 'author', 'created_at',
-                  'updated_at', 'total_likes', 'total_favorites', 'tags']
+                  'updated_at', 'total_likes', 'total_favorites', 'total_comments',
+                  'tags', 'is_liked', 'is_favorited', 'thumbnail']
+        list_serializer_class = ArticleListSerializer
+
+    extra_fields = ('search_rank', 'search_snippet')
+    image_fields = ('thumbnail',)
+
+    def viewer_relations(self):
+        """Engagement relations whose viewer flag this serializer renders"""
+        return [relation for relation, flag in Article.VIEWER_FLAGS.items()
+                if flag in self.fields]
+
+    def attach_viewer_flags(self, articles):
+        """Load the requesting user's like/favorite flags onto articles"""
+        request = self.context.get('request')
+        Article.attach_viewer_flags(
+            articles, getattr(request, 'user', None), self.viewer_relations())
+
+    def to_representation(self, instance):
+        """Add rank and highlighted snippet to full-text search results"""
+        self.attach_viewer_flags([instance])
+        data = super().to_representation(instance)
+        if hasattr(instance, 'search_rank'):
+            for name in self.extra_fields:
+                if name in self.selected_fields:
+                    data[name] = getattr(instance, name)
+            if 'search_snippet' in data:
+                data['search_snippet'] = highlight(data['search_snippet'])
+        return data
+
+    def validate_tags(self, value):
+        """Reject tags whose normalized form does not fit the tag index"""
+        max_length = Tag._meta.get_field('name').max_length
+        for name in value:
+            if len(normalize_tag(name)) > max_length:
+                raise serializers.ValidationError(
+                    f'Tags may be at most {max_length} characters once normalized.')
+        return value
 
     def create(self, validated_data):
         """Handle tag processing before creating an article"""
@@ -101,7 +287,27 @@ class ArticleSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    """Serializer for the author block of article summaries"""
+
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+
+class ArticleSummarySerializer(ArticleSerializer):
+    """Read-only article summary: stored excerpt instead of the full body"""
+    author = AuthorSummarySerializer(read_only=True)
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ['id', 'title', 'excerpt', 'author', 'created_at',
+                  'updated_at', 'total_likes', 'total_favorites', 'total_comments',
+                  'tags', 'is_liked', 'is_favorited', 'thumbnail']
+        read_only_fields = fields
+
+
+class CommentSerializer(SparseFieldsetsMixin, ProfiledSerializerMixin,
+                        serializers.ModelSerializer):
     """Serializer for comments"""
     user = UserSerializer(read_only=True)
     article = serializers.PrimaryKeyRelatedField(
@@ -110,3 +316,59 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'article', 'user', 'content', 'created_at']
+
+
+class BulkCommentSerializer(CommentSerializer):
+    """Input for bulk comment creation; article ids are checked in one query by the view"""
+    article = serializers.IntegerField(min_value=1)
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    """Serializer for chunked uploads; offset is the next byte expected"""
+
+    class Meta:
+        model = Upload
+        fields = ['id', 'filename', 'size', 'offset', 'sha256', 'created_at']
+
+    def validate_filename(self, value):
+        """✅ Keep the base name and require an image extension"""
+        value = os.path.basename(value)
+        if os.path.splitext(value)[1].lower() not in ImageField.EXTENSIONS:
+            raise serializers.ValidationError(
+                ImageField.default_error_messages['extension'])
+        return value
+
+    def validate_size(self, value):
+        """✅ Ensure the file is not empty and fits the image upload limit"""
+        if not 0 < value <= ImageField.max_bytes():
+            raise serializers.ValidationError(
+                f"Size must be between 1 byte and {settings.BLOG_IMAGE_MAX_UPLOAD_MB} MB.")
+        return value
+
+    def validate_sha256(self, value):
+        """✅ Ensure the checksum is 64 hex digits"""
+        value = value.lower()
+        if value and not re.fullmatch(r"[0-9a-f]{64}", value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """Where a finished upload goes: an article's thumbnail or the user's avatar"""
+    target = serializers.ChoiceField(choices=['thumbnail', 'avatar'])
+    article = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs['target'] == 'thumbnail' and 'article' not in attrs:
+            raise serializers.ValidationError(
+                {"article": "Required for thumbnail uploads."})
+        return attrs
+
+
+class AccountDeletionSerializer(serializers.ModelSerializer):
+    """Serializer for background account deletions; progress counts removed rows"""
+
+    class Meta:
+        model = AccountDeletion
+        fields = ['id', 'status', 'progress', 'created_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from .authentication import revoke_user_tokens
+from .cache import schedule_invalidation
+from .models import Article, Comment, Profile, Upload, engagement_changed
+from .search import get_search_backend
+from . import uploads
+
+
+# User saves that do not change anything an article response shows.
+LOGIN_ONLY_FIELDS = {'last_login', 'password', 'is_active'}
+
+
+@receiver(pre_delete, sender=User)
+def release_user_engagement(sender, instance, **kwargs):
+    """Decrement article counters before the user's likes, favorites and comments cascade away"""
+    liked = Article.objects.filter(likes=instance)
+    favorited = Article.objects.filter(favorited_by=instance)
+    commented = dict(
+        Comment.objects.filter(user=instance).order_by().values('article_id')
+        .annotate(total=Count('*')).values_list('article_id', 'total'))
+    article_ids = set(liked.values_list('pk', flat=True)) | set(
+        favorited.values_list('pk', flat=True)) | set(commented)
+    liked.update(like_count=F('like_count') - 1)
+    favorited.update(favorite_count=F('favorite_count') - 1)
+    Article.adjust_comment_counts(
+        {article_id: -total for article_id, total in commented.items()})
+    if article_ids:
+        schedule_invalidation(article_ids, counters_only=True)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    """Stateless authentication never sees the row go; deny its tokens"""
+    revoke_user_tokens(instance.pk)
+
+
+# User flags whose change invalidates issued tokens: they are stamped into
+# the claims or decide what the claims grant.
+TOKEN_FLAGS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def _token_flags(user):
+    # Deferred flags are skipped rather than loaded.
+    return {flag: user.__dict__[flag] for flag in TOKEN_FLAGS if flag in user.__dict__}
+
+
+@receiver(post_init, sender=User)
+def remember_token_flags(sender, instance, **kwargs):
+    instance._loaded_token_flags = _token_flags(instance)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, created, **kwargs):
+    """Tokens carry login-time flags; deny them on deactivation or a staff/superuser change"""
+    flags = _token_flags(instance)
+    changed = any(flags.get(flag, value) != value
+                  for flag, value in instance._loaded_token_flags.items())
+    if not created and (not instance.is_active or changed):
+        revoke_user_tokens(instance.pk)
+    instance._loaded_token_flags = flags
+
+
+@receiver(post_delete, sender=Article)
+def drop_search_entry(sender, instance, using, **kwargs):
+    """Remove the article from search indexes kept outside its row"""
+    get_search_backend(using).remove([instance.pk])
+
+
+@receiver(post_delete, sender=Upload)
+def discard_partial_upload(sender, instance, **kwargs):
+    uploads.discard(instance)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_cache(sender, instance, **kwargs):
+    schedule_invalidation([instance.pk])
+
+
+# No post_delete receiver for Comment: it would stop Django from fast-deleting
+# an article's comments in one statement. CommentDetailView and the User
+# pre_delete receiver keep comment_count and the cache right on delete;
+# cascades from an Article take its counter with them.
+@receiver(post_save, sender=Comment)
+def invalidate_commented_article_cache(sender, instance, created, **kwargs):
+    if created:
+        Article.adjust_comment_counts({instance.article_id: 1})
+    schedule_invalidation([instance.article_id], counters_only=True)
+
+
+@receiver(engagement_changed)
+def invalidate_engaged_article_cache(sender, article_id, **kwargs):
+    schedule_invalidation([article_id], counters_only=True)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def invalidate_authored_article_cache(sender, instance, created, update_fields=None, **kwargs):
+    """Nested author data (username, bio) is part of every cached article"""
+    if created or (update_fields and set(update_fields) <= LOGIN_ONLY_FIELDS):
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    article_ids = list(Article.objects.filter(
+        author_id=user_id).values_list('pk', flat=True))
+    if article_ids:
+        schedule_invalidation(article_ids)
@@ -1,8 +1,73 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .models import Article, Comment, Profile
+from django.core.files.storage import default_storage
+from PIL import Image
+from .apps import leaking_aliases
+from .cache import cache_stats, reset_cache_stats
+from .hashers import hash_password
+from .models import AccountDeletion, Article, ArticleTag, Comment, Profile, Upload
+from .pool import ConnectionPool, PoolTimeout
+from .routers import ReplicaRouter, ReplicaRoutingMiddleware, use_primary
+from .profiling import build_report, reset_report
+from .renderers import FastJSONRenderer
+from .serializers import ArticleSerializer
+from . import deletion, images, trending, uploads
+
+
+class QueryCountAssertionsMixin:
+    """Assertions that catch N+1 regressions in list endpoints"""
+
+    def assertConstantQueries(self, url, add_rows, sizes=(1, 5, 15)):
+        """Assert GET url costs the same number of queries for every size.
+
+        add_rows(n) must grow the listed collection to n rows, each row
+        ideally with its own related objects so per-row lookups show up.
+        """
+        counts = {}
+        for size in sizes:
+            add_rows(size)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts[size] = len(ctx.captured_queries)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"Query count grows with rows for {url}: {counts}")
+
+
+def use_temporary_media(testcase):
+    """Point MEDIA_ROOT at a directory removed after the test"""
+    directory = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, directory)
+    media = override_settings(MEDIA_ROOT=directory)
+    media.enable()
+    testcase.addCleanup(media.disable)
 
 
 class BlogAPITestCase(APITestCase):
@@ -10,6 +75,7 @@ class BlogAPITestCase(APITestCase):
 
     def setUp(self):
         """Create test user and authentication"""
+        use_temporary_media(self)
         self.user = User.objects.create_user(
             username="testuser", email="test@example.com", password="testpass123"
         )
@@ -48,8 +114,7 @@ class BlogAPITestCase(APITestCase):
 
     def test_update_user_profile_with_avatar(self):
         """Test updating user profile with an avatar"""
-        avatar = SimpleUploadedFile(
-            "avatar.jpg", b"file_content", content_type="image/jpeg")
+        avatar = image_upload("avatar.jpg", (64, 64))
         data = {"bio": "Updated Bio", "avatar": avatar}
         response = self.client.put("/api/profile/", data, format="multipart")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -58,8 +123,7 @@ class BlogAPITestCase(APITestCase):
 
     def test_create_article_with_thumbnail(self):
         """Test creating an article with a thumbnail"""
-        thumbnail = SimpleUploadedFile(
-            "thumbnail.jpg", b"file_content", content_type="image/jpeg")
+        thumbnail = image_upload("thumbnail.jpg", (64, 64))
         data = {
             "title": "Article with Thumbnail",
             "content": "Content",
@@ -72,8 +136,7 @@ class BlogAPITestCase(APITestCase):
 
     def test_update_article_thumbnail(self):
         """Test updating an article's thumbnail"""
-        thumbnail = SimpleUploadedFile(
-            "new_thumbnail.jpg", b"new_content", content_type="image/jpeg")
+        thumbnail = image_upload("new_thumbnail.jpg", (64, 64))
         data = {"thumbnail": thumbnail}
         response = self.client.put(
             f"/api/articles/{self.article.id}/", data, format="multipart")
@@ -109,14 +172,15 @@ class BlogAPITestCase(APITestCase):
         """Test retrieving articles"""
         response = self.client.get("/api/articles/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(response.data) > 0)
+        self.assertTrue(len(response.data["results"]) > 0)
 
     def test_search_articles_by_tags(self):
         """Test searching articles by tags"""
         response = self.client.get("/api/articles/?search=Python")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        found = any("Python" in article["tags"] for article in response.data)
+        found = any("Python" in article["tags"]
+                    for article in response.data["results"])
         self.assertTrue(found, "Tag search did not return expected results")
 
     def test_update_article(self):
@@ -174,4 +238,1835 @@ class BlogAPITestCase(APITestCase):
         self.client.post(f"/api/articles/{self.article.id}/favorite/")
         response = self.client.get("/api/articles/favorites/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(len(response.data) > 0)
+        self.assertTrue(len(response.data["results"]) > 0)
+
+
+class ArticleCounterTestCase(APITestCase):
+    """Test cases for the denormalized like/favorite/comment counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="counter", password="testpass123")
+        self.other = User.objects.create_user(
+            username="other", password="testpass123")
+        self.article = Article.objects.create(
+            title="Counted", content="Body", author=self.other)
+        self.client.force_authenticate(self.user)
+
+    def test_like_toggle_updates_counter(self):
+        """Test liking and unliking keeps like_count exact"""
+        url = f"/api/articles/{self.article.id}/like/"
+        self.client.post(url)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, 1)
+
+        self.client.post(url)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, 0)
+
+    def test_favorite_toggle_updates_counter(self):
+        """Test favoriting shows up in total_favorites"""
+        self.client.post(f"/api/articles/{self.article.id}/favorite/")
+        response = self.client.get(f"/api/articles/{self.article.id}/")
+        self.assertEqual(response.data["total_favorites"], 1)
+
+    def test_user_deletion_releases_counters(self):
+        """Test deleting a user decrements the articles they engaged with"""
+        self.client.post(f"/api/articles/{self.article.id}/like/")
+        self.client.post(f"/api/articles/{self.article.id}/favorite/")
+        self.user.delete()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, 0)
+        self.assertEqual(self.article.favorite_count, 0)
+
+    def test_comment_create_and_delete_update_counter(self):
+        """Test single, bulk and deleted comments keep comment_count exact"""
+        response = self.client.post(
+            f"/api/articles/{self.article.id}/comments/", {"content": "First"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.post("/api/comments/bulk/", [
+            {"article": self.article.id, "content": "Second"},
+            {"article": self.article.id, "content": "Third"},
+        ], format="json")
+        response = self.client.get(f"/api/articles/{self.article.id}/")
+        self.assertEqual(response.data["total_comments"], 3)
+
+        comment_id = Comment.objects.filter(article=self.article).first().id
+        self.client.delete(f"/api/comments/{comment_id}/")
+        self.client.delete(f"/api/comments/{comment_id}/")
+        response = self.client.get(f"/api/articles/{self.article.id}/")
+        self.assertEqual(response.data["total_comments"], 2)
+
+    def test_user_deletion_releases_comment_counter(self):
+        """Test deleting a user subtracts the comments that cascade away"""
+        Comment.objects.create(article=self.article, user=self.user, content="Mine")
+        Comment.objects.create(article=self.article, user=self.user, content="Also mine")
+        Comment.objects.create(article=self.article, user=self.other, content="Theirs")
+        self.user.delete()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 1)
+
+    def test_recount_command_repairs_drift(self):
+        """Test the recount command restores counters from the through tables"""
+        self.article.likes.add(self.user)
+        Comment.objects.create(article=self.article, user=self.user, content="Hi")
+        Article.objects.filter(pk=self.article.pk).update(
+            like_count=7, favorite_count=3, comment_count=0)
+
+        out = StringIO()
+        call_command("recount_article_counters", stdout=out)
+        self.assertIn("Repaired 1", out.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.like_count, 1)
+        self.assertEqual(self.article.favorite_count, 0)
+        self.assertEqual(self.article.comment_count, 1)
+
+
+class QueryCountTestCase(QueryCountAssertionsMixin, APITestCase):
+    """Test cases asserting list endpoints avoid per-row queries"""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            username="viewer", password="testpass123")
+        Profile.objects.create(user=self.viewer, bio="Viewer bio")
+        self.article = Article.objects.create(
+            title="Host", content="Body", author=self.viewer)
+        self.client.force_authenticate(self.viewer)
+
+    def _make_author(self):
+        index = User.objects.count()
+        author = User.objects.create(username=f"author{index}")
+        Profile.objects.create(user=author, bio=f"Bio {index}")
+        return author
+
+    def _grow_articles(self, size, favorite=False):
+        while Article.objects.count() < size + 1:
+            article = Article.objects.create(
+                title="Row", content="Body", author=self._make_author())
+            if favorite:
+                article.favorited_by.add(self.viewer)
+
+    def test_article_list_query_count_is_constant(self):
+        """Test article list does not query per author/profile"""
+        self.assertConstantQueries("/api/articles/", self._grow_articles)
+
+    def test_favorite_list_query_count_is_constant(self):
+        """Test favorite list does not query per author/profile"""
+        self.assertConstantQueries(
+            "/api/articles/favorites/",
+            lambda size: self._grow_articles(size, favorite=True))
+
+    def test_comment_list_query_count_is_constant(self):
+        """Test comment list does not query per commenter/profile"""
+        def grow_comments(size):
+            while self.article.comments.count() < size:
+                Comment.objects.create(
+                    article=self.article, user=self._make_author(), content="Hi")
+
+        self.assertConstantQueries(
+            f"/api/articles/{self.article.id}/comments/", grow_comments)
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """Test cases for cursor pagination on (created_at, id)"""
+
+    def setUp(self):
+        # bulk_create and update() below skip the cache-invalidating signals.
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="pager", password="testpass123")
+        # Identical timestamps force the id tie-breaker to do the work.
+        self.articles = Article.objects.bulk_create([
+            Article(title=f"Article {i}", content="Body", author=self.user)
+            for i in range(7)
+        ])
+        Article.objects.update(created_at=Article.objects.first().created_at)
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(article["id"] for article in response.data["results"])
+            url, pages = response.data["next"], pages + 1
+        return ids, pages
+
+    def test_pages_cover_every_article_once_newest_first(self):
+        """Test following next links visits each article exactly once"""
+        ids, pages = self._walk("/api/articles/?page_size=3")
+        expected = list(Article.objects.order_by(
+            "-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test previous link from page two serves page one again"""
+        first = self.client.get("/api/articles/?page_size=3")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [a["id"] for a in back.data["results"]],
+            [a["id"] for a in first.data["results"]])
+        self.assertIsNone(first.data["previous"])
+
+    def test_invalid_cursor_is_not_found(self):
+        """Test a garbled cursor yields 404 instead of a server error"""
+        response = self.client.get("/api/articles/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_values_are_not_found(self):
+        """Test cursor values of the wrong type yield 404 instead of a server error"""
+        created = self.articles[0].created_at.isoformat()
+        for last_id in ("abc", None, {"id": 1}, [1]):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({"p": [created, last_id]}).encode()).decode()
+            for url in ("/api/articles/", "/api/async/articles/"):
+                response = self.client.get(url, {"cursor": cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comment_list_is_paginated(self):
+        """Test comment lists are paged newest first"""
+        article = self.articles[0]
+        comments = [
+            Comment.objects.create(article=article, user=self.user, content=str(i))
+            for i in range(4)
+        ]
+        response = self.client.get(
+            f"/api/articles/{article.id}/comments/?page_size=2")
+        self.assertEqual(
+            [c["id"] for c in response.data["results"]],
+            [comments[3].id, comments[2].id])
+        self.assertIsNotNone(response.data["next"])
+
+
+class TagIndexTestCase(APITestCase):
+    """Test cases for the normalized tag index and tag filters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="tagger", password="testpass123")
+        self.python = Article.objects.create(
+            title="One", content="Body", author=self.user, tags=["Python", "Django"])
+        self.rust = Article.objects.create(
+            title="Two", content="Body", author=self.user, tags=["Rust"])
+        self.both = Article.objects.create(
+            title="Three", content="Body", author=self.user, tags=["python", "rust"])
+
+    def _ids(self, query):
+        response = self.client.get(f"/api/articles/?{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {article["id"] for article in response.data["results"]}
+
+    def test_exact_tag_is_case_insensitive_and_not_substring(self):
+        """Test tag=py matches nothing while tag=PYTHON matches both spellings"""
+        self.assertEqual(self._ids("tag=py"), set())
+        self.assertEqual(self._ids("tag=PYTHON"), {self.python.id, self.both.id})
+
+    def test_tags_must_fit_once_normalized(self):
+        """Test a tag that casefolds past the index width is rejected, not truncated"""
+        self.client.force_authenticate(self.user)
+        for tags, expected in ((["ß" * 51], status.HTTP_400_BAD_REQUEST),
+                               (["ß" * 50], status.HTTP_201_CREATED)):
+            response = self.client.post("/api/articles/", {
+                "title": "Long tag", "content": "Body", "tags": tags}, format="json")
+            self.assertEqual(response.status_code, expected)
+        self.assertEqual(self._ids("tag=" + "ss" * 50), {response.data["id"]})
+
+    def test_tags_any_and_all(self):
+        """Test any-of and all-of tag filters"""
+        self.assertEqual(
+            self._ids("tags_any=django,rust"),
+            {self.python.id, self.rust.id, self.both.id})
+        self.assertEqual(self._ids("tags_all=python,rust"), {self.both.id})
+
+    def test_update_resyncs_index(self):
+        """Test replacing tags through the API drops stale index rows"""
+        self.client.force_authenticate(self.user)
+        response = self.client.put(
+            f"/api/articles/{self.rust.id}/",
+            {"title": "Two", "content": "Body", "tags": ["Go"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(ArticleTag.objects.filter(article=self.rust)
+                 .values_list("tag__name", flat=True)), ["go"])
+        self.assertEqual(self._ids("tag=rust"), {self.both.id})
+
+
+class FullTextSearchTestCase(APITestCase):
+    """Test cases for ranked full-text article search"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="searcher", password="testpass123")
+        self.in_title = Article.objects.create(
+            title="Caching strategies", content="Notes about memory.",
+            author=self.user)
+        self.in_body = Article.objects.create(
+            title="Weekly notes", content="We talked about caching at length.",
+            author=self.user)
+        Article.objects.create(
+            title="Unrelated", content="Nothing to see.", author=self.user)
+
+    def _search(self, text):
+        response = self.client.get("/api/articles/", {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_title_matches_rank_above_content_matches(self):
+        """Test title hits outrank body hits and carry a snippet"""
+        results = self._search("caching")
+        self.assertEqual(
+            [a["id"] for a in results], [self.in_title.id, self.in_body.id])
+        self.assertGreater(results[0]["search_rank"], results[1]["search_rank"])
+        self.assertIn("<mark>caching</mark>", results[1]["search_snippet"])
+
+    def test_snippet_escapes_article_markup(self):
+        """Test markup in the content comes back escaped around the highlight"""
+        Article.objects.create(
+            title="Injected", author=self.user,
+            content='<script>alert(1)</script> <img src=x onerror="alert(2)"> exploit here')
+        snippet = self._search("exploit")[0]["search_snippet"]
+        self.assertNotIn("<script>", snippet)
+        self.assertNotIn("<img", snippet)
+        self.assertIn("&lt;script&gt;", snippet)
+        self.assertIn("<mark>exploit</mark>", snippet)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Test saving and deleting keep the search index current"""
+        self.in_body.content = "Now about queues instead."
+        self.in_body.save()
+        self.assertEqual(
+            [a["id"] for a in self._search("caching")], [self.in_title.id])
+        self.in_title.delete()
+        self.assertEqual(self._search("caching"), [])
+
+    def test_search_results_paginate_by_rank(self):
+        """Test following next links over ranked results"""
+        first = self.client.get(
+            "/api/articles/", {"search": "caching", "page_size": 1})
+        second = self.client.get(first.data["next"])
+        self.assertEqual(first.data["results"][0]["id"], self.in_title.id)
+        self.assertEqual(second.data["results"][0]["id"], self.in_body.id)
+        self.assertIsNone(second.data["next"])
+
+    def test_reindex_command(self):
+        """Test the bulk reindex command rebuilds every entry"""
+        out = StringIO()
+        call_command("reindex_articles", stdout=out)
+        self.assertIn("Indexed 3 article(s)", out.getvalue())
+        self.assertEqual(len(self._search("caching")), 2)
+
+
+class EngagementEndpointTestCase(APITestCase):
+    """Test cases for like/favorite toggles and idempotent PUT/DELETE"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="clicker", password="testpass123")
+        self.article = Article.objects.create(
+            title="Liked", content="Body", author=self.user)
+        self.like_url = f"/api/articles/{self.article.id}/like/"
+        self.favorite_url = f"/api/articles/{self.article.id}/favorite/"
+        self.client.force_authenticate(self.user)
+
+    def _counts(self):
+        self.article.refresh_from_db()
+        return self.article.like_count, self.article.favorite_count
+
+    def test_put_like_is_idempotent(self):
+        """Test repeated PUT likes once and reports the existing like"""
+        first = self.client.put(self.like_url)
+        second = self.client.put(self.like_url)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counts(), (1, 0))
+
+    def test_delete_favorite_is_idempotent(self):
+        """Test repeated DELETE unfavorites once and never goes negative"""
+        self.client.put(self.favorite_url)
+        for _ in range(2):
+            response = self.client.delete(self.favorite_url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            self.assertEqual(response.content, b"")
+        self.assertEqual(self._counts(), (0, 0))
+        self.assertFalse(self.article.favorited_by.exists())
+
+    def test_missing_article_is_not_found(self):
+        """Test every method reports 404 for an unknown article"""
+        for method in (self.client.post, self.client.put, self.client.delete):
+            response = method("/api/articles/999999/like/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_toggle_does_not_load_likers(self):
+        """Test a toggle costs a fixed handful of statements regardless of likers"""
+        likers = User.objects.bulk_create(
+            [User(username=f"fan{i}") for i in range(25)])
+        self.article.likes.add(*likers)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.like_url)
+        statements = [
+            q["sql"] for q in ctx.captured_queries
+            if not q["sql"].startswith(("BEGIN", "COMMIT", "SAVEPOINT", "RELEASE"))
+        ]
+        # The old path selected every liker (auth_user joined to likes).
+        self.assertFalse(any("auth_user" in sql for sql in statements))
+        self.assertLessEqual(len(statements), 4)
+
+
+class ResponseCacheTestCase(APITestCase):
+    """Test cases for the anonymous article response cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="cached", password="testpass123")
+        self.article = Article.objects.create(
+            title="Hot", content="Body", author=self.user)
+        self.detail_url = f"/api/articles/{self.article.id}/"
+
+    def test_repeat_anonymous_read_is_served_from_cache(self):
+        """Test the second anonymous GET skips the database"""
+        self.client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["title"], "Hot")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(cache_stats()["detail"]["hits"], 1)
+
+    def test_article_save_invalidates_detail_and_list(self):
+        """Test edits show up immediately for anonymous readers"""
+        self.client.get(self.detail_url)
+        self.client.get("/api/articles/")
+        self.article.title = "Edited"
+        self.article.save()
+        self.assertEqual(self.client.get(self.detail_url).data["title"], "Edited")
+        self.assertEqual(
+            self.client.get("/api/articles/").data["results"][0]["title"], "Edited")
+
+    def test_like_invalidates_cached_counters(self):
+        """Test a like bumps the cached total_likes"""
+        self.client.get(self.detail_url)
+        Article.add_engagement("likes", self.article.id, self.user.id)
+        self.assertEqual(self.client.get(self.detail_url).data["total_likes"], 1)
+
+    def test_like_keeps_chronological_lists_cached(self):
+        """Test engagement drops only the detail and counter-ranked list pages"""
+        for url in ("/api/articles/", "/api/articles/top/", "/api/async/articles/"):
+            self.client.get(url)
+        reset_cache_stats()
+        Article.add_engagement("likes", self.article.id, self.user.id)
+        response = self.client.get("/api/articles/")
+        self.assertEqual(response.data["results"][0]["total_likes"], 0)
+        async_to_sync(self.async_client.get)("/api/async/articles/")
+        self.assertEqual(cache_stats()["list"]["hits"], 2)
+        self.assertEqual(self.client.get(self.detail_url).data["total_likes"], 1)
+        top = self.client.get("/api/articles/top/").data["results"]
+        self.assertEqual([article["total_likes"] for article in top], [1])
+        self.assertEqual(cache_stats()["list"]["misses"], 1)
+
+        # Membership changes still reach every list.
+        Article.objects.create(title="Newer", content="Body", author=self.user)
+        self.assertEqual(
+            self.client.get("/api/articles/").data["results"][0]["title"], "Newer")
+
+    def test_authenticated_reads_bypass_cache(self):
+        """Test logged-in requests neither read nor fill the cache"""
+        reset_cache_stats()
+        self.client.force_authenticate(self.user)
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+        self.assertEqual(cache_stats()["detail"], {
+            "hits": 0, "misses": 0, "hit_ratio": None})
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Test cases for ETag revalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="etag", password="testpass123")
+        self.article = Article.objects.create(
+            title="Validated", content="Body", author=self.user)
+        self.detail_url = f"/api/articles/{self.article.id}/"
+        self.client.force_authenticate(self.user)
+
+    def test_matching_etag_returns_304_without_body(self):
+        """Test If-None-Match with the current ETag short-circuits"""
+        first = self.client.get(self.detail_url)
+        self.assertIn("ETag", first)
+
+        second = self.client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_counter_change_changes_etag(self):
+        """Test a like invalidates the ETag even though updated_at is unchanged"""
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.client.post(f"/api/articles/{self.article.id}/like/")
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_likes"], 1)
+
+    def test_no_last_modified(self):
+        """Test If-Modified-Since cannot hide a like, which leaves updated_at alone"""
+        first = self.client.get("/api/articles/")
+        self.assertNotIn("Last-Modified", first)
+        self.client.post(f"/api/articles/{self.article.id}/like/")
+        response = self.client.get(
+            "/api/articles/", HTTP_IF_MODIFIED_SINCE="Sat, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["total_likes"], 1)
+
+    def test_anonymous_cache_hit_revalidates(self):
+        """Test cached anonymous responses still answer 304"""
+        self.client.force_authenticate(None)
+        etag = self.client.get("/api/articles/")["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/articles/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """Test cases for ?fields= / ?omit= and the summary representation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="sparse", password="testpass123")
+        self.article = Article.objects.create(
+            title="Long read", content="word " * 500, author=self.user)
+
+    def _sql(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(q["sql"] for q in ctx.captured_queries)
+
+    def test_fields_param_trims_output_and_columns(self):
+        """Test ?fields=id,title renders two keys and never selects content"""
+        response, sql = self._sql("/api/articles/?fields=id,title")
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "title"})
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn("auth_user", sql)
+
+    def test_omit_param(self):
+        """Test ?omit=content drops the body from detail responses"""
+        response, sql = self._sql(
+            f"/api/articles/{self.article.id}/?omit=content,author")
+        self.assertNotIn("content", response.data)
+        self.assertIn("title", response.data)
+        self.assertNotIn('"blog_article"."content"', sql)
+
+    def test_summary_mode_uses_stored_excerpt(self):
+        """Test ?mode=summary returns the excerpt and a slim author"""
+        response, sql = self._sql("/api/articles/?mode=summary")
+        row = response.data["results"][0]
+        self.assertNotIn("content", row)
+        self.assertLessEqual(len(row["excerpt"]), 280)
+        self.assertTrue(row["excerpt"].startswith("word word"))
+        self.assertEqual(set(row["author"]), {"id", "username"})
+        self.assertNotIn('"blog_article"."content"', sql)
+        self.assertNotIn("blog_profile", sql)
+
+    def test_excerpt_follows_content_updates(self):
+        """Test saving new content refreshes the stored excerpt"""
+        self.article.content = "Short   and\nsweet"
+        self.article.save(update_fields=["content"])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.excerpt, "Short and sweet")
+
+    def test_fields_param_ignored_on_writes(self):
+        """Test ?fields= does not drop writable fields from validation"""
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            "/api/articles/?fields=id",
+            {"title": "T", "content": "C"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Article.objects.get(pk=response.data["id"]).content, "C")
+
+    def test_comment_fields_param(self):
+        """Test comment lists honour ?fields="""
+        Comment.objects.create(
+            article=self.article, user=self.user, content="Nice")
+        response, sql = self._sql(
+            f"/api/articles/{self.article.id}/comments/?fields=id,content")
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "content"})
+        self.assertNotIn("auth_user", sql)
+
+
+@override_settings(BLOG_PROFILING=True, BLOG_PROFILING_FLUSH_INTERVAL=0,
+                   BLOG_RESPONSE_CACHE_ENABLED=False)
+class ProfilingMiddlewareTestCase(APITestCase):
+    """Test cases for the opt-in profiling middleware and report"""
+
+    def setUp(self):
+        reset_report()
+        self.user = User.objects.create_user(
+            username="profiled", password="testpass123")
+        self.article = Article.objects.create(
+            title="Measured", content="Body", author=self.user)
+
+    def test_server_timing_header(self):
+        """Test responses carry db, serializer and total timings"""
+        response = self.client.get("/api/articles/")
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("serializer;dur=", timing)
+        self.assertIn('desc="article-list"', timing)
+
+    def test_report_aggregates_by_url_name(self):
+        """Test the report groups requests per resolved URL name"""
+        for _ in range(3):
+            self.client.get("/api/articles/")
+        self.client.get(f"/api/articles/{self.article.id}/comments/")
+        report = build_report()
+        self.assertEqual(report["article-list"]["requests"], 3)
+        self.assertEqual(report["comment-list"]["requests"], 1)
+        self.assertGreater(report["article-list"]["queries"]["p50"], 0)
+
+        out = StringIO()
+        call_command("profiling_report", stdout=out)
+        self.assertIn("article-list\t3", out.getvalue())
+
+    def test_report_endpoint_is_admin_only(self):
+        """Test only staff can read the profiling endpoint"""
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/admin/profiling/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/admin/profiling/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("endpoints", response.data)
+        self.assertIn("db_pool", response.data)
+
+
+class BenchmarkCommandTestCase(APITestCase):
+    """Smoke test for the seeding and benchmark commands"""
+
+    def test_seed_and_run_benchmarks(self):
+        """Test a tiny seeded dataset produces a complete JSON report"""
+        call_command(
+            "seed_benchmark_data", users=5, articles=12, comments=20,
+            likes=15, favorites=10, content_words=30, stdout=StringIO())
+        self.assertEqual(Article.objects.count(), 12)
+        self.assertEqual(
+            sum(Article.objects.values_list("like_count", flat=True)),
+            Article.likes.through.objects.count())
+
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        def dataset():
+            return (sorted(Article.likes.through.objects.values_list("article_id", "user_id")),
+                    sorted(Article.objects.values_list("pk", "like_count", "trend_score")))
+
+        before = dataset()
+        call_command(
+            "run_benchmarks", requests=2, warmup=0, output=path, stdout=StringIO())
+        with open(path) as handle:
+            report = json.load(handle)
+        # The write scenario leaves the data as it found it for the next run.
+        self.assertEqual(dataset(), before)
+
+        self.assertEqual(report["meta"]["dataset"]["articles"], 12)
+        for name in ("article-list", "article-detail", "comment-list",
+                     "like-article", "favorite-articles", "search", "tag-filter"):
+            scenario = report["scenarios"][name]
+            self.assertEqual(scenario["requests"], 2)
+            self.assertIn("p99", scenario["latency_ms"])
+            self.assertTrue(all(code.startswith("2")
+                            for code in scenario["status_codes"]), name)
+
+
+class StatelessJWTTestCase(APITestCase):
+    """Test claim-based authentication and token revocation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="claims", email="claims@example.com", password="ClaimsPass123")
+        self.article = Article.objects.create(
+            title="Claims", content="Body", author=self.user)
+        self.tokens = self.client.post(
+            "/api/token/", {"username": "claims", "password": "ClaimsPass123"}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def test_authenticated_write_skips_user_lookup(self):
+        """Test a like costs no auth_user query"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f"/api/articles/{self.article.id}/like/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(
+            [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]])
+
+    def test_full_user_loaded_when_needed(self):
+        """Test views needing the User row still get it"""
+        response = self.client.get("/api/profile/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "claims@example.com")
+
+        response = self.client.post("/api/articles/", {"title": "New", "content": "Text"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["author"]["username"], "claims")
+
+    def test_revoke_endpoint_denylists_tokens(self):
+        """Test revoked access and refresh tokens are rejected"""
+        response = self.client.post(
+            "/api/token/revoke/", {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get("/api/articles/favorites/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(
+            "/api/token/refresh/", {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_tokens_rejected(self):
+        """Test tokens stop working once the user is deactivated"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/articles/favorites/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_restamps_claims(self):
+        """Test refreshed access tokens carry the user's current flags"""
+        staff = User.objects.create_user(
+            username="staff", password="StaffPass123", is_staff=True)
+        tokens = self.client.post(
+            "/api/token/", {"username": "staff", "password": "StaffPass123"}).data
+        # A queryset update skips the revoking signal; refresh alone must catch it.
+        User.objects.filter(pk=staff.pk).update(is_staff=False)
+        self.client.credentials()
+        response = self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = self.client.get("/api/admin/profiling/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        User.objects.filter(pk=staff.pk).update(is_active=False)
+        self.client.credentials()
+        response = self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_demoted_user_tokens_rejected(self):
+        """Test demoting a staff user revokes their access and refresh tokens"""
+        staff = User.objects.create_user(
+            username="staff", password="StaffPass123", is_staff=True)
+        tokens = self.client.post(
+            "/api/token/", {"username": "staff", "password": "StaffPass123"}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get("/api/admin/profiling/").status_code,
+                         status.HTTP_200_OK)
+
+        staff = User.objects.get(pk=staff.pk)
+        staff.is_staff = False
+        staff.save()
+        self.assertEqual(self.client.get("/api/admin/profiling/").status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_does_not_revoke_tokens(self):
+        """Test saves that leave the flags alone keep tokens valid"""
+        self.user.last_login = timezone.now()
+        self.user.save()
+        response = self.client.get("/api/articles/favorites/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_owner_check_uses_token_identity(self):
+        """Test ownership checks compare ids from the token"""
+        other = User.objects.create_user(username="other", password="OtherPass123")
+        foreign = Article.objects.create(title="Theirs", content="x", author=other)
+        response = self.client.delete(f"/api/articles/{foreign.id}/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete(f"/api/articles/{self.article.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+@override_settings(BLOG_RESPONSE_CACHE_ENABLED=False)
+class AsyncReadViewTestCase(APITestCase):
+    """Test the async read endpoints answer exactly like the sync ones"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="asyncreader", email="async@example.com", password="AsyncPass123")
+        Profile.objects.create(user=self.user, bio="Reads concurrently")
+        self.articles = [
+            Article.objects.create(title=f"Async {i}", content=f"Body {i} about python",
+                                   author=self.user, tags=["python", f"t{i}"])
+            for i in range(5)
+        ]
+        for article in self.articles[:3]:
+            Comment.objects.create(article=article, user=self.user, content="Nice")
+            article.favorited_by.add(self.user)
+        self.access = self.client.post(
+            "/api/token/", {"username": "asyncreader", "password": "AsyncPass123"}
+        ).data["access"]
+
+    def fetch(self, path, token=None, **extra):
+        """Return (sync response, async response) for the same request"""
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        sync = self.client.get(path, headers=headers, **extra)
+        asynchronous = async_to_sync(self.async_client.get)(
+            path.replace("/api/", "/api/async/", 1), headers={**headers, **{
+                key[5:].lower().replace("_", "-"): value
+                for key, value in extra.items() if key.startswith("HTTP_")}})
+        return sync, asynchronous
+
+    def assertSameResponse(self, path, token=None, status_code=status.HTTP_200_OK, **extra):
+        sync, asynchronous = self.fetch(path, token, **extra)
+        self.assertEqual(sync.status_code, status_code)
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(
+            asynchronous.content.replace(b"/api/async/", b"/api/"), sync.content)
+        self.assertEqual(asynchronous.get("Content-Type"), sync.get("Content-Type"))
+        return sync, asynchronous
+
+    def test_article_list_pages_match(self):
+        """Test list pages, cursors and variants are identical"""
+        sync, _ = self.assertSameResponse("/api/articles/?page_size=2")
+        self.assertSameResponse(sync.data["next"].replace("http://testserver", ""))
+        self.assertSameResponse("/api/articles/?mode=summary&fields=id,title")
+        self.assertSameResponse("/api/articles/?tags_any=t1,t2")
+        self.assertSameResponse("/api/articles/?search=python")
+
+    def test_detail_comments_and_favorites_match(self):
+        """Test detail, comment and favorite reads are identical"""
+        article = self.articles[0]
+        sync, asynchronous = self.assertSameResponse(f"/api/articles/{article.id}/")
+        self.assertEqual(asynchronous["ETag"], sync["ETag"])
+        self.assertSameResponse(f"/api/articles/{article.id}/comments/")
+        self.assertSameResponse("/api/articles/favorites/", token=self.access)
+        comment = Comment.objects.filter(article=article).first()
+        self.assertSameResponse(f"/api/comments/{comment.id}/", token=self.access)
+
+    def test_errors_and_conditional_requests_match(self):
+        """Test 404, 401 and 304 behave the same"""
+        self.assertSameResponse("/api/articles/999999/", status_code=status.HTTP_404_NOT_FOUND)
+        self.assertSameResponse("/api/articles/favorites/",
+                                status_code=status.HTTP_401_UNAUTHORIZED)
+        etag = self.client.get(f"/api/articles/{self.articles[1].id}/")["ETag"]
+        self.assertSameResponse(f"/api/articles/{self.articles[1].id}/",
+                                status_code=status.HTTP_304_NOT_MODIFIED,
+                                HTTP_IF_NONE_MATCH=etag)
+
+    @override_settings(BLOG_RESPONSE_CACHE_ENABLED=True)
+    def test_async_reads_use_the_response_cache(self):
+        """Test async pages are cached under their own URL and invalidated by writes"""
+        reset_cache_stats()
+        self.client.get("/api/articles/?page_size=2")
+        get = async_to_sync(self.async_client.get)
+        first = get("/api/async/articles/?page_size=2")
+        self.assertIn("/api/async/articles/", first.json()["next"])
+        self.assertEqual(get("/api/async/articles/?page_size=2").content, first.content)
+        self.assertEqual(cache_stats()["list"], {"hits": 1, "misses": 2, "hit_ratio": 0.3333})
+
+        self.articles[4].title = "Renamed"
+        self.articles[4].save()
+        response = get("/api/async/articles/?page_size=2")
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed")
+
+
+class BulkCreateTestCase(APITestCase):
+    """Test batch article and comment creation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="importer", email="importer@example.com", password="ImportPass123")
+        Profile.objects.create(user=self.user, bio="Bulk")
+        self.article = Article.objects.create(title="Target", content="x", author=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_articles(self):
+        """Test articles are created with derived data in a constant number of queries"""
+        self.client.get("/api/articles/")
+        items = [{"title": f"Imported {i}", "content": f"Body {i} " * 100,
+                  "tags": ["Import", f"batch{i % 2}"]} for i in range(20)]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post("/api/articles/bulk/", items[:2], format="json")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post("/api/articles/bulk/", items[2:], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(response.data["created"], 18)
+        self.assertEqual(response.data["results"][0]["data"]["author"]["username"], "importer")
+
+        imported = Article.objects.get(title="Imported 5")
+        self.assertTrue(imported.excerpt.startswith("Body 5"))
+        self.assertEqual(ArticleTag.objects.filter(tag__name="import").count(), 20)
+        titles = [a["title"] for a in self.client.get("/api/articles/?page_size=100").data["results"]]
+        self.assertIn("Imported 19", titles)
+        search = self.client.get("/api/articles/?search=imported").data["results"]
+        self.assertEqual(len(search), 20)
+
+    def test_bulk_create_reports_per_item_errors(self):
+        """Test valid items are created and invalid ones reported by index"""
+        items = [{"title": "Good", "content": "ok"}, {"content": "no title"}, "junk"]
+        response = self.client.post("/api/articles/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        self.assertEqual([r["status"] for r in response.data["results"]], [201, 400, 400])
+        self.assertIn("title", response.data["results"][1]["errors"])
+
+        response = self.client.post("/api/articles/bulk/?atomic=true", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["results"][0]["status"], 424)
+        self.assertEqual(Article.objects.filter(title="Good").count(), 1)
+
+    def test_bulk_create_comments(self):
+        """Test comments across articles with one existence check"""
+        other = Article.objects.create(title="Other", content="y", author=self.user)
+        items = [{"article": self.article.id, "content": "First"},
+                 {"article": other.id, "content": "Second"},
+                 {"article": 999999, "content": "Orphan"},
+                 {"article": self.article.id}]
+        response = self.client.post("/api/comments/bulk/", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r["status"] for r in response.data["results"]], [201, 201, 400, 400])
+        self.assertIn("article", response.data["results"][2]["errors"])
+        self.assertIn("content", response.data["results"][3]["errors"])
+        self.assertEqual(response.data["results"][1]["data"]["article"], other.id)
+        self.assertEqual(Comment.objects.filter(article=self.article).count(), 1)
+
+    def test_bulk_limits(self):
+        """Test the endpoints reject non-lists, oversize batches and anonymous users"""
+        response = self.client.post("/api/comments/bulk/", {"content": "x"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(BLOG_BULK_MAX_ITEMS=2):
+            response = self.client.post(
+                "/api/articles/bulk/", [{"title": "t", "content": "c"}] * 3, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(None)
+        response = self.client.post("/api/articles/bulk/", [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ExportTestCase(APITestCase):
+    """Test the streaming article export endpoint and command"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="exporter", password="ExportPass123", is_staff=True)
+        self.articles = [
+            Article.objects.create(title=f"Export {i}", content=f"Body {i}",
+                                   author=self.admin, tags=["data"])
+            for i in range(3)
+        ]
+        Comment.objects.create(article=self.articles[0], user=self.admin, content="First!")
+        # Older than the watermark overlap, so incremental runs skip them.
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Article.objects.update(updated_at=an_hour_ago)
+        Comment.objects.update(created_at=an_hour_ago)
+        self.client.force_authenticate(self.admin)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_with_comments(self):
+        """Test one JSON object per line, comments prefetched per chunk"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/export/articles/?comments=1")
+            lines = self.read(response).splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["title"] for row in rows], ["Export 0", "Export 1", "Export 2"])
+        self.assertEqual(rows[0]["comments"][0]["content"], "First!")
+        self.assertEqual(rows[1]["comments"], [])
+        self.assertEqual(rows[0]["author"], "exporter")
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+
+    def test_csv_export(self):
+        """Test CSV output has a header and JSON-encoded tags"""
+        text = self.read(self.client.get("/api/export/articles/?output=csv"))
+        lines = text.splitlines()
+        self.assertTrue(lines[0].startswith("id,title,content"))
+        self.assertNotIn("comments", lines[0])
+        self.assertIn('"[""data""]"', lines[1])
+        self.assertEqual(len(lines), 4)
+
+    def test_incremental_export_with_watermark(self):
+        """Test updated_since returns only articles changed after the watermark"""
+        response = self.client.get("/api/export/articles/?comments=1")
+        self.read(response)
+        watermark = response["X-Export-Watermark"]
+        self.articles[1].title = "Edited"
+        self.articles[1].save()
+        Comment.objects.create(article=self.articles[2], user=self.admin, content="Late")
+        response = self.client.get(
+            "/api/export/articles/", {"comments": "1", "updated_since": watermark})
+        titles = [json.loads(line)["title"] for line in self.read(response).splitlines()]
+        self.assertEqual(sorted(titles), ["Edited", "Export 2"])
+
+    def test_row_committed_mid_export_is_not_lost(self):
+        """Test a row committed after the export's snapshot is in the next run"""
+        response = self.client.get("/api/export/articles/")
+        self.assertEqual(len(self.read(response).splitlines()), 3)
+        # A write stamped a second before the export started whose transaction
+        # committed after the export's snapshot: the first run missed it.
+        started = parse_datetime(response["X-Export-Watermark"]) + timedelta(
+            seconds=settings.BLOG_EXPORT_WATERMARK_OVERLAP_SECONDS)
+        late = Article.objects.create(title="Late", content="Body", author=self.admin)
+        Article.objects.filter(pk=late.pk).update(updated_at=started - timedelta(seconds=1))
+
+        response = self.client.get(
+            "/api/export/articles/", {"updated_since": response["X-Export-Watermark"]})
+        titles = [json.loads(line)["title"] for line in self.read(response).splitlines()]
+        self.assertEqual(titles, ["Late"])
+
+    def test_export_requires_admin(self):
+        """Test non-staff users and bad parameters are rejected"""
+        response = self.client.get("/api/export/articles/?output=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(
+            User.objects.create_user(username="reader", password="ReaderPass123"))
+        response = self.client.get("/api/export/articles/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command_state_file(self):
+        """Test the command writes a watermark and exports only changes on rerun"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        state = os.path.join(directory, "state")
+        output = os.path.join(directory, "out.ndjson")
+        call_command("export_articles", output=output, state_file=state, stderr=StringIO())
+        with open(output) as handle:
+            self.assertEqual(len(handle.readlines()), 3)
+        self.articles[0].content = "Changed"
+        self.articles[0].save()
+        call_command("export_articles", output=output, state_file=state, stderr=StringIO())
+        with open(output) as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual([row["content"] for row in rows], ["Changed"])
+
+
+class TrendingFeedTestCase(APITestCase):
+    """Test the decayed trending feed and the most-liked feed"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ranker", password="RankPass123")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="FanPass123")
+                     for i in range(3)]
+        self.old, self.liked, self.favorited = [
+            Article.objects.create(title=title, content="x", author=self.user, tags=["feed"])
+            for title in ("Old", "Liked", "Favorited")
+        ]
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [article["title"] for article in response.data["results"]]
+
+    def test_scores_follow_weights_and_decay(self):
+        """Test favorites outweigh likes and old engagement decays"""
+        for fan in self.fans[:2]:
+            Article.add_engagement("likes", self.liked.id, fan.id)
+        Article.add_engagement("favorited_by", self.favorited.id, self.fans[0].id)
+        Comment.objects.create(article=self.favorited, user=self.user, content="+1")
+        ten_days_ago = timezone.now() - timedelta(days=10)
+        Article.objects.filter(pk=self.old.pk).update(
+            trend_score=trending.score_expression(40, at=ten_days_ago))
+
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Favorited", "Liked", "Old"])
+        self.liked.refresh_from_db()
+        self.assertAlmostEqual(trending.decayed(self.liked.trend_score), 2.0, places=3)
+
+        call_command("compact_trending", stdout=StringIO())
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Favorited", "Liked"])
+
+    def test_removing_engagement_waits_for_rebuild(self):
+        """Test an unlike leaves the score alone until a rebuild drops it"""
+        response = self.client.get("/api/articles/trending/")
+        self.assertEqual(response.data["results"], [])
+        Article.toggle_engagement("likes", self.liked.id, self.fans[0].id)
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Liked"])
+        Article.toggle_engagement("likes", self.liked.id, self.fans[0].id)
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Liked"])
+        call_command("compact_trending", rebuild=True, stdout=StringIO())
+        self.liked.refresh_from_db()
+        self.assertIsNone(self.liked.trend_score)
+        self.assertEqual(self.titles("/api/articles/trending/"), [])
+
+    def test_unlike_keeps_comment_contributions(self):
+        """Test a liked then unliked article still ranks by its comments"""
+        Comment.objects.create(article=self.favorited, user=self.user, content="+1")
+        for _ in range(2):
+            Comment.objects.create(article=self.liked, user=self.user, content="+1")
+        # A like from two days ago weighs less than one dated now would.
+        with patch("blog.trending.timezone.now",
+                   return_value=timezone.now() - timedelta(days=2)):
+            Article.toggle_engagement("likes", self.liked.id, self.fans[0].id)
+        Article.toggle_engagement("likes", self.liked.id, self.fans[0].id)
+
+        self.liked.refresh_from_db()
+        self.assertGreaterEqual(trending.decayed(self.liked.trend_score), 1.0 - 1e-6)
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Liked", "Favorited"])
+        call_command("compact_trending", rebuild=True, stdout=StringIO())
+        self.liked.refresh_from_db()
+        self.assertAlmostEqual(trending.decayed(self.liked.trend_score), 1.0, places=3)
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Liked", "Favorited"])
+
+    def test_top_feed_orders_by_likes(self):
+        """Test the most-liked feed with keyset paging and tag filtering"""
+        for fan in self.fans:
+            self.liked.likes.add(fan)
+        Article.objects.filter(pk=self.liked.pk).update(like_count=3)
+        Article.objects.filter(pk=self.favorited.pk).update(like_count=1)
+        cache.clear()
+        response = self.client.get("/api/articles/top/?page_size=1")
+        self.assertEqual(response.data["results"][0]["title"], "Liked")
+        next_page = self.client.get(response.data["next"])
+        self.assertEqual([a["title"] for a in next_page.data["results"]], ["Favorited"])
+        self.assertEqual(self.titles("/api/articles/top/?tag=nope"), [])
+
+    def test_rebuild_scores_from_counters(self):
+        """Test --rebuild scores articles that only have counters and comments"""
+        Article.objects.filter(pk=self.old.pk).update(like_count=4)
+        Comment.objects.bulk_create([Comment(article=self.liked, user=self.user, content="hi")])
+        call_command("compact_trending", rebuild=True, stdout=StringIO())
+        self.assertEqual(self.titles("/api/articles/trending/"), ["Old", "Liked"])
+
+
+class FakeConnection:
+    """Stand-in DB-API connection for pool tests"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """Test the in-process connection pool behind the blog.pool engine"""
+
+    def test_released_connections_are_reused(self):
+        """Test a returned connection is handed out again instead of a new one"""
+        pool = ConnectionPool(max_size=2)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        stats = pool.stats()
+        self.assertEqual((stats["opened"], stats["reused"], stats["in_use"]), (1, 1, 1))
+
+    def test_exhausted_pool_waits_then_times_out(self):
+        """Test checkouts beyond max_size wait for a release, up to the timeout"""
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        held = pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+
+        pool.timeout = 5
+        releaser = threading.Timer(0.05, pool.release, args=[held])
+        releaser.start()
+        self.assertIs(pool.acquire(FakeConnection), held)
+        releaser.join()
+        stats = pool.stats()
+        self.assertEqual((stats["timeouts"], stats["waits"]), (1, 1))
+        self.assertGreater(stats["wait_ms_max"], 0)
+
+    def test_broken_connections_are_replaced(self):
+        """Test failed resets and health checks close the connection"""
+        def check(connection):
+            if connection.closed:
+                raise ValueError("connection closed")
+
+        pool = ConnectionPool(max_size=1, check=check, reset=lambda c: not c.closed)
+        first = pool.acquire(FakeConnection)
+        pool.release(first, reusable=False)
+        self.assertTrue(first.closed)
+
+        second = pool.acquire(FakeConnection)
+        pool.release(second)
+        second.closed = True  # the server went away while it sat idle
+        third = pool.acquire(FakeConnection)
+        self.assertIsNot(third, second)
+        stats = pool.stats()
+        self.assertEqual((stats["opened"], stats["failed_checks"], stats["size"]), (3, 1, 1))
+
+    def test_asgi_persistent_connections_flagged(self):
+        """Test unpooled persistent connections are reported only under ASGI"""
+        databases = {
+            "default": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 60},
+            "pooled": {"ENGINE": "blog.pool", "CONN_MAX_AGE": 0},
+            "unlimited": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": None},
+            "per_request": {"ENGINE": "django.db.backends.postgresql"},
+        }
+        self.assertEqual(leaking_aliases(databases, "asgi"), ["default", "unlimited"])
+        self.assertEqual(leaking_aliases(databases, "wsgi"), [])
+
+
+@override_settings(BLOG_READ_REPLICA="replica", BLOG_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTestCase(SimpleTestCase):
+    """Test safe requests read from the replica except right after a user's writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.user = User(pk=41, username="writer")
+
+    def route(self, method, user=None, status_code=200, pin=False):
+        """Run a request through the middleware; return where its reads went"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Article))
+            if user is not None:
+                request.user = user  # what DRF does once it authenticates
+            if pin:
+                with use_primary():
+                    seen.append(self.router.db_for_read(Article))
+            seen.append(self.router.db_for_read(Article))
+            return HttpResponse(status=status_code)
+
+        ReplicaRoutingMiddleware(view)(getattr(self.factory, method)("/api/articles/"))
+        return seen
+
+    def test_reads_follow_the_request_method(self):
+        """Test GETs use the replica, writes and code outside requests the primary"""
+        self.assertEqual(self.route("get"), ["replica", "replica"])
+        self.assertEqual(self.route("post", self.user, 400), ["default", "default"])
+        self.assertEqual(self.route("get", pin=True), ["replica", "default", "replica"])
+        self.assertEqual(self.router.db_for_read(Article), "default")
+        self.assertEqual(self.router.db_for_write(Article), "default")
+
+    def test_writer_sticks_to_primary(self):
+        """Test a successful write pins only that user, until the window ends"""
+        other = User(pk=42, username="reader")
+        self.assertEqual(self.route("get", self.user), ["replica", "replica"])
+        self.route("post", self.user, 201)
+        self.assertEqual(self.route("get", self.user), ["replica", "default"])
+        self.assertEqual(self.route("get", other), ["replica", "replica"])
+
+        cache.clear()  # the sticky window expired
+        self.assertEqual(self.route("get", self.user), ["replica", "replica"])
+
+
+class PasswordHashingTestCase(APITestCase):
+    """Test the configurable hasher, login rehashing and the hashing pool"""
+
+    def test_registration_uses_preferred_hasher(self):
+        """Test new accounts get an Argon2id hash with the configured costs"""
+        response = self.client.post("/api/register/", {
+            "username": "hashed", "email": "hashed@example.com",
+            "password": "HashPass123"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        encoded = User.objects.get(username="hashed").password
+        self.assertTrue(encoded.startswith("argon2$argon2id$"))
+        self.assertIn("m=19456,t=2,p=1", encoded)
+
+    def test_login_upgrades_legacy_hash(self):
+        """Test a PBKDF2 hash is replaced by the preferred hasher on login"""
+        user = User.objects.create(
+            username="legacy", password=make_password("LegacyPass123", hasher="pbkdf2_sha256"))
+        response = self.client.post(
+            "/api/token/", {"username": "legacy", "password": "LegacyPass123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("argon2$"))
+        self.assertTrue(check_password("LegacyPass123", user.password))
+
+    @override_settings(BLOG_PASSWORD_HASH_CONCURRENCY=1)
+    def test_hash_concurrency_cap(self):
+        """Test capped hashing runs one hash at a time and yields verifiable hashes"""
+        make = make_password
+        running, peak, lock = 0, 0, threading.Lock()
+
+        def tracked(password):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            try:
+                return make(password)
+            finally:
+                with lock:
+                    running -= 1
+
+        encoded = []
+        with patch("django.contrib.auth.hashers.make_password", tracked):
+            threads = [threading.Thread(target=lambda: encoded.append(hash_password("CappedPass123")))
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(peak, 1)
+        self.assertEqual(len(encoded), 3)
+        self.assertTrue(all(check_password("CappedPass123", value) for value in encoded))
+
+    def test_benchmark_auth_command(self):
+        """Test the auth benchmark reports both scenarios and cleans up"""
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command("benchmark_auth", hasher=["argon2"], requests=2,
+                     output=path, stdout=StringIO())
+        with open(path) as handle:
+            report = json.load(handle)
+        self.assertEqual(report["hashers"]["argon2"]["register"]["status_codes"], {"201": 2})
+        self.assertEqual(report["hashers"]["argon2"]["login"]["status_codes"], {"200": 2})
+        self.assertFalse(User.objects.filter(username__startswith="authbench_").exists())
+
+
+class ViewerFlagsTestCase(APITestCase):
+    """Test per-viewer is_liked / is_favorited flags on article responses"""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username="flagger", password="FlagPass123")
+        self.other = User.objects.create_user(username="bystander", password="FlagPass123")
+        self.articles = [
+            Article.objects.create(title=f"Flagged {i}", content="Body", author=self.other)
+            for i in range(4)
+        ]
+        Article.add_engagement("likes", self.articles[0].id, self.viewer.id)
+        Article.add_engagement("favorited_by", self.articles[1].id, self.viewer.id)
+        Article.add_engagement("likes", self.articles[2].id, self.other.id)
+
+    def flags(self, response):
+        return {
+            article["title"]: (article["is_liked"], article["is_favorited"])
+            for article in response.data["results"]
+        }
+
+    def test_flags_reflect_the_viewer(self):
+        """Test each viewer sees their own flags and anonymous users none"""
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.flags(self.client.get("/api/articles/")), {
+            "Flagged 0": (True, False), "Flagged 1": (False, True),
+            "Flagged 2": (False, False), "Flagged 3": (False, False),
+        })
+        response = self.client.get(f"/api/articles/{self.articles[1].id}/")
+        self.assertEqual((response.data["is_liked"], response.data["is_favorited"]), (False, True))
+
+        self.client.force_authenticate(None)
+        flags = self.flags(self.client.get("/api/articles/"))
+        self.assertEqual(set(flags.values()), {(False, False)})
+
+    def test_one_query_per_relation_for_a_page(self):
+        """Test the flags cost two queries per page, none when not requested"""
+        self.client.force_authenticate(self.viewer)
+        with CaptureQueriesContext(connection) as full:
+            self.client.get("/api/articles/")
+        with CaptureQueriesContext(connection) as trimmed:
+            self.client.get("/api/articles/?omit=is_liked,is_favorited")
+        flag_queries = [query["sql"] for query in full.captured_queries
+                        if "blog_article_likes" in query["sql"]
+                        or "blog_article_favorited_by" in query["sql"]]
+        self.assertEqual(len(flag_queries), 2)
+        self.assertEqual(len(full.captured_queries) - len(trimmed.captured_queries), 2)
+
+    def test_etag_differs_per_viewer(self):
+        """Test a cached ETag is not reused across viewers with different flags"""
+        url = f"/api/articles/{self.articles[0].id}/"
+        self.client.force_authenticate(self.viewer)
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(self.other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["is_liked"])
+
+
+def image_upload(name, size, mode="RGB", format="JPEG", exif=None):
+    """An in-memory image upload drawn with Pillow"""
+    buffer = BytesIO()
+    image = Image.new(mode, size, (200, 40, 40, 128)[:len(mode)])
+    image.save(buffer, format, **({"exif": exif} if exif is not None else {}))
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{format.lower()}")
+
+
+@override_settings(BLOG_IMAGE_WORKERS=0)
+class ImageRenditionTestCase(APITestCase):
+    """Test thumbnail and avatar renditions"""
+
+    def setUp(self):
+        use_temporary_media(self)
+        cache.clear()
+        self.user = User.objects.create_user(username="painter", password="PaintPass123")
+        Profile.objects.create(user=self.user)
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+
+    def post_article(self, thumbnail):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/articles/", {
+                "title": "Pictured", "content": "Body", "thumbnail": thumbnail,
+            }, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["thumbnail"], {"status": "pending"})
+        return response.data["id"]
+
+    def test_thumbnail_renditions(self):
+        """Test an upload renders every size as JPEG and WebP without metadata"""
+        exif = Image.Exif()
+        exif[0x0110] = "Secret Camera"  # Model
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        article_id = self.post_article(image_upload("photo.jpg", (2000, 1000), exif=exif))
+
+        thumbnail = self.client.get(f"/api/articles/{article_id}/").data["thumbnail"]
+        self.assertEqual(thumbnail["status"], "ready")
+        renditions = thumbnail["renditions"]
+        self.assertEqual(
+            {name: (size["width"], size["height"]) for name, size in renditions.items()},
+            {"small": (160, 320), "medium": (320, 640), "large": (640, 1280)})
+        for kind, format in (("webp", "WEBP"), ("jpeg", "JPEG")):
+            url = renditions["medium"][kind]
+            self.assertTrue(url.startswith("http://testserver/media/renditions/"))
+            name = url.split("/media/", 1)[1]
+            with default_storage.open(name) as stored, Image.open(stored) as image:
+                self.assertEqual((image.format, image.size), (format, (320, 640)))
+                self.assertEqual(dict(image.getexif()), {})
+                self.assertNotIn("icc_profile", image.info)
+
+        # The same bytes reuse the content-addressed files.
+        other_id = self.post_article(image_upload("copy.jpg", (2000, 1000), exif=exif))
+        other = self.client.get(f"/api/articles/{other_id}/").data["thumbnail"]
+        self.assertEqual(other["renditions"], renditions)
+
+    def test_undecodable_upload_is_marked_failed(self):
+        """Test an upload that verifies but fails to render is kept but reported as failed"""
+        data = image_upload("photo.jpg", (300, 200)).read()
+        truncated = SimpleUploadedFile(
+            "truncated.jpg", data[:len(data) // 2], content_type="image/jpeg")
+        with self.assertLogs("blog.images", "WARNING"):
+            article_id = self.post_article(truncated)
+        response = self.client.get(f"/api/articles/{article_id}/")
+        self.assertEqual(response.data["thumbnail"], {"status": "failed"})
+
+    def test_rejects_other_file_types(self):
+        """Test uploads must carry an image extension and decode as an allowed format"""
+        for thumbnail in (SimpleUploadedFile("notes.txt", b"text"),
+                          SimpleUploadedFile("broken.jpg", b"not an image"),
+                          image_upload("photo.jpg", (64, 64), format="BMP")):
+            response = self.client.post("/api/articles/", {
+                "title": "Pictured", "content": "Body", "thumbnail": thumbnail,
+            }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("thumbnail", response.data)
+        self.assertFalse(Article.objects.exists())
+
+    @override_settings(BLOG_IMAGE_MAX_PIXELS=100 * 100)
+    def test_rejects_too_many_pixels(self):
+        """Test images past the pixel cap are refused before they are stored"""
+        response = self.client.post("/api/articles/", {
+            "title": "Pictured", "content": "Body",
+            "thumbnail": image_upload("huge.png", (101, 100), format="PNG"),
+        }, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pixels", str(response.data["thumbnail"]))
+
+    def test_avatar_renditions_flatten_transparency(self):
+        """Test avatars render too, with transparent PNGs flattened for JPEG"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put("/api/profile/", {
+                "avatar": image_upload("me.png", (300, 300), mode="RGBA", format="PNG"),
+            }, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        avatar = self.client.get("/api/profile/").data["profile"]["avatar"]
+        self.assertEqual(avatar["status"], "ready")
+        self.assertEqual((avatar["renditions"]["large"]["width"],
+                          avatar["renditions"]["large"]["height"]), (256, 256))
+        name = avatar["renditions"]["small"]["jpeg"].split("/media/", 1)[1]
+        with default_storage.open(name) as stored, Image.open(stored) as image:
+            self.assertEqual(image.mode, "RGB")
+            # Half-transparent (200, 40, 40) over white, give or take JPEG noise.
+            for channel, expected in zip(image.getpixel((32, 32)), (227, 147, 147)):
+                self.assertAlmostEqual(channel, expected, delta=6)
+
+    def test_stale_render_does_not_overwrite_a_newer_upload(self):
+        """Test a render finishing after the image was replaced is dropped"""
+        article_id = self.post_article(image_upload("first.jpg", (64, 64)))
+        images.finish(Article, article_id, "thumbnail", "thumbnails/old.jpg", None)
+        self.assertEqual(
+            Article.objects.get(pk=article_id).thumbnail_renditions["status"], "ready")
+
+    def test_render_on_process_pool(self):
+        """Test renders run on the process pool when workers are configured"""
+        data = image_upload("pool.png", (800, 400), format="PNG").read()
+        with override_settings(BLOG_IMAGE_WORKERS=1):
+            executor = images.get_executor()
+            self.addCleanup(setattr, images, "_executor", None)
+            self.addCleanup(executor.shutdown)
+            renditions = executor.submit(images.render, data, {"small": 100}, 80).result()
+        self.assertEqual((renditions["small"]["width"], renditions["small"]["height"]), (100, 50))
+        self.assertTrue(renditions["small"]["webp"].startswith(b"RIFF"))
+
+
+@override_settings(BLOG_IMAGE_WORKERS=0)
+class ChunkedUploadTestCase(APITestCase):
+    """Test chunked, resumable uploads"""
+
+    def setUp(self):
+        use_temporary_media(self)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        partials = override_settings(BLOG_UPLOAD_DIR=directory)
+        partials.enable()
+        self.addCleanup(partials.disable)
+        self.user = User.objects.create_user(username="uploader", password="UploadPass123")
+        self.article = Article.objects.create(title="Photo", content="Body", author=self.user)
+        self.client.force_authenticate(self.user)
+        self.data = image_upload("photo.jpg", (600, 300)).read()
+
+    def start(self, **extra):
+        response = self.client.post("/api/uploads/", {
+            "filename": "photo.jpg", "size": len(self.data), **extra})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["offset"], 0)
+        return response.data["id"]
+
+    def append(self, upload_id, offset, chunk):
+        return self.client.patch(
+            f"/api/uploads/{upload_id}/", chunk,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset))
+
+    def send(self, upload_id, pieces=3):
+        step = -(-len(self.data) // pieces)
+        for offset in range(0, len(self.data), step):
+            response = self.append(upload_id, offset, self.data[offset:offset + step])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Upload-Offset"], str(min(offset + step, len(self.data))))
+
+    def complete(self, upload_id, **target):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/uploads/{upload_id}/complete/", target)
+
+    def test_upload_resumes_and_attaches_thumbnail_without_copying(self):
+        """Test chunks resume from the acknowledged offset and the file is moved into place"""
+        upload_id = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        half = len(self.data) // 2
+        self.assertEqual(self.append(upload_id, 0, self.data[:half]).status_code, status.HTTP_200_OK)
+
+        # A retried or out-of-order chunk is refused with the offset to resume from.
+        response = self.append(upload_id, 0, self.data[:half])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload_id}/").data["offset"], half)
+        self.assertEqual(self.append(upload_id, half, self.data[half:]).status_code, status.HTTP_200_OK)
+
+        partial = os.path.join(settings.BLOG_UPLOAD_DIR, uuid.UUID(upload_id).hex)
+        inode = os.stat(partial).st_ino
+        response = self.complete(upload_id, target="thumbnail", article=self.article.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["thumbnail"], {"status": "pending"})
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.thumbnail_renditions["status"], "ready")
+        stored = default_storage.path(self.article.thumbnail.name)
+        self.assertEqual(os.stat(stored).st_ino, inode)
+        with open(stored, "rb") as handle:
+            self.assertEqual(handle.read(), self.data)
+        self.assertFalse(os.path.exists(partial))
+        self.assertFalse(Upload.objects.exists())
+
+    def test_losing_append_never_writes(self):
+        """Test a chunk refused after streaming in leaves the winner's bytes"""
+        upload_id = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        half = len(self.data) // 2
+        receive = uploads.receive
+
+        def race(upload, stream, length):
+            path = receive(upload, stream, length)
+            # Another request takes the same offset while this body streamed in.
+            with patch("blog.uploads.receive", receive):
+                self.assertEqual(
+                    self.append(upload_id, 0, self.data[:half]).status_code, status.HTTP_200_OK)
+            return path
+
+        with patch("blog.uploads.receive", race):
+            response = self.append(upload_id, 0, b"\0" * half)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response["Upload-Offset"], str(half))
+        self.assertEqual(self.append(upload_id, half, self.data[half:]).status_code, status.HTTP_200_OK)
+        self.assertEqual(os.listdir(settings.BLOG_UPLOAD_DIR), [uuid.UUID(upload_id).hex])
+        self.assertEqual(
+            self.complete(upload_id, target="avatar").status_code, status.HTTP_200_OK)
+
+    def test_checksum_survives_a_worker_switch(self):
+        """Test the digest is rebuilt from disk when another process took earlier chunks"""
+        upload_id = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        self.send(upload_id, pieces=2)
+        uploads._hashers.clear()
+        self.assertEqual(
+            self.complete(upload_id, target="avatar").status_code, status.HTTP_200_OK)
+        self.assertEqual(Profile.objects.get(user=self.user).avatar_renditions["status"], "ready")
+
+    def test_non_image_discards_upload(self):
+        """Test completing an upload whose bytes are not an image drops it"""
+        self.data = b"MZ" + b"\0" * 1000
+        upload_id = self.start()
+        self.send(upload_id)
+        response = self.complete(upload_id, target="avatar")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("avatar", response.data)
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(settings.BLOG_UPLOAD_DIR), [])
+
+    def test_checksum_mismatch_discards_upload(self):
+        """Test a digest that does not match the declared one drops the upload"""
+        upload_id = self.start(sha256="0" * 64)
+        self.send(upload_id)
+        response = self.complete(upload_id, target="avatar")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(settings.BLOG_UPLOAD_DIR), [])
+
+    def test_rejects_invalid_requests(self):
+        """Test size, ownership, completeness and target checks"""
+        self.assertEqual(self.client.post("/api/uploads/", {
+            "filename": "notes.txt", "size": 10}).status_code, status.HTTP_400_BAD_REQUEST)
+        upload_id = self.start()
+        self.assertEqual(self.append(upload_id, 0, self.data + b"extra").status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.complete(upload_id, target="avatar").status_code,
+                         status.HTTP_409_CONFLICT)
+        self.send(upload_id)
+        self.assertEqual(self.complete(upload_id, target="thumbnail").status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        other = User.objects.create_user(username="intruder", password="UploadPass123")
+        foreign = Article.objects.create(title="Theirs", content="Body", author=other)
+        self.assertEqual(self.complete(upload_id, target="thumbnail", article=foreign.id).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload_id}/").status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_purge_uploads(self):
+        """Test idle uploads and their partial files are purged"""
+        stale, fresh = self.start(), self.start()
+        Upload.objects.filter(pk=stale).update(updated_at=timezone.now() - timedelta(days=2))
+        call_command("purge_uploads", stdout=StringIO())
+        self.assertEqual([str(pk) for pk in Upload.objects.values_list("pk", flat=True)], [fresh])
+        self.assertEqual(os.listdir(settings.BLOG_UPLOAD_DIR), [uuid.UUID(fresh).hex])
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """Test FastJSONRenderer output matches JSONRenderer byte for byte"""
+
+    def test_matches_json_renderer(self):
+        """Test strings, escapes, datetimes and other encoder types render identically"""
+        data = {
+            "text": "quote \" backslash \\ tab \t nul \x00 del \x7f é 日本 🎉    ",
+            "numbers": [0, -1, 2 ** 63 - 1, True, False, None],
+            "utc": timezone.now(),
+            "naive": timezone.now().replace(tzinfo=None),
+            "day": timezone.now().date(),
+            "id": uuid.uuid4(),
+            "decimal": Decimal("1.50"),
+            "nested": [{"tags": ("a", "b")}, []],
+            "huge": 2 ** 70,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"))
+
+
+@override_settings(BLOG_RESPONSE_CACHE_ENABLED=False)
+class FastPathTestCase(APITestCase):
+    """Differential test: the fast list path must match the serializer path"""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(username="reader", password="ReadPass123")
+        writer = User.objects.create_user(
+            username="writer", email="wrîte@example.com", password="WritePass123")
+        Profile.objects.create(user=writer, bio="Bio with   separator and \"quotes\"")
+        Profile.objects.filter(user=writer).update(avatar="avatars/me.png", avatar_renditions={
+            "status": "ready", "source": "avatars/me.png", "sizes": {"small": {
+                "width": 64, "height": 64,
+                "webp": "renditions/ab/ab.webp", "jpeg": "renditions/ab/ab.jpg"}}})
+        # No profile row at all: the nested "profile" renders as null.
+        loner = User.objects.create_user(username="loner", password="LonePass123")
+
+        for i in range(7):
+            article = Article.objects.create(
+                title=f"Fast {i} 日本", content=f"Body {i}\n\ttabbed \U0001f389",
+                author=writer if i % 2 else loner, tags=["python", f"täg {i}"])
+            if i % 3 == 0:
+                Article.objects.filter(pk=article.pk).update(
+                    thumbnail=f"thumbnails/{i}.jpg",
+                    thumbnail_renditions={"status": "ready", "source": f"thumbnails/{i}.jpg", "sizes": {
+                        "small": {"width": 320, "height": 180,
+                                  "webp": f"renditions/{i}.webp", "jpeg": f"renditions/{i}.jpg"}}})
+            elif i % 3 == 1:
+                Article.objects.filter(pk=article.pk).update(
+                    thumbnail=f"thumbnails/{i}.jpg",
+                    thumbnail_renditions={"status": "pending", "source": f"thumbnails/{i}.jpg"})
+            if i % 2 == 0:
+                Article.add_engagement("likes", article.id, self.viewer.id)
+            if i % 4 == 0:
+                Article.add_engagement("favorited_by", article.id, self.viewer.id)
+            Comment.objects.create(article=article, user=loner, content="Hi")
+
+    def get(self, url, fast, **headers):
+        with override_settings(BLOG_FAST_JSON=fast):
+            if not fast:
+                return self.client.get(url, **headers)
+            # The fast path must not fall back to the serializers.
+            with patch.object(ArticleSerializer, "to_representation",
+                              side_effect=AssertionError("serializer path used")):
+                return self.client.get(url, **headers)
+
+    def assertSameResponses(self, url, **headers):
+        slow, fast = self.get(url, False, **headers), self.get(url, True, **headers)
+        self.assertEqual(slow.status_code, status.HTTP_200_OK, url)
+        self.assertEqual(fast.status_code, slow.status_code, url)
+        self.assertEqual(fast.content, slow.content, url)
+        for header in ("ETag", "Content-Type"):
+            self.assertEqual(fast.get(header), slow.get(header), f"{header} of {url}")
+        return slow
+
+    def test_fast_path_matches_serializers(self):
+        """Test bodies and validators are identical across fieldsets, feeds and viewers"""
+        urls = [
+            "/api/articles/", "/api/articles/?mode=summary",
+            "/api/articles/?fields=id,title,author", "/api/articles/?omit=author,content",
+            "/api/articles/?fields=id,thumbnail,is_liked", "/api/articles/?mode=summary&omit=author",
+            "/api/articles/?tags_any=python&page_size=3",
+            "/api/articles/trending/", "/api/articles/top/?fields=id,total_likes",
+            "/api/async/articles/", "/api/async/articles/?mode=summary&page_size=3",
+        ]
+        for viewer in (None, self.viewer):
+            self.client.force_authenticate(viewer)
+            for url in urls:
+                self.assertSameResponses(url)
+            if viewer is not None:
+                self.assertSameResponses("/api/articles/favorites/")
+                self.assertSameResponses("/api/async/articles/favorites/")
+
+        # Later pages, reached through the cursor links.
+        for url in ("/api/articles/?page_size=2", "/api/async/articles/?page_size=2"):
+            while url:
+                url = json.loads(self.assertSameResponses(url).content)["next"]
+
+    def test_fast_path_answers_conditional_requests(self):
+        """Test an ETag from the serializer path gets a 304 from the fast path"""
+        etag = self.get("/api/articles/", False)["ETag"]
+        response = self.get("/api/articles/", True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unsupported_requests_use_serializers(self):
+        """Test indented JSON and the browsable API still render through the serializers"""
+        for url, headers in (
+            ("/api/articles/", {"HTTP_ACCEPT": "application/json; indent=2"}),
+            ("/api/articles/", {"HTTP_ACCEPT": "text/html"}),
+        ):
+            with override_settings(BLOG_FAST_JSON=True):
+                fast = self.client.get(url, **headers)
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            if "indent" in headers["HTTP_ACCEPT"]:
+                self.assertEqual(fast.content, self.get(url, False, **headers).content)
+
+
+@override_settings(BLOG_ACCOUNT_DELETION_WORKERS=0, BLOG_ACCOUNT_DELETION_BATCH=2)
+class AccountDeletionTestCase(APITestCase):
+    """Test background, batched account deletion"""
+
+    def setUp(self):
+        use_temporary_media(self)
+        self.user = User.objects.create_user(username="leaving", password="LeavingPass123")
+        self.other = User.objects.create_user(username="staying", password="StayingPass123")
+        Profile.objects.create(user=self.user, bio="Bye")
+        self.theirs = [
+            Article.objects.create(title=f"Theirs {n}", content="Body", author=self.other)
+            for n in range(3)]
+        self.mine = [Article.objects.create(title=f"Mine {n}", content="Body", author=self.user)
+                     for n in range(5)]
+        for article in self.theirs:
+            Article.add_engagement("likes", article.pk, self.user.pk)
+            Article.add_engagement("favorited_by", article.pk, self.user.pk)
+            Comment.objects.create(article=article, user=self.user, content="Mine")
+            Comment.objects.create(article=article, user=self.other, content="Theirs")
+        for article in self.mine:
+            Article.add_engagement("likes", article.pk, self.other.pk)
+            Comment.objects.create(article=article, user=self.other, content="Theirs")
+        self.client.force_authenticate(self.user)
+
+    def assertReleased(self):
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Profile.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(Article.objects.filter(author_id=self.user.pk).exists())
+        self.assertFalse(Comment.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(Comment.objects.count(), 3)
+        for article in self.theirs:
+            article.refresh_from_db()
+            self.assertEqual(
+                (article.like_count, article.favorite_count, article.comment_count), (0, 0, 1))
+
+    def test_delete_returns_202_and_deletes_in_batches(self):
+        """Test DELETE deactivates the user, then the job removes everything"""
+        cache.clear()
+        self.client.get(f"/api/articles/{self.theirs[0].pk}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete("/api/profile/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        location = response["Location"]
+        self.assertIn(f"/api/account-deletions/{response.data['id']}:", location)
+        self.assertReleased()
+
+        self.client.force_authenticate(None)
+        # The bare or re-signed job id is not enough to read the status.
+        job_id = response.data["id"]
+        for guess in (job_id, f"{job_id}:forged"):
+            self.assertEqual(self.client.get(f"/api/account-deletions/{guess}/").status_code,
+                             status.HTTP_404_NOT_FOUND)
+        response = self.client.get(location)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], AccountDeletion.DONE)
+        self.assertEqual(response.data["progress"], {
+            "likes": 3, "favorites": 3, "comments": 8, "articles": 5})
+        self.assertIsNotNone(response.data["finished_at"])
+        # Cached responses of engaged articles were invalidated.
+        response = self.client.get(f"/api/articles/{self.theirs[0].pk}/")
+        self.assertEqual(response.data["total_likes"], 0)
+
+    def test_deactivated_until_the_job_runs(self):
+        """Test the account is inactive at once and resume finishes pending jobs"""
+        response = self.client.delete("/api/profile/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], AccountDeletion.PENDING)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            "/api/token/", {"username": "leaving", "password": "LeavingPass123"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        out = StringIO()
+        call_command("resume_account_deletions", stdout=out)
+        self.assertIn("Finished 1 account deletion(s), 0 failed", out.getvalue())
+        self.assertReleased()
+
+    def test_failed_job_resumes(self):
+        """Test a job that fails midway is marked failed and finishes on resume"""
+        with patch("blog.deletion._delete_articles", side_effect=RuntimeError("boom")), \
+                self.assertLogs("blog.deletion", "ERROR"), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete("/api/profile/")
+        job = AccountDeletion.objects.get(pk=response.data["id"])
+        self.assertEqual(job.status, AccountDeletion.FAILED)
+        self.assertEqual(job.progress["likes"], 3)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+        # A running job is left alone until it stops advancing.
+        AccountDeletion.objects.filter(pk=job.pk).update(status=AccountDeletion.RUNNING)
+        self.assertFalse(deletion.run(job.pk))
+        call_command("resume_account_deletions", "--minutes=0", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, AccountDeletion.DONE)
+        self.assertEqual(job.progress["articles"], 5)
+        self.assertReleased()
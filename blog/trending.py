@@ -0,0 +1,114 @@
+"""Time-decayed engagement score behind the trending feed.
+
+An event of weight ``w`` at time ``t`` is worth ``w * exp(-(now - t) / tau)``.
+Every article decays by the same factor, so ranking by the undecayed sum
+``Σ w * exp((t - EPOCH) / tau)`` gives the same order at any moment. The
+column stores the natural log of that sum, which grows linearly with time
+and never overflows. New events fold in with a log-add-exp in the same
+UPDATE that bumps the like/favorite counters, so the feed is an index
+range read on ``Article.trend_score`` and rows are never rewritten just
+because time passed. ``compact_trending`` clears scores that have decayed
+to noise so the partial index only holds live articles.
+
+Removals (unlikes, unfavorites, deleted comments) are not subtracted. The
+event they cancel was folded in at its own, earlier time, which likes and
+favorites do not record, and taking one out at today's weight would
+overshoot and wipe the article's remaining contributions. A removed event
+keeps counting until ``compact_trending --rebuild`` recomputes the scores
+from what is left, so schedule the rebuild as well as the compaction.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _tau():
+    return settings.BLOG_TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def decay_exponent(at=None):
+    """log-space value of a weight-1 event at time at (default now)"""
+    return ((at or timezone.now()) - EPOCH).total_seconds() / _tau()
+
+
+def weight(kind):
+    """Score weight of one 'likes', 'favorited_by' or 'comments' event"""
+    return settings.BLOG_TRENDING_WEIGHTS.get(kind, 0)
+
+
+def score_expression(amount, at=None, field='trend_score'):
+    """UPDATE expression adding a positive amount worth of events"""
+    if amount <= 0:
+        raise ValueError("Removals are left to rebuild(); amount must be positive")
+    current = F(field)
+    event = Value(math.log(amount) + decay_exponent(at), output_field=FloatField())
+    return Case(
+        When(**{f'{field}__isnull': True}, then=event),
+        default=Greatest(current, event) + Ln(Value(1.0) + Exp(-Abs(current - event))),
+        output_field=FloatField())
+
+
+def decayed(score, at=None):
+    """Current value of a stored log-space score"""
+    return 0.0 if score is None else math.exp(score - decay_exponent(at))
+
+
+def compact(min_score=None, at=None):
+    """Drop scores that decayed below min_score; return how many were cleared"""
+    from .models import Article
+    if min_score is None:
+        min_score = settings.BLOG_TRENDING_MIN_SCORE
+    floor = decay_exponent(at) + math.log(min_score)
+    return Article.objects.filter(trend_score__lt=floor).update(trend_score=None)
+
+
+def rebuild(batch_size=500):
+    """Recompute every score from comments and the counters.
+
+    Comments carry their timestamps; likes and favorites do not, so they
+    are counted at the article's creation time. Returns articles scored.
+    """
+    from .models import Article, Comment
+    scored = 0
+    queryset = Article.objects.only(
+        'pk', 'created_at', 'like_count', 'favorite_count', 'trend_score').order_by('pk')
+    batch = []
+    for article in queryset.iterator(chunk_size=batch_size):
+        batch.append(article)
+        if len(batch) == batch_size:
+            scored += _rebuild_batch(batch, Article, Comment)
+            batch = []
+    if batch:
+        scored += _rebuild_batch(batch, Article, Comment)
+    return scored
+
+
+def _rebuild_batch(articles, Article, Comment):
+    events = defaultdict(list)
+    for article in articles:
+        created = decay_exponent(article.created_at)
+        for kind, count in (('likes', article.like_count),
+                            ('favorited_by', article.favorite_count)):
+            if count and weight(kind):
+                events[article.pk].append(math.log(weight(kind) * count) + created)
+    if weight('comments'):
+        comments = Comment.objects.filter(
+            article_id__in=[article.pk for article in articles]
+        ).values_list('article_id', 'created_at')
+        for article_id, created_at in comments.iterator():
+            events[article_id].append(math.log(weight('comments')) + decay_exponent(created_at))
+    for article in articles:
+        values = events.get(article.pk)
+        if values:
+            top = max(values)
+            article.trend_score = top + math.log(sum(math.exp(v - top) for v in values))
+        else:
+            article.trend_score = None
+    Article.objects.bulk_update(articles, ['trend_score'])
+    return sum(1 for article in articles if article.trend_score is not None)
@@ -0,0 +1,167 @@
+"""Chunked, resumable uploads that stream to disk.
+
+A client creates an upload with the file's name and size (POST
+/api/uploads/), sends the bytes in order as PATCH bodies carrying an
+``Upload-Offset`` header, and attaches the finished file to an article
+thumbnail or its avatar (POST /api/uploads/<id>/complete/). After a dropped
+connection it reads the acknowledged offset (GET) and resumes from there.
+
+Chunk bodies are copied from the request stream into a chunk file of their
+own under ``BLOG_UPLOAD_DIR`` 64 KiB at a time, so no worker ever holds a
+whole chunk in memory. Only then does the view lock the Upload row, re-check
+the offset and splice the chunk into the partial file, updating a SHA-256 as
+it goes; of two requests racing for one offset, the loser never writes to
+the partial file. The running digest only lives in
+the process that took the previous chunk; an append landing on another
+worker re-reads the acknowledged bytes once to rebuild it. On completion the
+partial file goes to the media storage as a temporary uploaded file, which
+FileSystemStorage renames into place rather than copying (put
+``BLOG_UPLOAD_DIR`` on MEDIA_ROOT's filesystem).
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+PIECE_SIZE = 64 * 1024
+HASHERS_KEPT = 256
+
+_hashers = OrderedDict()  # upload pk -> (offset, sha256 of the first offset bytes)
+_hashers_lock = threading.Lock()
+
+
+class IncompleteChunk(Exception):
+    """The request body ended before its declared length"""
+
+
+class PartialFile(UploadedFile):
+    """A finished partial file; storages move it instead of copying it"""
+
+    def __init__(self, path, name, size):
+        super().__init__(open(path, 'rb'), name=name, size=size)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # Already moved into storage.
+            pass
+
+
+def partial_path(upload):
+    return os.path.join(settings.BLOG_UPLOAD_DIR, upload.pk.hex)
+
+
+def create_partial(upload):
+    """Create the empty partial file for a new upload"""
+    os.makedirs(settings.BLOG_UPLOAD_DIR, exist_ok=True)
+    open(partial_path(upload), 'xb').close()
+
+
+def receive(upload, stream, length):
+    """Copy length bytes of stream into a new chunk file; return its path.
+
+    Raises IncompleteChunk if the stream ends early. Remove the file with
+    discard_chunk() once it is spliced in or refused.
+    """
+    fd, path = tempfile.mkstemp(
+        dir=settings.BLOG_UPLOAD_DIR, prefix=f'{upload.pk.hex}.', suffix='.chunk')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            remaining = length
+            while remaining:
+                piece = stream.read(min(PIECE_SIZE, remaining))
+                if not piece:
+                    raise IncompleteChunk(
+                        f"Body ended {remaining} bytes short of Content-Length")
+                handle.write(piece)
+                remaining -= len(piece)
+    except BaseException:
+        discard_chunk(path)
+        raise
+    return path
+
+
+def append(upload, chunk_path):
+    """Splice a received chunk in at upload.offset; hold the Upload row lock.
+
+    Returns (new offset, digest state); pass both to acknowledge() once the
+    new offset is committed.
+    """
+    hasher = _take_hasher(upload)
+    offset = upload.offset
+    with open(chunk_path, 'rb') as chunk, open(partial_path(upload), 'r+b') as handle:
+        handle.seek(offset)
+        while piece := chunk.read(PIECE_SIZE):
+            handle.write(piece)
+            hasher.update(piece)
+            offset += len(piece)
+    return offset, hasher
+
+
+def discard_chunk(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def acknowledge(upload, offset, hasher):
+    """Keep the digest of the first offset bytes for the next append"""
+    with _hashers_lock:
+        _hashers[upload.pk] = (offset, hasher)
+        _hashers.move_to_end(upload.pk)
+        while len(_hashers) > HASHERS_KEPT:
+            _hashers.popitem(last=False)
+
+
+def checksum(upload):
+    """Hex SHA-256 of the acknowledged bytes"""
+    return _take_hasher(upload).hexdigest()
+
+
+def finished_file(upload):
+    """The complete upload as a file storages move into place"""
+    path = partial_path(upload)
+    # Drop bytes an interrupted append wrote past the acknowledged end.
+    os.truncate(path, upload.size)
+    return PartialFile(path, upload.filename, upload.size)
+
+
+def discard(upload):
+    """Remove the partial file and cached digest of a deleted upload"""
+    with _hashers_lock:
+        _hashers.pop(upload.pk, None)
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def _take_hasher(upload):
+    """The digest state at upload.offset, removed from the cache.
+
+    Taken rather than read so a failed append never leaves a digest that
+    covers unacknowledged bytes.
+    """
+    with _hashers_lock:
+        cached = _hashers.pop(upload.pk, None)
+    if cached is not None and cached[0] == upload.offset:
+        return cached[1]
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(partial_path(upload), 'rb') as handle:
+        while remaining:
+            piece = handle.read(min(PIECE_SIZE, remaining))
+            if not piece:
+                break
+            hasher.update(piece)
+            remaining -= len(piece)
+    return hasher
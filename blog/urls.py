@@ -1,10 +1,16 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .async_views import (
+    AsyncArticleDetailView, AsyncArticleListView, AsyncCommentDetailView,
+    AsyncCommentListView, AsyncFavoriteArticlesView
+)
 from .views import (
-    ArticleListCreateView, ArticleDetailView,
-    CommentListCreateView, CommentDetailView,
-    RegisterView, ProfileView, like_article,
-    toggle_favorite, FavoriteArticlesView
+    ArticleListCreateView, ArticleDetailView, ArticleBulkCreateView,
+    TrendingArticlesView, TopArticlesView,
+    CommentListCreateView, CommentDetailView, CommentBulkCreateView,
+    RegisterView, TokenRevokeView, ProfileView, AccountDeletionView,
+    like_article, toggle_favorite, FavoriteArticlesView, ArticleExportView,
+    ProfilingReportView, UploadCreateView, UploadDetailView, UploadCompleteView
 )
 
 urlpatterns = [
@@ -12,12 +18,26 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
 
     # ✅ User Profile Management
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('account-deletions/<str:token>/', AccountDeletionView.as_view(),
+         name='account-deletion'),
+
+    # ✅ Chunked Media Uploads
+    path('uploads/', UploadCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', UploadDetailView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:pk>/complete/', UploadCompleteView.as_view(),
+         name='upload-complete'),
 
     # ✅ Article Management
     path('articles/', ArticleListCreateView.as_view(), name='article-list'),
+    path('articles/bulk/', ArticleBulkCreateView.as_view(),
+         name='article-bulk-create'),
+    path('articles/trending/', TrendingArticlesView.as_view(),
+         name='article-trending'),
+    path('articles/top/', TopArticlesView.as_view(), name='article-top'),
     path('articles/<int:pk>/', ArticleDetailView.as_view(), name='article-detail'),
     path('articles/<int:article_id>/like/', like_article, name='like-article'),
 
@@ -31,4 +51,26 @@ urlpatterns = [
     path('articles/<int:article_id>/comments/',
          CommentListCreateView.as_view(), name='comment-list'),
     path('comments/<int:pk>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/bulk/', CommentBulkCreateView.as_view(),
+         name='comment-bulk-create'),
+
+    # ✅ Async Read Endpoints (same responses, served natively under ASGI)
+    path('async/articles/', AsyncArticleListView.as_view(),
+         name='async-article-list'),
+    path('async/articles/<int:pk>/', AsyncArticleDetailView.as_view(),
+         name='async-article-detail'),
+    path('async/articles/favorites/', AsyncFavoriteArticlesView.as_view(),
+         name='async-favorite-articles'),
+    path('async/articles/<int:article_id>/comments/',
+         AsyncCommentListView.as_view(), name='async-comment-list'),
+    path('async/comments/<int:pk>/', AsyncCommentDetailView.as_view(),
+         name='async-comment-detail'),
+
+    # ✅ Data Export (admin only)
+    path('export/articles/', ArticleExportView.as_view(),
+         name='article-export'),
+
+    # ✅ Performance Reporting (admin only)
+    path('admin/profiling/', ProfilingReportView.as_view(),
+         name='profiling-report'),
 ]
@@ -1,24 +1,112 @@
+import datetime
+from abc import ABCMeta, abstractmethod
+from collections import Counter
 from rest_framework import generics, permissions, status, filters, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.urls import reverse
 from django.db.utils import IntegrityError
-from .models import Article, Comment, Profile
-from .serializers import ArticleSerializer, CommentSerializer, UserSerializer, ProfileSerializer
+from .authentication import resolve_user, revoke_token
+from .cache import (
+    CachedArticleDetailMixin, CachedArticleListMixin, cache_stats, schedule_invalidation
+)
+from .fastpath import FastArticleListMixin
+from .export import FORMATS, encode_rows, export_rows, new_watermark
+from .conditional import ConditionalArticleDetailMixin
+from .models import (
+    AccountDeletion, Article, ArticleTag, Comment, Profile, Upload, normalize_tag
+)
+from .pool import pool_stats
+from .profiling import build_report
+from .search import get_search_backend
+from .serializers import (
+    AccountDeletionSerializer, ArticleSerializer, ArticleSummarySerializer,
+    BulkCommentSerializer, CommentSerializer, UserSerializer, ProfileSerializer,
+    UploadCompleteSerializer, UploadSerializer, validate_items
+)
+from . import deletion, uploads
+
+
+class FullTextSearchFilter(filters.BaseFilterBackend):
+    """Ranked full-text search over title, tags and content via blog.search"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search; results are ranked and carry a highlighted snippet.',
+            'schema': {'type': 'string'},
+        }]
 
 
 class CustomTagSearchFilter(filters.BaseFilterBackend):
-    """Custom filter to enable searching by tags in JSONField"""
+    """Custom filter to match articles against the normalized tag index.
+
+    ``tag`` matches one tag exactly, ``tags_any`` matches articles carrying
+    at least one of a comma separated list, ``tags_all`` all of them.
+    """
+
+    @staticmethod
+    def _tag_names(value):
+        return {normalize_tag(name) for name in value.split(',') if name.strip()}
+
+    @staticmethod
+    def _has_tags(names):
+        return Exists(ArticleTag.objects.filter(
+            article_id=OuterRef('pk'), tag__name__in=names))
 
     def filter_queryset(self, request, queryset, view):
-        search_query = request.query_params.get('search', None)
-        if search_query:
-            queryset = queryset.filter(tags__icontains=search_query)
+        params = request.query_params
+        if params.get('tag', '').strip():
+            queryset = queryset.filter(
+                self._has_tags([normalize_tag(params['tag'])]))
+
+        any_of = self._tag_names(params.get('tags_any', ''))
+        if any_of:
+            queryset = queryset.filter(self._has_tags(any_of))
+
+        for name in self._tag_names(params.get('tags_all', '')):
+            queryset = queryset.filter(self._has_tags([name]))
         return queryset
 
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': 'string'},
+            }
+            for name, description in (
+                ('tag', 'Exact tag (case-insensitive).'),
+                ('tags_any', 'Comma separated tags; match any of them.'),
+                ('tags_all', 'Comma separated tags; match all of them.'),
+            )
+        ]
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """Permission class to allow only the article owner to edit or delete"""
@@ -26,34 +114,91 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.author == request.user
+        return obj.author_id == request.user.pk
 
 
 class IsCommentOwnerOrReadOnly(permissions.BasePermission):
     """Permission class to allow only the comment owner to delete"""
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        return obj.user_id == request.user.pk
+
 
+class ArticleFieldsetMixin:
+    """Choose the article representation and load only the columns it renders.
 
-class ArticleListCreateView(generics.ListCreateAPIView):
+    ``?mode=summary`` swaps in ArticleSummarySerializer (stored excerpt, slim
+    author); ``?fields=`` / ``?omit=`` trim either one. Large columns that
+    will not be rendered are deferred, and the author/profile join is
+    dropped when the author block is not requested.
+    """
+    summary_mode = 'summary'
+
+    def is_summary(self):
+        return (self.request.method in permissions.SAFE_METHODS
+                and self.request.query_params.get('mode') == self.summary_mode)
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return ArticleSummarySerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset().defer('search_vector')
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        fields = self.get_serializer_class().fields_for_request(self.request)
+        deferred = [name for name in ('content', 'excerpt') if name not in fields]
+        if 'thumbnail' not in fields:
+            deferred += ['thumbnail', 'thumbnail_renditions']
+        if 'author' not in fields:
+            queryset = queryset.select_related(None)
+        elif self.is_summary():
+            queryset = queryset.select_related(None).select_related('author')
+        return queryset.defer(*deferred)
+
+
+class ArticleListCreateView(ArticleFieldsetMixin, CachedArticleListMixin,
+                            FastArticleListMixin, generics.ListCreateAPIView):
     """View to list all articles and create a new article"""
-    queryset = Article.objects.all()
+    queryset = Article.objects.select_related('author__profile')
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend,
-                       filters.SearchFilter, CustomTagSearchFilter]
+                       FullTextSearchFilter, CustomTagSearchFilter]
     filterset_fields = ['title', 'content']
-    search_fields = ['title', 'content']
 
     def perform_create(self, serializer):
         """Associate the article with the logged-in user"""
-        serializer.save(author=self.request.user)
+        article = serializer.save(author=resolve_user(self.request.user))
+        # Nobody has liked or favorited it yet; skip the flag queries.
+        article.is_liked = article.is_favorited = False
+
 
+class TrendingArticlesView(ArticleFieldsetMixin, CachedArticleListMixin,
+                           FastArticleListMixin, generics.ListAPIView):
+    """View to list articles by time-decayed likes, favorites and comments"""
+    queryset = Article.objects.select_related('author__profile').filter(
+        trend_score__isnull=False).order_by('-trend_score', '-id')
+    serializer_class = ArticleSerializer
+    filter_backends = [CustomTagSearchFilter]
+    ranked_by_counters = True
+
+
+class TopArticlesView(ArticleFieldsetMixin, CachedArticleListMixin,
+                      FastArticleListMixin, generics.ListAPIView):
+    """View to list the most liked articles of all time"""
+    queryset = Article.objects.select_related('author__profile').filter(
+        like_count__gt=0).order_by('-like_count', '-id')
+    serializer_class = ArticleSerializer
+    filter_backends = [CustomTagSearchFilter]
+    ranked_by_counters = True
 
-class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class ArticleDetailView(ArticleFieldsetMixin, CachedArticleDetailMixin,
+                        ConditionalArticleDetailMixin, generics.RetrieveUpdateDestroyAPIView):
     """View to retrieve, update, and delete a specific article"""
-    queryset = Article.objects.all()
+    queryset = Article.objects.select_related('author__profile')
     serializer_class = ArticleSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -66,7 +211,13 @@ class CommentListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         """Return comments related to a specific article"""
         article_id = self.kwargs.get('article_id')
-        return Comment.objects.filter(article_id=article_id)
+        queryset = Comment.objects.filter(article_id=article_id)
+        fields = CommentSerializer.fields_for_request(self.request)
+        if 'user' in fields:
+            queryset = queryset.select_related('user__profile')
+        if 'content' not in fields:
+            queryset = queryset.defer('content')
+        return queryset
 
     def perform_create(self, serializer):
         """Automatically associate comment with article from URL"""
@@ -78,17 +229,133 @@ class CommentListCreateView(generics.ListCreateAPIView):
 
         try:
             article = Article.objects.get(pk=article_id)
-            serializer.save(user=self.request.user, article=article)
+            serializer.save(user=resolve_user(self.request.user), article=article)
         except Article.DoesNotExist:
             raise serializers.ValidationError({"error": "Article not found"})
 
 
 class CommentDetailView(generics.RetrieveDestroyAPIView):
     """View to retrieve and delete a specific comment"""
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('user__profile')
     serializer_class = CommentSerializer
     permission_classes = [IsCommentOwnerOrReadOnly]
 
+    def perform_destroy(self, instance):
+        """Delete the comment, decrement its article's count and drop cached copies"""
+        article_id = instance.article_id
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            # A concurrent delete of the same comment must not count twice.
+            if deleted:
+                Article.adjust_comment_counts({article_id: -1})
+        schedule_invalidation([article_id], counters_only=True)
+
+
+class BulkCreateView(APIView, metaclass=ABCMeta):
+    """Create many objects from a JSON list in one validation pass and one insert.
+
+    Every item gets a result entry: 201 with the created object or 400 with
+    its errors. Valid items are created unless ``?atomic=true`` is passed,
+    in which case any invalid item aborts the whole batch.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = None
+    output_serializer_class = None
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+    def validate(self, items):
+        """Return a (validated_data, errors) pair per item"""
+        return validate_items(
+            self.serializer_class(context=self.get_serializer_context()), items)
+
+    @abstractmethod
+    def perform_bulk_create(self, user, validated):
+        """Insert the validated items for user; return the created objects"""
+
+    def post(self, request):
+        """Validate and insert a batch, returning per-item results"""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of items"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BLOG_BULK_MAX_ITEMS:
+            return Response({"error": f"At most {settings.BLOG_BULK_MAX_ITEMS} items per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = self.validate(items)
+        failed = sum(1 for _, errors in outcomes if errors is not None)
+        atomic = request.query_params.get('atomic', '').lower() in ('1', 'true')
+        created = []
+        if not (failed and atomic) and failed < len(items):
+            # One author row (with profile) shared by every created object.
+            user = User.objects.select_related('profile').get(pk=request.user.pk)
+            created = self.perform_bulk_create(
+                user,
+                [data for data, errors in outcomes if errors is None])
+        output = iter(self.output_serializer_class(
+            created, many=True, context=self.get_serializer_context()).data)
+
+        results = []
+        for index, (data, errors) in enumerate(outcomes):
+            if errors is not None:
+                results.append({"index": index, "status": status.HTTP_400_BAD_REQUEST, "errors": errors})
+            elif created:
+                results.append({"index": index, "status": status.HTTP_201_CREATED, "data": next(output)})
+            else:
+                results.append({"index": index, "status": status.HTTP_424_FAILED_DEPENDENCY})
+        if not created:
+            code = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_201_CREATED
+        return Response({"created": len(created), "failed": failed, "results": results}, status=code)
+
+
+class ArticleBulkCreateView(BulkCreateView):
+    """API endpoint to create a batch of articles for the logged-in user"""
+    serializer_class = ArticleSerializer
+    output_serializer_class = ArticleSerializer
+
+    def perform_bulk_create(self, user, validated):
+        """Insert the articles with their excerpts, tag links and search entries"""
+        articles = Article.bulk_insert([
+            Article(author=user, **data) for data in validated])
+        for article in articles:
+            article.is_liked = article.is_favorited = False
+        schedule_invalidation([article.pk for article in articles])
+        return articles
+
+
+class CommentBulkCreateView(BulkCreateView):
+    """API endpoint to create a batch of comments, possibly across articles"""
+    serializer_class = BulkCommentSerializer
+    output_serializer_class = CommentSerializer
+
+    def validate(self, items):
+        """Check every referenced article with a single query"""
+        outcomes = super().validate(items)
+        wanted = {data['article'] for data, errors in outcomes if errors is None}
+        existing = set(Article.objects.filter(
+            pk__in=wanted).values_list('pk', flat=True))
+        return [
+            (data, errors) if errors is not None or data['article'] in existing
+            else (None, {"article": [f'Invalid pk "{data["article"]}" - object does not exist.']})
+            for data, errors in outcomes
+        ]
+
+    def perform_bulk_create(self, user, validated):
+        """Insert the comments in one statement per batch and bump their counts"""
+        with transaction.atomic():
+            comments = Comment.objects.bulk_create([
+                Comment(article_id=data['article'], user=user, content=data['content'])
+                for data in validated])
+            Article.adjust_comment_counts(
+                Counter(comment.article_id for comment in comments))
+        schedule_invalidation(
+            {comment.article_id for comment in comments}, counters_only=True)
+        return comments
+
 
 class RegisterView(generics.CreateAPIView):
     """API endpoint for user registration"""
@@ -111,20 +378,38 @@ class RegisterView(generics.CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRevokeView(APIView):
+    """API endpoint to revoke the presented access token (and optionally a refresh token)"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Denylist the current access token and the posted refresh token"""
+        revoke_token(request.auth)
+        raw_refresh = request.data.get('refresh')
+        if raw_refresh:
+            try:
+                refresh = RefreshToken(raw_refresh)
+            except TokenError:
+                return Response({"error": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
+            if refresh.get(jwt_settings.USER_ID_CLAIM) != request.user.pk:
+                return Response({"error": "Refresh token belongs to another user"}, status=status.HTTP_400_BAD_REQUEST)
+            revoke_token(refresh)
+        return Response({"message": "Token revoked"}, status=status.HTTP_200_OK)
+
+
 class ProfileView(APIView):
     """API endpoint for retrieving, updating, and deleting the authenticated user's profile"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """Return the authenticated user's data"""
-        user = request.user
+        user = resolve_user(request.user)
         serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
         """Update the authenticated user's profile"""
-        user = request.user
-        profile, _ = Profile.objects.get_or_create(user=user)
+        profile, _ = Profile.objects.get_or_create(user_id=request.user.pk)
         serializer = ProfileSerializer(
             profile, data=request.data, partial=True)
 
@@ -134,49 +419,240 @@ class ProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request):
-        """Delete the authenticated user's account"""
-        user = request.user
-        user.delete()
-        return Response({"message": "User deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+        """Deactivate the account now and delete its data in the background"""
+        job = deletion.schedule(resolve_user(request.user))
+        location = request.build_absolute_uri(
+            reverse('account-deletion', args=[deletion.status_token(job)]))
+        return Response(
+            {"message": "Account deletion scheduled", **AccountDeletionSerializer(job).data},
+            status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+class AccountDeletionView(generics.RetrieveAPIView):
+    """API endpoint reporting the progress of a background account deletion.
+
+    The deleted user's tokens are revoked, so the signed job id from the 202
+    response's Location is the only credential.
+    """
+    queryset = AccountDeletion.objects.all()
+    serializer_class = AccountDeletionSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get_object(self):
+        job_id = deletion.job_id_from_token(self.kwargs['token'])
+        if job_id is None:
+            raise Http404
+        return get_object_or_404(self.get_queryset(), pk=job_id)
+
+
+class UploadCreateView(APIView):
+    """API endpoint to start a chunked, resumable upload"""
+    permission_classes = [IsAuthenticated]
 
+    def post(self, request):
+        """Create the upload; send its bytes with PATCH /api/uploads/<id>/"""
+        serializer = UploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        upload = serializer.save(user_id=request.user.pk)
+        uploads.create_partial(upload)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def like_article(request, article_id):
-    """Allow users to like/unlike an article"""
+
+class UploadDetailView(APIView):
+    """API endpoint to resume, append to or abort one of the user's uploads"""
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, pk):
+        return get_object_or_404(Upload, pk=pk, user_id=self.request.user.pk)
+
+    def offset_response(self, upload, code=status.HTTP_200_OK, **extra):
+        response = Response({**UploadSerializer(upload).data, **extra}, status=code)
+        response['Upload-Offset'] = str(upload.offset)
+        return response
+
+    def get(self, request, pk):
+        """Return the acknowledged offset to resume from"""
+        return self.offset_response(self.get_upload(pk))
+
+    def patch(self, request, pk):
+        """Append the raw body at the offset given in the Upload-Offset header"""
+        upload = self.get_upload(pk)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({"error": "Upload-Offset and Content-Length headers are required"}, status=status.HTTP_400_BAD_REQUEST)
+        if offset != upload.offset:
+            return self.offset_response(upload, status.HTTP_409_CONFLICT, error="Upload-Offset does not match the acknowledged offset")
+        if length > settings.BLOG_UPLOAD_CHUNK_MAX_MB * 1024 * 1024:
+            return Response({"error": f"Chunks may be at most {settings.BLOG_UPLOAD_CHUNK_MAX_MB} MB"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if length < 1 or offset + length > upload.size:
+            return Response({"error": "Chunk must be non-empty and end within the declared size"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk = uploads.receive(upload, request.stream, length)
+        except uploads.IncompleteChunk as exc:
+            return self.offset_response(upload, status.HTTP_400_BAD_REQUEST, error=str(exc))
+        try:
+            with transaction.atomic():
+                # A concurrent append at the same offset may have won the race
+                # while the body streamed in; only the lock holder writes.
+                upload = get_object_or_404(
+                    Upload.objects.select_for_update(), pk=upload.pk)
+                if upload.offset != offset:
+                    return self.offset_response(upload, status.HTTP_409_CONFLICT, error="Upload-Offset does not match the acknowledged offset")
+                upload.offset, digest = uploads.append(upload, chunk)
+                upload.save(update_fields=['offset', 'updated_at'])
+        finally:
+            uploads.discard_chunk(chunk)
+        uploads.acknowledge(upload, upload.offset, digest)
+        return self.offset_response(upload)
+
+    def delete(self, request, pk):
+        """Abort the upload and remove its partial file"""
+        self.get_upload(pk).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadCompleteView(APIView):
+    """API endpoint to attach a finished upload as a thumbnail or avatar"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """Verify the checksum and move the file into the target's image field"""
+        upload = get_object_or_404(Upload, pk=pk, user_id=request.user.pk)
+        target = UploadCompleteSerializer(data=request.data)
+        if not target.is_valid():
+            return Response(target.errors, status=status.HTTP_400_BAD_REQUEST)
+        if upload.offset != upload.size:
+            return Response({"error": "Upload is incomplete", "offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+        if upload.sha256 and uploads.checksum(upload) != upload.sha256:
+            upload.delete()
+            return Response({"error": "Checksum mismatch; upload discarded"}, status=status.HTTP_400_BAD_REQUEST)
+
+        field = target.validated_data['target']
+        if field == 'thumbnail':
+            instance = get_object_or_404(Article, pk=target.validated_data['article'])
+            if instance.author_id != request.user.pk:
+                return Response({"error": "You can only change your own articles"}, status=status.HTTP_403_FORBIDDEN)
+            serializer_class = ArticleSerializer
+        else:
+            instance, _ = Profile.objects.get_or_create(user_id=request.user.pk)
+            serializer_class = ProfileSerializer
+
+        file = uploads.finished_file(upload)
+        try:
+            serializer = serializer_class(
+                instance, data={field: file}, partial=True, context={'request': request})
+            if not serializer.is_valid():
+                upload.delete()
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                serializer.save()
+                upload.delete()
+        finally:
+            file.close()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+def _engagement_response(request, article_id, relation, messages):
+    """Apply a like/favorite write and build the matching response.
+
+    POST toggles, PUT sets and DELETE clears; PUT and DELETE are idempotent
+    so client retries never flip the state back.
+    """
+    user_id = request.user.pk
     try:
-        article = Article.objects.get(id=article_id)
-        if request.user in article.likes.all():
-            article.likes.remove(request.user)
-            return Response({"message": "Like removed"}, status=status.HTTP_200_OK)
+        if request.method == 'PUT':
+            created = Article.add_engagement(relation, article_id, user_id)
+            key = 'added' if created else 'already'
+            code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        elif request.method == 'DELETE':
+            Article.remove_engagement(relation, article_id, user_id)
+            # A 204 carries no body.
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        elif Article.toggle_engagement(relation, article_id, user_id):
+            key, code = 'added', status.HTTP_201_CREATED
         else:
-            article.likes.add(request.user)
-            return Response({"message": "Article liked"}, status=status.HTTP_201_CREATED)
+            key, code = 'removed', status.HTTP_200_OK
     except Article.DoesNotExist:
         return Response({"error": "Article not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"message": messages[key]}, status=code)
 
 
-@api_view(['POST'])
+@api_view(['POST', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def like_article(request, article_id):
+    """Allow users to like/unlike an article"""
+    return _engagement_response(request, article_id, 'likes', {
+        'added': "Article liked",
+        'already': "Article already liked",
+        'removed': "Like removed",
+    })
+
+
+@api_view(['POST', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def toggle_favorite(request, article_id):
     """Allow users to add/remove an article from their favorites"""
-    try:
-        article = Article.objects.get(id=article_id)
-        if request.user in article.favorited_by.all():
-            article.favorited_by.remove(request.user)
-            return Response({"message": "Article removed from favorites"}, status=status.HTTP_200_OK)
-        else:
-            article.favorited_by.add(request.user)
-            return Response({"message": "Article added to favorites"}, status=status.HTTP_201_CREATED)
-    except Article.DoesNotExist:
-        return Response({"error": "Article not found"}, status=status.HTTP_404_NOT_FOUND)
+    return _engagement_response(request, article_id, 'favorited_by', {
+        'added': "Article added to favorites",
+        'already': "Article already in favorites",
+        'removed': "Article removed from favorites",
+    })
 
 
-class FavoriteArticlesView(generics.ListAPIView):
+class FavoriteArticlesView(ArticleFieldsetMixin, FastArticleListMixin,
+                           generics.ListAPIView):
     """View to list all articles favorited by the logged-in user"""
+    queryset = Article.objects.select_related('author__profile')
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return only the articles favorited by the logged-in user"""
-        return Article.objects.filter(favorited_by=self.request.user)
+        return super().get_queryset().filter(favorited_by=self.request.user.pk)
+
+
+class ArticleExportView(APIView):
+    """Admin-only streaming export of articles as NDJSON or CSV"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Stream the export; X-Export-Watermark is the next updated_since"""
+        params = request.query_params
+        output = params.get('output', 'ndjson')
+        if output not in FORMATS:
+            return Response({"error": f"output must be one of {', '.join(sorted(FORMATS))}"}, status=status.HTTP_400_BAD_REQUEST)
+        include_comments = params.get('comments', '').lower() in ('1', 'true')
+        since = None
+        if params.get('updated_since'):
+            since = parse_datetime(params['updated_since'])
+            if since is None:
+                return Response({"error": "updated_since must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, datetime.timezone.utc)
+
+        watermark = new_watermark()
+        response = StreamingHttpResponse(
+            encode_rows(export_rows(since, include_comments), output, include_comments),
+            content_type=FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="articles.{output}"'
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
+
+
+class ProfilingReportView(APIView):
+    """Admin-only per-endpoint latency/query report from ProfilingMiddleware"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return p50/p95/p99 per endpoint plus cache hit ratios and pool stats"""
+        return Response({
+            "profiling_enabled": settings.BLOG_PROFILING,
+            "endpoints": build_report(),
+            "response_cache": cache_stats(),
+            "db_pool": pool_stats(),
+        }, status=status.HTTP_200_OK)
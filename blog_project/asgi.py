@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blog_project.settings")
+# Connection defaults in settings depend on the server interface.
+os.environ.setdefault("SERVER_INTERFACE", "asgi")
 
 application = get_asgi_application()
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from decouple import config
 from pathlib import Path
 
@@ -29,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.profiling.ProfilingMiddleware',
+    'blog.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -59,20 +62,97 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "blog_project.wsgi.application"
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT'),
-        'OPTIONS': {
-            'sslmode': 'require',
+# Database: remote Postgres by default. DB_ENGINE=sqlite gives a local file
+# database (NAME defaults to db.sqlite3) for tests and quick setups; a local
+# Postgres only needs DB_SSLMODE=disable.
+DB_ENGINE = config('DB_ENGINE', default='postgresql')
+# Persistent connections skip the TCP+TLS handshake and backend start on every
+# request; health checks replace connections that died while idle. They are
+# the default under WSGI only: ASGI runs sync code on a thread pool with one
+# connection per thread, so persistent connections leak there (use DB_POOL).
+# SERVER_INTERFACE is set by blog_project/wsgi.py and asgi.py; the blog app
+# logs a warning at startup when ASGI runs with CONN_MAX_AGE > 0 and no pool.
+SERVER_INTERFACE = config('SERVER_INTERFACE', default='')
+DB_CONN_MAX_AGE = config(
+    'DB_CONN_MAX_AGE', default=60 if SERVER_INTERFACE == 'wsgi' else 0, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# DB_POOL=true shares connections between threads through blog.pool instead:
+# they return to the pool at the end of each request (CONN_MAX_AGE=0) and at
+# most DB_POOL_MAX_SIZE stay open per process. Stats: /api/admin/profiling/.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'blog.pool' if DB_POOL else 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST'),
+            'PORT': config('DB_PORT'),
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                'sslmode': config('DB_SSLMODE', default='require'),
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=10, cast=int),
+            }
         }
     }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+            'check': DB_CONN_HEALTH_CHECKS,
+        }
+
+# Optional read replica (see blog/routers.py): DB_REPLICA_HOST enables it and
+# the other DB_REPLICA_* settings default to the primary's. Users read from
+# the primary for DB_REPLICA_STICKY_SECONDS after each of their writes.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+BLOG_READ_REPLICA = 'replica' if DB_REPLICA_HOST and DB_ENGINE != 'sqlite' else None
+if BLOG_READ_REPLICA:
+    DATABASES[BLOG_READ_REPLICA] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+BLOG_REPLICA_CACHE = 'default'
+BLOG_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# Password hashing (see blog/hashers.py): PASSWORD_HASHER picks the hasher new
+# passwords get; the rest still verify old hashes, which are upgraded on login.
+BLOG_PASSWORD_HASHERS = {
+    'argon2': 'blog.hashers.Argon2PasswordHasher',
+    'bcrypt': 'blog.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
 }
+BLOG_PASSWORD_HASHER = config('PASSWORD_HASHER', default='argon2')
+PASSWORD_HASHERS = [BLOG_PASSWORD_HASHERS[BLOG_PASSWORD_HASHER]] + [
+    path for name, path in BLOG_PASSWORD_HASHERS.items() if name != BLOG_PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+# Argon2id defaults follow the OWASP minimum (19 MiB, 2 passes, 1 lane)
+# rather than Django's 100 MiB x 8 lanes, which is costly under bursts.
+BLOG_ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+BLOG_ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=19456, cast=int)
+BLOG_ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=1, cast=int)
+BLOG_BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+# Registrations hashing at once per process (on their request threads); the
+# rest wait. 0 leaves hashing uncapped.
+BLOG_PASSWORD_HASH_CONCURRENCY = config('PASSWORD_HASH_CONCURRENCY', default=0, cast=int)
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -91,11 +171,30 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# JWT: build request.user from token claims instead of a User query (see
+# blog/authentication.py). The denylist lives in the cache, so use REDIS_URL
+# when running more than one process.
+BLOG_JWT_STATELESS = config('JWT_STATELESS', default=True, cast=bool)
+BLOG_JWT_DENYLIST_CACHE = 'default'
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=config('JWT_ACCESS_MINUTES', default=5, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=config('JWT_REFRESH_DAYS', default=1, cast=int)),
+    'TOKEN_USER_CLASS': 'blog.authentication.ClaimsUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'blog.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'blog.authentication.DenylistTokenRefreshSerializer',
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog.authentication.StatelessJWTAuthentication'
+        if BLOG_JWT_STATELESS else
+        'blog.authentication.DenylistJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_PAGINATION_CLASS': 'blog.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
@@ -109,3 +208,80 @@ CORS_ALLOW_CREDENTIALS = True
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Image uploads (see blog/images.py): renditions are rendered after commit on
+# IMAGE_WORKERS processes (0 renders inline), one JPEG and one WebP per size
+# name, fitted into a square box of that many pixels. Their names are content
+# hashes, so serve MEDIA_URL/renditions/ with a year-long immutable max-age.
+# Uploads must decode as JPEG, PNG, GIF or WebP within IMAGE_MAX_PIXELS.
+BLOG_IMAGE_RENDITIONS = {
+    'thumbnail': {'small': 320, 'medium': 640, 'large': 1280},
+    'avatar': {'small': 64, 'medium': 128, 'large': 256},
+}
+BLOG_IMAGE_QUALITY = config('IMAGE_QUALITY', default=80, cast=int)
+BLOG_IMAGE_MAX_UPLOAD_MB = config('IMAGE_MAX_UPLOAD_MB', default=10, cast=int)
+BLOG_IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=40_000_000, cast=int)
+BLOG_IMAGE_WORKERS = config('IMAGE_WORKERS', default=2, cast=int)
+
+# Chunked uploads (see blog/uploads.py): partial files live in UPLOAD_DIR,
+# which should be on MEDIA_ROOT's filesystem so completing is a rename.
+# purge_uploads removes uploads idle for UPLOAD_EXPIRY_HOURS.
+BLOG_UPLOAD_DIR = config('UPLOAD_DIR', default=os.path.join(BASE_DIR, 'uploads'))
+BLOG_UPLOAD_CHUNK_MAX_MB = config('UPLOAD_CHUNK_MAX_MB', default=8, cast=int)
+BLOG_UPLOAD_EXPIRY_HOURS = config('UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+
+# Account deletion (see blog/deletion.py): DELETE /api/profile/ deactivates
+# the user and removes their rows on ACCOUNT_DELETION_WORKERS threads (0 runs
+# inline after commit), ACCOUNT_DELETION_BATCH rows per transaction. Run
+# resume_account_deletions after restarts to finish interrupted jobs.
+BLOG_ACCOUNT_DELETION_WORKERS = config('ACCOUNT_DELETION_WORKERS', default=1, cast=int)
+BLOG_ACCOUNT_DELETION_BATCH = config('ACCOUNT_DELETION_BATCH', default=500, cast=int)
+
+# Cache: local memory by default, any Redis-compatible server via REDIS_URL
+REDIS_URL = config('REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Anonymous article list/detail response cache (see blog/cache.py); likes,
+# favorites and comments leave chronological list pages cached for up to
+# RESPONSE_CACHE_TIMEOUT seconds
+BLOG_RESPONSE_CACHE = 'default'
+BLOG_RESPONSE_CACHE_ENABLED = config(
+    'RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+BLOG_RESPONSE_CACHE_TIMEOUT = config(
+    'RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Read-only fast path for article list pages (see blog/fastpath.py): rows
+# from values_list() rendered with orjson, byte-identical to the serializers.
+BLOG_FAST_JSON = config('FAST_JSON', default=False, cast=bool)
+
+# Per-endpoint profiling (Server-Timing headers + profiling_report)
+BLOG_PROFILING = config('PROFILING', default=False, cast=bool)
+BLOG_PROFILING_CACHE = 'default'
+BLOG_PROFILING_FLUSH_INTERVAL = config(
+    'PROFILING_FLUSH_INTERVAL', default=10, cast=int)
+
+# Bulk create endpoints (/api/articles/bulk/, /api/comments/bulk/)
+BLOG_BULK_MAX_ITEMS = config('BULK_MAX_ITEMS', default=500, cast=int)
+
+# Incremental exports (see blog/export.py): the handed-out watermark trails
+# the export's start by this much so rows committed late are not skipped;
+# runs overlap, and consumers upsert by id.
+BLOG_EXPORT_WATERMARK_OVERLAP_SECONDS = config(
+    'EXPORT_WATERMARK_OVERLAP_SECONDS', default=300, cast=int)
+
+# Trending feed: exponential decay half-life, event weights and the score
+# below which compact_trending drops an article from the feed. Unlikes and
+# deleted comments only leave the scores on compact_trending --rebuild.
+BLOG_TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=24, cast=float)
+BLOG_TRENDING_WEIGHTS = {'likes': 1.0, 'favorited_by': 2.0, 'comments': 0.5}
+BLOG_TRENDING_MIN_SCORE = config('TRENDING_MIN_SCORE', default=0.05, cast=float)
+
+# Full-text search (Postgres text search configuration)
+BLOG_SEARCH_CONFIG = config('SEARCH_CONFIG', default='english')